@@ -49,10 +49,17 @@ Additional features:
 3.  ANSI support
     ANSI codes are displayed in the AccessPanel.  See the 'ANSI'
     extension for more details.
+4.  Bounded scrollback
+    The AccessPanel can limit the size of its output, in lines
+    (the 'max_lines' argument) or in characters (the 'max_chars'
+    argument).  When the limit is exceeded, the oldest lines are
+    removed in a large block, so that the output isn't trimmed
+    after every message.
 
 """
 
-from collections import OrderedDict
+from collections import OrderedDict, deque
+import re
 
 import wx
 
@@ -78,6 +85,13 @@ NAV_KEYS.add(wx.WXK_WINDOWS_RIGHT)
 NAV_KEYS.add(wx.WXK_CONTROL)
 NAV_KEYS.add(wx.WXK_SHIFT)
 
+# Lines of a message, with their line endings
+RE_LINE = re.compile(r"[^\n]*\n|[^\n]+")
+
+# When the scrollback is trimmed, remove this fraction of the limit
+# in addition to what exceeds it
+TRIM_BLOCK = 0.25
+
 # Event definition
 myEVT_MESSAGE = wx.NewEventType()
 EVT_MESSAGE = wx.PyEventBinder(myEVT_MESSAGE, 1)
@@ -86,10 +100,11 @@ class MessageEvent(wx.PyCommandEvent):
 
     """Event when a message is received."""
 
-    def __init__(self, etype, eid, value=None, pos=None):
+    def __init__(self, etype, eid, value=None, pos=None, spans=None):
         wx.PyCommandEvent.__init__(self, etype, eid)
         self._value = value
         self._pos = pos
+        self._spans = spans
 
     def GetValue(self):
         """Return the event's value."""
@@ -99,6 +114,10 @@ class MessageEvent(wx.PyCommandEvent):
         """Return the event's value."""
         return self._pos
 
+    def GetSpans(self):
+        """Return the style spans of an already tokenized message."""
+        return self._spans
+
 
 ## AccessPanel class
 class AccessPanel(wx.Panel):
@@ -110,6 +129,10 @@ class AccessPanel(wx.Panel):
         history (default False): activate command history.
         lock_input (default False): activate the lock in input.
         ansi (default False): activate the ANSI extension.
+        max_lines (default 0): maximum number of lines in the output.
+        max_chars (default 0): maximum number of characters in the output.
+
+    A limit of 0 means the output isn't limited.
 
     Example:
     >>> import wx
@@ -138,14 +161,20 @@ class AccessPanel(wx.Panel):
         IsEditing: is the cursor in the editing section?
         OnInput: text is sent by the user pressing RETURN.
         ClearInput: the input text is cleared.
+        InsertOutput: insert text at the end of the output, before the input.
+        TrimOutput: remove the oldest lines if the output is too large.
         Send: send text to the output field (it will added in the output).
 
     """
 
     def __init__(self, parent, rich=True, history=False, lock_input=False,
-            ansi=False):
+            ansi=False, max_lines=0, max_chars=0):
         super(AccessPanel, self).__init__(parent)
         self.editing_pos = 0
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.output_lines = deque()
+        self.output_size = 0
         self.extensions = OrderedDict()
         self.rich = rich
         self.screenreader_support = True
@@ -226,12 +255,85 @@ class AccessPanel(wx.Panel):
     def ClearOutput(self):
         """Clear the output."""
         self.editing_pos = 0
+        self.output_lines.clear()
+        self.output_size = 0
         self.output.Clear()
 
         # Trigger extensions
         for extension in self.extensions.values():
             extension.OnClearOutput()
 
+    def InsertOutput(self, text):
+        """Insert the text at the end of the output, before the input.
+
+        The existing output isn't read back and the input isn't
+        removed: the text is written at the editing position, which
+        is then moved after it.  Return the number of positions
+        taken by the text.
+
+        """
+        if self.rich:
+            text = text.replace("\r\n", "\n")
+
+        # Keep the size of each line for the scrollback
+        size = 0
+        for line in RE_LINE.findall(text):
+            self.output_lines.append(len(line))
+            size += len(line)
+
+        self.output_size += size
+        self.output.SetInsertionPoint(self.editing_pos)
+        self.output.WriteText(text)
+        self.editing_pos += size
+        return size
+
+    def TrimOutput(self):
+        """Remove the oldest lines if the output exceeds its limits.
+
+        The size of every line in the output is kept in the
+        'output_lines' deque, so the text field doesn't have to be
+        queried.  When a limit is exceeded, the lines are removed
+        until the output is below the exceeded limit minus a block
+        (see 'TRIM_BLOCK'), so the text field is only modified every
+        so often.  A limit that isn't exceeded doesn't remove lines.
+
+        Return the number of positions removed from the beginning
+        of the output (0 if nothing has been removed).
+
+        """
+        max_lines = self.max_lines
+        max_chars = self.max_chars
+        lines = self.output_lines
+        too_many_lines = bool(max_lines and len(lines) > max_lines)
+        too_many_chars = bool(max_chars and self.output_size > max_chars)
+        if not too_many_lines and not too_many_chars:
+            return 0
+
+        # Remove the lines until the exceeded limits are satisfied
+        removed = 0
+        nb_lines = len(lines)
+        if too_many_lines:
+            nb_lines = max_lines - int(max_lines * TRIM_BLOCK)
+        if too_many_chars:
+            max_size = max_chars - int(max_chars * TRIM_BLOCK)
+        else:
+            max_size = self.output_size
+
+        while lines and (len(lines) > nb_lines or
+                self.output_size > max_size):
+            size = lines.popleft()
+            self.output_size -= size
+            removed += size
+
+        self.output.Remove(0, removed)
+        self.editing_pos = max(0, self.editing_pos - removed)
+
+        # Trigger extensions
+        for extension in self.extensions.values():
+            extension.OnTrimOutput(removed)
+
+        return removed
+
     def OnInput(self, message):
         """A message has been sent by pressing RETURN.
 
@@ -250,48 +352,42 @@ class AccessPanel(wx.Panel):
 
         """
         origin = pos = self.output.GetInsertionPoint()
-        if not self.screenreader_support:
-            self.output.Freeze()
-
         message = e.GetValue()
         mark = e.GetPos()
+        spans = e.GetSpans()
 
         # Normalize new lines
         message = "\r\n".join(message.splitlines())
 
         # Modify the text based on extensions
         for extension in self.extensions.values():
-            message = extension.OnMessage(message)
+            message = extension.OnMessage(message, spans=spans)
             if not message:
                 return
 
         if not message.endswith("\r\n"):
             message += "\r\n"
 
-        # Get the text before the editing line
-        output = self.output.GetRange(0, self.editing_pos)
-        input = self.input
+        if not self.screenreader_support:
+            self.output.Freeze()
 
-        # Clears the output field and pastes the text back in
-        self.ClearInput()
-        self.output.AppendText(message)
+        # Insert the message before the input, the input is left untouched
+        editing_pos = self.editing_pos
+        size = self.InsertOutput(message)
 
         # If the cursor is beyond the editing position
-        if pos >= self.editing_pos:
-            if self.rich:
-                pos += len(message.replace("\r\n", "\n"))
-            else:
-                pos += len(message)
-
-        # We have added some text, the editing position should be
-        # at the end of the text
-        self.editing_pos = self.output.GetLastPosition()
-        self.output.AppendText(input)
+        if pos >= editing_pos:
+            pos += size
 
         # Call the extensions' PostMessage
         for extension in self.extensions.values():
             extension.PostMessage(message)
 
+        # Trim the output if it's too large and move the positions
+        removed = self.TrimOutput()
+        origin = max(0, origin - removed)
+        pos = max(0, pos - removed)
+
         if not self.screenreader_support:
             self.output.Thaw()
 
@@ -301,9 +397,15 @@ class AccessPanel(wx.Panel):
         else:
             self.output.SetInsertionPoint(pos)
 
-    def Send(self, message, pos=None):
-        """Create an event to send the message to the window."""
-        evt = MessageEvent(myEVT_MESSAGE, -1, message, pos)
+    def Send(self, message, pos=None, spans=None):
+        """Create an event to send the message to the window.
+
+        If the message has already been tokenized (see the 'tokenizer'
+        module), its spans can be given: the message should then
+        contain plain text.
+
+        """
+        evt = MessageEvent(myEVT_MESSAGE, -1, message, pos, spans)
         wx.PostEvent(self, evt)
 
     def OnKeyDown(self, e):
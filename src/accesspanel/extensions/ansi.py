@@ -26,22 +26,13 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import re, string
-
 import wx
 import wx.lib.colourdb
 
+from accesspanel.tokenizer import ANSITokenizer, DEFAULT, rgb, runs
+from accesspanel.tokenizer import BOLD, DIM, ITALIC, UNDERLINE, REVERSE
 from .base import BaseExtension
 
-## Constants
-# Regular expressions to capture ANSI codes
-RE_CODE = re.compile(r"^(?:(\d+)(?:\;(\d+)(?:\;(\d+))?)?)?$", re.UNICODE)
-
-# Brightness
-NORMAL = 1
-BRIGHT = 2
-UNDERLINE = 3
-
 class ANSI(BaseExtension):
 
     """Manage the ANSI codes to have color in the text.
@@ -52,12 +43,15 @@ class ANSI(BaseExtension):
     Brief reminder:
         ANSI codes are placed in the text, between a '\x1b[' sequence
         and a final 'm'. In between are numbers separated with a
-        semicolon.  The first number represents the level of
-        brightness (0 for normal, 1 for bright, 4 for underline,
-        7 for negative).  The second number represents the foreground
-        color and should be between 30 and 37 (see the list below).
-        The third number represents the background color and should be
-        between 40 and 47 (the same list of color applies).
+        semicolon.  0 resets the style, 1 selects bright colors,
+        2 dark colors, 3 italic, 4 underline and 7 negative.
+        Numbers between 30 and 37 select the foreground color,
+        numbers between 40 and 47 select the background color (see
+        the list below).  90 to 97 and 100 to 107 select bright
+        foreground and background colors.  Extended colors are
+        supported:  '38;5;n' selects the color n (0 to 255) of the
+        256-color palette, '38;2;r;g;b' selects a RGB color
+        (48 instead of 38 selects the background color).
 
     List of colors:
         | Color      | Foreground | Background |
@@ -74,19 +68,37 @@ class ANSI(BaseExtension):
         "\x1b[0;31;47m" means red on white.
         "\x1b[1;33m" means bright yellow on default background.
         "\x1b[4;36m" means underline cyan on default background.
+        "\x1b[38;5;208m" means orange on default background.
         "\x1b[0m" means back to default colors.
 
+    The text is parsed by an ANSITokenizer (see the 'tokenizer'
+    module), unless the message has already been tokenized, in which
+    case its spans are given to 'OnMessage'.  Text attributes are
+    created once for each style and kept in the 'attributes'
+    dictionary.
+
+    Styles are applied after the message has been displayed
+    (see 'PostMessage'):  adjacent spans with the same style are
+    merged and spans with the default style are skipped, the text
+    being written with the default style.  The number of calls to
+    'SetStyle' is kept in 'nb_styles', the number of calls saved by
+    merging in 'nb_saved'.
+
     """
 
     def __init__(self, panel):
         super().__init__(panel)
         wx.lib.colourdb.updateColourDB()
-        self.brightness = NORMAL
         self.foreground = wx.BLACK
         self.background = wx.WHITE
         self.default_foreground = wx.BLACK
         self.default_background = wx.WHITE
         self.modifiers = []
+        self.tokenizer = ANSITokenizer()
+        self.attributes = {}
+        self.default_style = None
+        self.nb_styles = 0
+        self.nb_saved = 0
 
         # Color codes
         self.normal_colors = {
@@ -133,145 +145,100 @@ class ANSI(BaseExtension):
         self.modifiers = []
         self.start_mark = None
         self.last_mark = None
+        self.tokenizer.reset()
 
-    def OnMessage(self, message):
-        """Interpret the ANSI codes."""
+    def OnTrimOutput(self, size):
+        """The beginning of the output has been removed."""
+        self.modifiers = [(max(0, point - size), style) for point, style in
+                self.modifiers]
+        if self.start_mark is not None:
+            self.start_mark = max(0, self.start_mark - size)
 
-        # Variables
-        point = self.panel.editing_pos
-        ansi_stage = 1
-        ansi_buffer = ""
-        clean_buffer = ""
-        char_index = 0
-
-        def select_colors(code):
-            """
-            Transforms ANSI sequences in a format specifier
-            """
-
-            match = RE_CODE.match(code)
-
-            # ANSI style sequences have tree parts
-            p1, p2, p3 = match.groups()
-            brightness, foreground, background = (None, None, None)
-
-            if p1:
-                p1 = int(p1.strip())
-
-                if p1 in (0, 1, 4, 7):
-                    brightness = p1
-                elif p1 in range(30, 38):
-                    foreground = p1
-                elif p1 in range(40, 48):
-                    background = p1
-
-            if p2:
-                p2 = int(p2.strip())
-
-                if p2 in range(30, 40):
-                    foreground = p2
-                elif p2 in range(40, 50):
-                    background = p2
-
-            if p3:
-                p3 = int(p3.strip())
-
-                if p3 in range(40, 50):
-                    background = p3
-
-            if brightness == 1:
-                brightness = BRIGHT
-            elif brightness == 4:
-                brightness = UNDERLINE
-            else:
-                brightness = NORMAL
-
-
-            # Now the colors
-            colorlist = None
-
-            if brightness == BRIGHT:
-                colorlist = self.bright_colors
-            elif brightness == UNDERLINE:
-                colorlist = self.dark_colors
-            else:
-                colorlist = self.normal_colors
+    def OnMessage(self, message, spans=None):
+        """Interpret the ANSI codes."""
+        if spans is None:
+            message, spans = self.tokenizer.tokenize(message)
+        else:
+            # The message has already been tokenized
+            message = message.replace("\r", "")
 
-            if foreground:
-                foreground = colorlist[foreground+10]
-            else:
-                foreground = self.default_foreground
+        # The text is written with the default style
+        if self.default_style is None:
+            self.default_style = self.GetAttribute(DEFAULT)
+            self.panel.output.SetDefaultStyle(self.default_style)
 
-            if background:
-                background = colorlist[background]
+        point = self.panel.editing_pos
+        self.modifiers.extend((point + offset, style)
+                for offset, style in spans)
+        return message
+
+    def GetColour(self, color, flags, default):
+        """Return the wx.Colour of a color in a style."""
+        if color is None:
+            return default
+        elif isinstance(color, int) and color < 16:
+            if color >= 8:
+                colors = self.bright_colors
+                color -= 8
+            elif flags & BOLD:
+                colors = self.bright_colors
+            elif flags & DIM:
+                colors = self.dark_colors
             else:
+                colors = self.normal_colors
 
-                if brightness == BRIGHT:
-                    background = wx.BLACK
-                elif brightness == UNDERLINE:
-                    background = wx.YELLOW
-                else:
-                    background = self.default_background
-
-            return (foreground, background)
-
-        # We must iterate over the entire message string
-        while char_index < len(message):
-
-            # First stage: look for a 0x1B character and switch to second stage
-            if ansi_stage == 1:
-                if message[char_index] == "\x1B":
-                    ansi_stage = 2
-                else:
-
-                    # We must discard \r characters because it causes problems at formatting time
-                    if message[char_index] != "\r":
-                        clean_buffer += message[char_index]
-
-            # Second stage: look for a validation character (an '[')
-            elif ansi_stage == 2:
-                if message[char_index] == "[":
-                    ansi_stage = 3
-                    ansi_buffer = ""
-                else:
-                    ansi_stage = 1
+            return colors[40 + color]
 
-                    # Just add the two last characters
-                    clean_buffer += message[char_index-1:char_index]
+        return wx.Colour(*rgb(color))
 
-            # Last stage: process ANSI command with arguments
-            elif ansi_stage == 3:
-                if message[char_index] in string.digits+";":
-                    ansi_buffer += message[char_index]
+    def GetAttribute(self, style):
+        """Return the wx.TextAttr of a style, creating it if needed."""
+        attribute = self.attributes.get(style)
+        if attribute is None:
+            foreground, background, flags = style
+            foreground = self.GetColour(foreground, flags,
+                    self.default_foreground)
+            background = self.GetColour(background, 0,
+                    self.default_background)
+            if flags & REVERSE:
+                foreground, background = background, foreground
 
-                # Now we have all arguments and the command (too generic detection for now...)
-                else:
-                    ansi_stage = 1
-                    self.modifiers.append((point+len(clean_buffer), select_colors(ansi_buffer)))
+            attribute = wx.TextAttr(foreground, background)
+            if flags & UNDERLINE:
+                attribute.SetFontUnderlined(True)
+            if flags & ITALIC:
+                attribute.SetFontStyle(wx.FONTSTYLE_ITALIC)
+            self.attributes[style] = attribute
 
-                    ansi_buffer = ""
-
-            char_index += 1
-
-
-        return clean_buffer
+        return attribute
 
     def PostMessage(self, message):
-        """Applies ANSI style to text"""
-
-        for point, style in self.modifiers:
-            if not self.last_mark:
-                self.last_mark = style
-                self.start_mark = point
-                continue
-
-            # Unpack foreground and background from style tuple
-            foreground, background = self.last_mark
-
-            self.panel.output.SetStyle(self.start_mark, point, wx.TextAttr(
-                    foreground, background))
+        """Applies ANSI style to text.
 
-            self.start_mark = point
-            self.last_mark = style
+        The last span of the previous message is continued by the
+        spans of this message.  Style runs are merged (see
+        'tokenizer.runs') and applied together.
 
+        """
+        modifiers = self.modifiers
         self.modifiers = []
+        if not modifiers:
+            return
+
+        # Without merging, every change of style would need a call
+        nb_calls = len(modifiers)
+        if self.last_mark:
+            modifiers.insert(0, (self.start_mark, self.last_mark))
+        else:
+            nb_calls -= 1
+
+        styled, (self.start_mark, self.last_mark) = runs(modifiers)
+        self.nb_styles += len(styled)
+        self.nb_saved += nb_calls - len(styled)
+        if not styled:
+            return
+
+        # The panel is already frozen, unless the screen reader is used
+        output = self.panel.output
+        for start, end, style in styled:
+            output.SetStyle(start, end, self.GetAttribute(style))
@@ -54,12 +54,13 @@ class BaseExtension:
         """
         return text
 
-    def OnMessage(self, text):
+    def OnMessage(self, text, spans=None):
         """Alter the message sent to the AccessPanel.
 
         The given message is sent to the AccessPanel after the
         extensions have modified it.  This method should also return
-        the modified text.
+        the modified text.  If the message has already been
+        tokenized, 'spans' contains its style spans.
 
         """
         return text
@@ -72,6 +73,15 @@ class BaseExtension:
         """The output has been cleared."""
         pass
 
+    def OnTrimOutput(self, size):
+        """The beginning of the output has been removed.
+
+        The 'size' argument contains the number of positions removed:
+        positions kept by the extension should be moved accordingly.
+
+        """
+        pass
+
     def OnKeyDown(self, modifiers, key):
         """Add keyboard handling for this extension.
 
@@ -0,0 +1,267 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the ANSI tokenizer.
+
+The tokenizer reads text containing ANSI escape sequences and returns
+the plain text, along with a compact list of style changes (spans).
+Each span is a tuple (offset, style), meaning the style applies from
+this offset in the plain text until the next span.
+
+A style is a tuple (foreground, background, flags):
+    foreground and background are None (the default color), an index
+    in the 256-color palette (0 to 255) or a tuple (red, green, blue).
+    flags is a combination of BOLD, DIM, ITALIC, UNDERLINE and REVERSE.
+
+The tokenizer keeps the current style from one line to the next, as
+a terminal would.  It doesn't depend on wx: converting styles into
+text attributes is the job of the ANSI extension.
+
+Example:
+>>> tokenizer = ANSITokenizer()
+>>> tokenizer.feed("You see \\x1b[1;31ma goblin\\x1b[0m.")
+('You see a goblin.', [(0, (None, None, 0)), (8, (1, None, 1)), (16, (None, None, 0))])
+
+"""
+
+import re
+
+## Constants
+# Regular expression to capture escape sequences
+RE_ESCAPE = re.compile(r"\x1b\[([0-9;]*)([@-~])|\x1b")
+
+# Style flags
+BOLD = 1
+DIM = 2
+ITALIC = 4
+UNDERLINE = 8
+REVERSE = 16
+
+# Default style
+DEFAULT = (None, None, 0)
+
+# SGR codes setting and clearing flags
+SET_FLAGS = {1: BOLD, 2: DIM, 3: ITALIC, 4: UNDERLINE, 7: REVERSE}
+CLEAR_FLAGS = {21: BOLD | DIM, 22: BOLD | DIM, 23: ITALIC, 24: UNDERLINE,
+        27: REVERSE}
+
+class ANSITokenizer:
+
+    """Tokenizer of ANSI escape sequences.
+
+    Methods:
+        feed: tokenize a line and return the plain text and spans.
+        tokenize: tokenize several lines, separated by line breaks.
+        reset: go back to the default style.
+
+    """
+
+    def __init__(self):
+        self.style = DEFAULT
+
+    def reset(self):
+        """Go back to the default style."""
+        self.style = DEFAULT
+
+    def feed(self, line):
+        """Tokenize a line and return the plain text and the spans.
+
+        The first span always starts at offset 0 with the style in
+        effect at the beginning of the line, so that lines can be
+        removed or reordered without losing their style.
+
+        """
+        style = self.style
+        spans = [(0, style)]
+        if "\x1b" not in line:
+            return line, spans
+
+        text = []
+        offset = 0
+        last = 0
+        for match in RE_ESCAPE.finditer(line):
+            start = match.start()
+            if start > last:
+                text.append(line[last:start])
+                offset += start - last
+            last = match.end()
+
+            # Only SGR sequences (ending with 'm') change the style
+            if match.group(2) == "m":
+                style = self.select(match.group(1), style)
+                if style != spans[-1][1]:
+                    if spans[-1][0] == offset:
+                        spans[-1] = (offset, style)
+                    else:
+                        spans.append((offset, style))
+
+        text.append(line[last:])
+        self.style = style
+        return "".join(text), spans
+
+    def tokenize(self, text):
+        """Tokenize several lines.
+
+        The lines, separated by '\\n' or '\\r\\n', are kept (even
+        empty ones) and joined with '\\n' in the plain text.
+
+        """
+        lines = [self.feed(line) for line in text.replace(
+                "\r\n", "\n").split("\n")]
+        return join(lines, keep_empty=True)
+
+    @staticmethod
+    def select(parameters, style):
+        """Return the style modified by the SGR parameters."""
+        foreground, background, flags = style
+        codes = [int(code) if code else 0 for code in parameters.split(";")]
+        i = 0
+        while i < len(codes):
+            code = codes[i]
+            if code == 0:
+                foreground, background, flags = DEFAULT
+            elif code in SET_FLAGS:
+                flags |= SET_FLAGS[code]
+            elif code in CLEAR_FLAGS:
+                flags &= ~CLEAR_FLAGS[code]
+            elif 30 <= code <= 37:
+                foreground = code - 30
+            elif code == 39:
+                foreground = None
+            elif 40 <= code <= 47:
+                background = code - 40
+            elif code == 49:
+                background = None
+            elif 90 <= code <= 97:
+                foreground = code - 90 + 8
+            elif 100 <= code <= 107:
+                background = code - 100 + 8
+            elif code in (38, 48):
+                # Extended colors: 38;5;index or 38;2;red;green;blue
+                color = None
+                mode = codes[i + 1] if i + 1 < len(codes) else None
+                if mode == 5 and i + 2 < len(codes):
+                    color = min(codes[i + 2], 255)
+                    i += 2
+                elif mode == 2 and i + 4 < len(codes):
+                    color = tuple(min(value, 255) for value in
+                            codes[i + 2:i + 5])
+                    i += 4
+                else:
+                    i = len(codes)
+
+                if color is not None:
+                    if code == 38:
+                        foreground = color
+                    else:
+                        background = color
+            i += 1
+
+        return (foreground, background, flags)
+
+
+def join(lines, keep_empty=False):
+    """Join the tokenized lines and return the plain text and the spans.
+
+    'lines' is a list of tuples (text, spans), as returned by
+    'ANSITokenizer.feed'.  Empty lines are removed unless 'keep_empty'
+    is set.  The lines are joined with '\\n' and the offsets of the
+    spans are moved accordingly.
+
+    """
+    texts = []
+    spans = []
+    offset = 0
+    for text, line_spans in lines:
+        if not text and not keep_empty:
+            continue
+
+        if texts:
+            offset += 1
+        spans.extend((offset + start, style) for start, style in line_spans)
+        texts.append(text)
+        offset += len(text)
+
+    return "\n".join(texts), spans
+
+def runs(spans, default=DEFAULT):
+    """Return the style runs to apply and the last span.
+
+    'spans' is a list of tuples (offset, style).  Adjacent spans
+    with the same style are merged and empty spans are removed.  The
+    runs are returned as tuples (start, end, style), except the runs
+    with the default style, which don't need to be applied.  The last
+    span has no end yet:  it is returned separately, so that it can
+    be continued by the next spans.
+
+    >>> runs([(0, (1, None, 0)), (3, (1, None, 0)), (5, DEFAULT),
+    ...         (8, DEFAULT), (9, (2, None, 0)), (9, (3, None, 0))])
+    ([(0, 5, (1, None, 0))], (9, (3, None, 0)))
+
+    """
+    merged = []
+    for offset, style in spans:
+        if merged and merged[-1][1] == style:
+            continue
+        elif merged and merged[-1][0] == offset:
+            merged[-1] = (offset, style)
+            if len(merged) > 1 and merged[-2][1] == style:
+                del merged[-1]
+        else:
+            merged.append((offset, style))
+
+    if not merged:
+        return [], None
+
+    styled = []
+    for (start, style), (end, _) in zip(merged, merged[1:]):
+        if style != default:
+            styled.append((start, end, style))
+
+    return styled, merged[-1]
+
+def rgb(color):
+    """Return the (red, green, blue) tuple of a color in the palette.
+
+    Only colors of the 256-color palette beyond the first 16 (which
+    depend on the terminal) are converted.  Tuples are returned as is.
+
+    """
+    if isinstance(color, tuple):
+        return color
+
+    if 16 <= color <= 231:
+        color -= 16
+        levels = (0, 95, 135, 175, 215, 255)
+        return (levels[color // 36], levels[color // 6 % 6],
+                levels[color % 6])
+    elif 232 <= color <= 255:
+        level = 8 + (color - 232) * 10
+        return (level, level, level)
+
+    raise ValueError("the color {} depends on the terminal".format(color))
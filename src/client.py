@@ -36,29 +36,358 @@ already handles a great deal of the Telnet protocol.
 
 """
 
+from collections import deque
+import codecs
 import os
-import re
 import socket
 from telnetlib import Telnet, WONT, WILL, ECHO, NOP, AYT, IAC
 import threading
 import time
+import zlib
 
+from twisted.internet import reactor
 from twisted.internet.error import ConnectionDone
 from twisted.internet.protocol import ReconnectingClientFactory
-from twisted.conch.telnet import Telnet
+from twisted.conch.telnet import Telnet, GA, EOR, IAC as T_IAC, SB, SE
 import wx
 from wx.lib.pubsub import pub
 
+from accesspanel.tokenizer import ANSITokenizer, join
 from log import logger
 from screenreader import ScreenReader
 from screenreader import ScreenReader
+from scripting.executor import in_worker
 
 # Constants
-ANSI_ESCAPE = re.compile(r'\x1b[^m]*m')
+# MCCP (MUD Client Compression Protocol) options
+COMPRESS2 = bytes([86])
+COMPRESS3 = bytes([87])
+COMPRESS2_START = T_IAC + SB + COMPRESS2 + T_IAC + SE
+
+class LineBuffer:
+
+    """Buffer assembling the lines received from the server.
+
+    The server sends data in packets that don't necessarily end at
+    the end of a line.  The line buffer keeps the unterminated
+    end of the data (the tail) until the rest of the line is received,
+    so that only complete lines are handled.  The tail can also be
+    released (flushed) if it is a prompt, that is, a line that won't
+    be terminated.
+
+    The data is stored in a bytearray, so it's not copied every
+    time a packet is received.
+
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def feed(self, data):
+        """Add the data and return the complete lines as bytes.
+
+        The returned bytes end with a line break.  If no line is
+        complete, an empty bytes object is returned.
+
+        """
+        buffer = self.buffer
+        buffer += data
+        end = buffer.rfind(b"\n") + 1
+        if not end:
+            return b""
+
+        lines = bytes(buffer[:end])
+        del buffer[:end]
+        return lines
+
+    def flush(self):
+        """Return the unterminated tail, emptying the buffer."""
+        tail = bytes(self.buffer)
+        del self.buffer[:]
+        return tail
+
+
+class MessageBuffer:
+
+    """Buffer gathering the messages to be displayed in the panel.
+
+    Sending every message to the panel as soon as it is received
+    floods the user interface with events when the server sends
+    a lot of text.  Instead, messages are gathered in this buffer
+    and sent to the panel at most once per frame ('rate' frames per
+    second), as a single message.  If the rate is 0, messages are
+    sent immediately.
+
+    Only the first mark is kept.  It is converted into a position
+    relative to the beginning of the gathered message.  Likewise,
+    the style spans of each message are moved and gathered.
+
+    """
+
+    def __init__(self, client, rate=30):
+        self.client = client
+        self.rate = rate
+        self.messages = []
+        self.mark = None
+        self.spans = []
+        self.call = None
+
+    def __len__(self):
+        return len(self.messages)
+
+    def add(self, message, mark=None, spans=None):
+        """Add a message (plain text) to be displayed."""
+        if mark is not None and self.mark is None:
+            panel = self.client.factory.panel
+            nl = "\n" if panel and panel.rich else "\r\n"
+            self.mark = self.find_offset(nl) + mark
+        elif not message:
+            return
+
+        if spans:
+            offset = self.find_offset("\n")
+            self.spans.extend((offset + start, style)
+                    for start, style in spans)
+
+        self.messages.append(message)
+        if self.rate <= 0:
+            self.flush()
+        elif self.call is None:
+            self.call = self.client.clock.callLater(1 / self.rate,
+                    self.flush)
+
+    def find_offset(self, nl):
+        """Return the length of the gathered messages, as displayed.
+
+        The panel removes empty lines.  Line breaks ('nl') count as
+        one character in rich text, two otherwise.
+
+        """
+        lines = "\r\n".join(self.messages).splitlines()
+        lines = [line for line in lines if line]
+        if not lines:
+            return 0
+
+        return len(nl.join(lines)) + len(nl)
+
+    def flush(self):
+        """Send the gathered messages to the panel."""
+        if self.call and self.call.active():
+            self.call.cancel()
+        self.call = None
+
+        if self.messages:
+            message = "\r\n".join(self.messages)
+            mark = self.mark
+            spans = self.spans
+            self.messages = []
+            self.mark = None
+            self.spans = []
+            wx.CallAfter(pub.sendMessage, "message", client=self.client,
+                    message=message, mark=mark, spans=spans)
+
+
+class CommandQueue:
+
+    """Queue of commands to be sent to the server.
+
+    Commands written by the client are not sent immediately: they
+    are gathered in this queue and sent in a single write at the
+    next reactor iteration.  Thus, the commands sent by an alias,
+    a trigger or '#repeat' in the same iteration only cost one write.
+
+    The queue can also limit the number of commands sent per second
+    ('rate'), following a token bucket: up to 'burst' commands can
+    be sent at once, then 'rate' commands per second.  If the rate
+    is 0, commands aren't limited.
+
+    """
+
+    def __init__(self, client, rate=0, burst=10):
+        self.client = client
+        self.rate = rate
+        self.burst = burst
+        self.commands = deque()
+        self.tokens = burst
+        self.updated = None
+        self.call = None
+
+    def __len__(self):
+        return len(self.commands)
+
+    @property
+    def depth(self):
+        """Return the number of commands waiting to be sent."""
+        return len(self.commands)
+
+    def configure(self, rate=0, burst=10):
+        """Change the rate limit, filling the token bucket."""
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = None
+
+    def add(self, command):
+        """Add a command (bytes) to be sent."""
+        self.commands.append(command)
+        if self.call is None:
+            self.call = self.client.clock.callLater(0, self.send)
+
+    def refill(self):
+        """Add the tokens earned since the last update."""
+        now = self.client.clock.seconds()
+        if self.updated is not None:
+            self.tokens = min(self.burst,
+                    self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def send(self):
+        """Send the commands allowed by the rate limit."""
+        self.call = None
+        commands = self.commands
+        count = len(commands)
+        if self.rate > 0:
+            self.refill()
+            count = min(count, int(self.tokens))
+            self.tokens -= count
+
+        if count:
+            self.write(count)
+
+        if commands:
+            delay = (1 - self.tokens) / self.rate
+            self.call = self.client.clock.callLater(delay, self.send)
+
+    def write(self, count):
+        """Write the first commands of the queue in a single write."""
+        commands = self.commands
+        data = b"".join(commands.popleft() for i in range(count))
+        self.client._write(data)
+
+    def flush(self):
+        """Send all the queued commands, ignoring the rate limit."""
+        self.cancel()
+        if self.commands:
+            self.write(len(self.commands))
+
+    def clear(self):
+        """Remove the queued commands and return their number."""
+        self.cancel()
+        count = len(self.commands)
+        self.commands.clear()
+        return count
+
+    def cancel(self):
+        """Cancel the next sending, if any."""
+        if self.call and self.call.active():
+            self.call.cancel()
+        self.call = None
+
+
+class CommandSplitter:
+
+    """Splitter of commands, following the command stacking delimiter.
+
+    With command stacking, a single input can contain several
+    commands, separated by a delimiter (';' by default).  To send
+    the delimiter itself, it should be doubled ('say a;;b' sends
+    'say a;b'), each doubled delimiter counting as one less.
+
+    The command is split and the doubled delimiters are unescaped in
+    a single scan.  The splitter is built once for a delimiter.  If
+    the delimiter is empty, commands aren't split.
+
+    """
+
+    def __init__(self, delimiter):
+        self.delimiter = delimiter
+
+    def __repr__(self):
+        return "<CommandSplitter {}>".format(repr(self.delimiter))
+
+    def split(self, command):
+        """Split the command and return a list of commands."""
+        delimiter = self.delimiter
+        if not delimiter or delimiter not in command:
+            return [command]
+
+        size = len(delimiter)
+        commands = []
+        parts = []
+        start = 0
+        index = command.find(delimiter)
+        while index >= 0:
+            parts.append(command[start:index])
+
+            # Count the delimiters in a row
+            end = index + size
+            count = 1
+            while command.startswith(delimiter, end):
+                end += size
+                count += 1
+
+            if count == 1:
+                commands.append("".join(parts))
+                parts = []
+            else:
+                parts.append(delimiter * (count - 1))
+
+            start = end
+            index = command.find(delimiter, end)
+
+        parts.append(command[start:])
+        commands.append("".join(parts))
+        return commands
+
 
 class Client(Telnet):
 
-    """Class to receive data from the MUD using a Telnet protocol."""
+    """Class to receive data from the MUD using a Telnet protocol.
+
+    The received data is assembled in lines (see 'LineBuffer').  An
+    unterminated line is held until the server sends the rest of
+    it.  It is displayed if the server sends a GA (go ahead) or EOR
+    (end of record) command, which usually follow prompts, or after
+    a delay ('prompt_timeout', in seconds) without receiving anything.
+
+    Complete lines are then decoded by an incremental decoder, created
+    when the client connects and replaced only when the encoding
+    changes (see 'set_encoding').  Characters encoded on several bytes
+    are therefore decoded correctly, even if they are split across
+    packets.
+
+    The client supports MCCP (MUD Client Compression Protocol):  if
+    the server offers MCCP2 (option 86), the data received after
+    the compression start sequence is decompressed before being
+    handled by the Telnet protocol.  If the server offers MCCP3
+    (option 87), the data sent to the server is compressed as well.
+
+    Messages to be displayed are gathered in a 'MessageBuffer' and
+    sent to the panel at most 'options.output.refresh_rate' times
+    per second.
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.commandMap[GA] = self.telnet_GA
+        self.commandMap[EOR] = self.telnet_EOR
+        self.buffer = LineBuffer()
+        self.prompt_timeout = 0.2
+        self.prompt_call = None
+        self.clock = reactor
+        self.encoding = None
+        self.decoder = None
+        self.decompressor = None
+        self.compressor = None
+        self.compress_tail = b""
+        self.messages = MessageBuffer(self)
+        self.queue = CommandQueue(self)
+        self.splitter = CommandSplitter("")
+        self.tokenizer = ANSITokenizer()
 
     def disconnect(self):
         """Disconnect, close the client."""
@@ -75,8 +404,14 @@ class Client(Telnet):
         log.info("Connected to {host}:{port}".format(
                 host=host, port=port))
         self.factory.resetDelay()
+        settings = self.factory.engine.settings
+        self.prompt_timeout = settings["options.output.prompt_timeout"]
+        self.set_encoding(settings["options.general.encoding"])
+        self.messages.rate = settings["options.output.refresh_rate"]
+        world = self.factory.world
+        self.queue.configure(world.send_rate, world.send_burst)
         for command in self.factory.commands:
-            self.transport.write(command.encode() + b"\r\n")
+            self._write(command.encode() + b"\r\n")
 
     def connectionLost(self, reason):
         """The connection was lost."""
@@ -85,17 +420,168 @@ class Client(Telnet):
         log = logger("client")
         log.info("Lost Connection on {host}:{port}: {reason}".format(
                 host=host, port=port, reason=reason.type))
+        self.flush_prompt()
+        self.messages.flush()
+        self.queue.clear()
+        self.factory.world.timers.clear()
+        self.factory.world.executor.stop()
         wx.CallAfter(pub.sendMessage, "disconnect", client=self,
                 reason=reason)
         if reason.type is ConnectionDone:
             self.factory.stopTrying()
 
+    def dataReceived(self, data):
+        """Receive raw data, decompressing it if MCCP2 is active.
+
+        The compression start sequence can be received in the middle
+        of a packet:  the data before it is handled as is, the data
+        after it is decompressed.  If the compressed stream ends,
+        the remaining data is handled without decompression.
+
+        """
+        while data:
+            if self.decompressor is None:
+                start = self.find_compression_start(data)
+                if start is None:
+                    Telnet.dataReceived(self, data)
+                    return
+
+                Telnet.dataReceived(self, data[:start])
+                log = logger("client")
+                log.debug("Starting MCCP2 decompression")
+                self.decompressor = zlib.decompressobj()
+                data = data[start:]
+                continue
+
+            try:
+                plain = self.decompressor.decompress(data)
+            except zlib.error:
+                log = logger("client")
+                log.exception("Unable to decompress the received data")
+                self.decompressor = None
+                self.disconnect()
+                return
+
+            data = b""
+            if self.decompressor.eof:
+                # The compressed stream has ended
+                log = logger("client")
+                log.debug("MCCP2 decompression ended by the server")
+                data = self.decompressor.unused_data
+                self.decompressor = None
+
+            if plain:
+                Telnet.dataReceived(self, plain)
+
+    def find_compression_start(self, data):
+        """Return the index following the compression start, if any.
+
+        The start sequence is only sought if MCCP2 has been accepted.
+        The last bytes of the previous packet are kept, in case
+        the start sequence is split across packets.  If the start
+        sequence isn't found, return None.
+
+        """
+        if self.getOptionState(COMPRESS2).him.state != "yes":
+            return None
+
+        buffer = self.compress_tail + data
+        index = buffer.find(COMPRESS2_START)
+        if index < 0:
+            self.compress_tail = buffer[1 - len(COMPRESS2_START):]
+            return None
+
+        self.compress_tail = b""
+        return index + len(COMPRESS2_START) - len(buffer) + len(data)
+
+    def enableRemote(self, option):
+        """Accept the options the server offers, if supported."""
+        if option == COMPRESS3:
+            self.clock.callLater(0, self.start_compression)
+
+        return option in (COMPRESS2, COMPRESS3)
+
+    def disableRemote(self, option):
+        """Disable an option, the server won't use it anymore."""
+        if option == COMPRESS3:
+            self.compressor = None
+
+    def start_compression(self):
+        """Start compressing the data sent to the server (MCCP3)."""
+        if self.compressor is None and self.transport:
+            self.requestNegotiation(COMPRESS3, b"")
+            log = logger("client")
+            log.debug("Starting MCCP3 compression")
+            self.compressor = zlib.compressobj()
+
+    def _write(self, data):
+        """Write raw data to the server, compressing it if MCCP3 is active."""
+        if self.compressor:
+            data = self.compressor.compress(data) + self.compressor.flush(
+                    zlib.Z_SYNC_FLUSH)
+
+        self.transport.write(data)
+
     def applicationDataReceived(self, data):
         """Receive something."""
-        encoding = self.factory.engine.settings["options.general.encoding"]
-        msg = data.decode(encoding, errors="replace")
-        with self.factory.world.lock:
-            self.handle_lines(msg)
+        lines = self.buffer.feed(data)
+        if lines:
+            self.handle_data(lines)
+
+        # Wait for the rest of the line, or display it as a prompt
+        if self.prompt_call and self.prompt_call.active():
+            self.prompt_call.cancel()
+        self.prompt_call = None
+
+        if self.buffer:
+            if self.prompt_timeout > 0:
+                self.prompt_call = self.clock.callLater(
+                        self.prompt_timeout, self.flush_prompt)
+            else:
+                self.flush_prompt()
+
+    def telnet_GA(self, argument):
+        """The server sent a GA (go ahead) command, display the prompt."""
+        self.flush_prompt()
+
+    def telnet_EOR(self, argument):
+        """The server sent an EOR (end of record), display the prompt."""
+        self.flush_prompt()
+
+    def flush_prompt(self):
+        """Handle the unterminated line held in the buffer, if any."""
+        if self.prompt_call and self.prompt_call.active():
+            self.prompt_call.cancel()
+        self.prompt_call = None
+
+        tail = self.buffer.flush()
+        if tail:
+            self.handle_data(tail)
+
+    def set_encoding(self, encoding):
+        """Change the encoding used to decode the received data.
+
+        The incremental decoder is only replaced if the encoding
+        has changed.
+
+        """
+        if encoding == self.encoding and self.decoder:
+            return
+
+        decoder = codecs.getincrementaldecoder(encoding)
+        self.decoder = decoder(errors="replace")
+        self.encoding = encoding
+
+    def handle_data(self, data):
+        """Decode and handle the received data (bytes)."""
+        if self.decoder is None:
+            self.set_encoding(self.factory.engine.settings[
+                    "options.general.encoding"])
+
+        msg = self.decoder.decode(data)
+        if msg:
+            with self.factory.world.lock:
+                self.handle_lines(msg)
 
     def run(self):
         """Run the thread."""
@@ -115,6 +601,7 @@ class Client(Telnet):
         lines = []
         no_ansi_lines = []
         triggers = []
+        trigger_set = self.factory.world.trigger_set
 
         # Line breaks are different whether rich text is used or not
         if self.factory.panel and self.factory.panel.rich:
@@ -123,16 +610,16 @@ class Client(Telnet):
             nl = "\r\n"
 
         for line in msg.splitlines():
-            no_ansi_line = ANSI_ESCAPE.sub('', line)
+            no_ansi_line, spans = self.tokenizer.feed(line)
             display = True
-            for trigger in self.factory.world.triggers:
+            for trigger in trigger_set.find(no_ansi_line):
                 trigger.sharp_engine = self.factory.sharp_engine
                 try:
                     match = trigger.test(no_ansi_line)
                 except Exception:
                     log = logger("client")
                     log.exception("The trigger {} failed".format(
-                            repr(trigger.readction)))
+                            repr(trigger.reaction)))
                 else:
                     if match:
                         triggers.append((trigger, match, no_ansi_line))
@@ -142,26 +629,25 @@ class Client(Telnet):
                             before = nl.join([l for l in no_ansi_lines])
                             mark = len(before) + len(nl)
 
-                        # Handle triggers with substitution
+                        # Handle triggers with substitution, its ANSI
+                        # codes shouldn't change the style of the
+                        # following lines
                         if trigger.substitution:
                             display = False
-                            trigger.set_variables(match)
-                            replacement = trigger.replace()
-                            lines.extend(replacement.splitlines())
+                            replacement = trigger.replace(match)
+                            tokenizer = ANSITokenizer()
+                            lines.extend(tokenizer.feed(replaced)
+                                    for replaced in replacement.splitlines())
 
             if display:
-                if self.factory.strip_ansi:
-                    lines.append(no_ansi_line)
-                else:
-                    lines.append(line)
-
+                lines.append((no_ansi_line, spans))
                 if no_ansi_line.strip():
                     no_ansi_lines.append(no_ansi_line)
 
         # Handle the remaining text
         try:
-            lines = [l for l in lines if l]
-            self.handle_message("\r\n".join(lines), mark=mark)
+            message, spans = join(lines)
+            self.handle_message(message, mark=mark, spans=spans)
         except Exception:
             log = logger("client")
             log.exception(
@@ -169,11 +655,13 @@ class Client(Telnet):
 
         # Execute the triggers
         for trigger, match, line in triggers:
-            trigger.set_variables(match)
-            trigger.execute()
+            if trigger.asynchronous:
+                trigger.submit(match)
+            else:
+                trigger.execute(match)
 
     def handle_message(self, msg, force_TTS=False, screen=True,
-            speech=True, braille=True, mark=None):
+            speech=True, braille=True, mark=None, spans=None):
         """When the client receives a message.
 
         Args:
@@ -183,17 +671,32 @@ class Client(Telnet):
             speech: should the speech be enabled?
             braille: should the braille be enabled?
             mark: the index where to move the cursor.
+            spans: the style spans if the text has already been tokenized.
+
+        If no spans are given, the text may contain ANSI codes:  it is
+        tokenized here.  If called by an asynchronous action (see
+        'scripting.executor'), the call is made in the reactor thread.
 
         """
+        if in_worker():
+            clock = self.factory.world.executor.clock
+            clock.callFromThread(self.handle_message, msg,
+                    force_TTS=force_TTS, screen=screen, speech=speech,
+                    braille=braille, mark=mark, spans=spans)
+            return
+
+        if spans is None:
+            tokenizer = ANSITokenizer()
+            msg, spans = join([tokenizer.feed(line)
+                    for line in msg.splitlines()])
+
         if screen:
             if self.factory.engine.redirect_message:
                 self.factory.engine.redirect_message(msg)
             else:
-                wx.CallAfter(pub.sendMessage, "message", client=self,
-                    message=msg, mark=mark)
+                self.messages.add(msg, mark=mark, spans=spans)
 
         # In any case, tries to find the TTS
-        msg = ANSI_ESCAPE.sub('', msg)
         panel = self.factory.panel
         if self.factory.engine.TTS_on or force_TTS:
             # If outside of the window
@@ -212,52 +715,81 @@ class Client(Telnet):
                         interrupt=interrupt)
 
     def write(self, text, alias=True):
-        """Write text to the client."""
-        # Break in chunks based on the command stacking, if active
+        """Write text to the client.
+
+        The text can be a command or a list of commands, each of them
+        split following the command stacking setting (see
+        'CommandSplitter').  If 'alias' is set, the commands are
+        tested against the aliases first.  The commands are then
+        added to the queue of commands (see 'CommandQueue').
+
+        If called by an asynchronous action (see 'scripting.executor'),
+        the text is written in the reactor thread.
+
+        """
+        if in_worker():
+            clock = self.factory.world.executor.clock
+            clock.callFromThread(self.write, text, alias=alias)
+            return
+
         settings = self.factory.engine.settings
         stacking = settings["options.input.command_stacking"]
         encoding = settings["options.general.encoding"]
-        chunks = [text]
-        if stacking:
-            delimiter = re.escape(stacking)
-            re_stacking = u"(?<!{s}){s}(?!{s})".format(s=delimiter)
-            re_del = re.compile(re_stacking, re.UNICODE)
-            chunks = re_del.split(text)
-
-            # Reset ;; as ; (or other command stacking character)
-            def reset_del(match):
-                return match.group(0)[1:]
+        if self.splitter.delimiter != stacking:
+            self.splitter = CommandSplitter(stacking)
 
-            for i, chunk in enumerate(chunks):
-                chunks[i] = re.sub(delimiter + "{2,}", reset_del, chunk)
+        if isinstance(text, str):
+            text = [text]
 
+        split = self.splitter.split
         with self.factory.world.lock:
-            for text in chunks:
-                # Test the aliases
-                if alias:
-                    for alias in self.factory.world.aliases:
-                        alias.sharp_engine = self.factory.sharp_engine
-                        if alias.test(text):
-                            return
+            for command in text:
+                for chunk in split(command):
+                    # Test the aliases
+                    if alias and self.test_aliases(chunk):
+                        continue
 
-                if not text.endswith("\r\n"):
-                    text += "\r\n"
+                    if not chunk.endswith("\r\n"):
+                        chunk += "\r\n"
 
-                self.transport.write(text.encode(encoding, errors="replace"))
+                    self.queue.add(chunk.encode(encoding, errors="replace"))
+
+    def test_aliases(self, command):
+        """Test the command against the aliases of the world.
+
+        The first matching alias is executed.  Return whether an
+        alias has matched.
+
+        """
+        for alias in self.factory.world.alias_set.find(command):
+            alias.sharp_engine = self.factory.sharp_engine
+            if alias.test(command):
+                return True
+
+        return False
 
     def test_macros(self, key, modifiers):
-        """Test the macros of this world."""
-        found = False
-        with self.factory.world.lock:
-            for macro in self.factory.world.macros:
-                code = (macro.key, macro.modifiers)
-                macro.sharp_engine = self.factory.sharp_engine
-                if code == (key, modifiers):
-                    macro.execute(self.factory.engine, self)
-                    found = True
-                    break
+        """Test the macros of this world.
+
+        The macro is found in the world's index of macros by key
+        (see 'World.macro_keys'), a key without macro costing a
+        single lookup.  Return whether a macro has been executed.
+
+        """
+        world = self.factory.world
+        shortcuts = world.macro_keys.get(key)
+        if shortcuts is None:
+            return False
+
+        macro = shortcuts.get(modifiers)
+        if macro is None:
+            return False
+
+        with world.lock:
+            macro.sharp_engine = self.factory.sharp_engine
+            macro.execute(self.factory.engine, self)
 
-        return found
+        return True
 
 
 class CocoFactory(ReconnectingClientFactory):
@@ -271,7 +803,6 @@ class CocoFactory(ReconnectingClientFactory):
         self.engine = world.engine
         self.sharp_engine = session.sharp_engine
         self.commands = []
-        self.strip_ansi = False
 
     def buildProtocol(self, addr):
         client = Client()
@@ -261,6 +261,10 @@ class Settings(Configuration):
 
             [output]
                 richtext = boolean(default=True)
+                prompt_timeout = float(default=0.2)
+                refresh_rate = integer(default=30)
+                scrollback_lines = integer(default=20000)
+                scrollback_chars = integer(default=0)
 
             [TTS]
                 on = boolean(default=True)
@@ -298,10 +302,16 @@ class GameSettings(Configuration):
                 hostname = string
                 port = integer
                 protocol = string(default="telnet")
+
+            [input]
+                rate = float(default=0)
+                burst = integer(default=10)
         """).strip("\n")
         self.load_config_file("options", spec, world.path)
         world.name = self["options.connection.name"]
         world.hostname = self["options.connection.hostname"]
         world.port = self["options.connection.port"]
         world.protocol = self["options.connection.protocol"]
+        world.send_rate = self["options.input.rate"]
+        world.send_burst = self["options.input.burst"]
         world.settings = self["options"]
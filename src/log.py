@@ -45,8 +45,6 @@ import sys
 import threading
 import traceback
 
-from ui.dialogs.bug import BugDialog
-
 class CustomFormatter(logging.Formatter):
 
     """Special formatter to add hour and minute."""
@@ -197,6 +195,7 @@ def excepthook(type, value, tb):
     main.error(message.strip())
 
     # Create the bug dialog
+    from ui.dialogs.bug import BugDialog
     dialog = BugDialog("".join(traceback.format_exception(
             type, value, tb)).strip("\n"))
     dialog.ShowModal()
@@ -32,6 +32,7 @@ import re
 from textwrap import dedent
 
 from log import logger
+from scripting.variables import match_variables
 
 class Alias:
 
@@ -96,32 +97,22 @@ class Alias:
             log.debug("Executing the alias {}".format(
                     repr(self.alias)))
 
-            engine = self.sharp_engine
-            if "args" not in engine.locals:
-                engine.locals["args"] = {}
-
-            args = engine.locals["args"]
-
-            # Copy the groups of this match
-            i = 0
-            for group in match.groups():
-                i += 1
-                args[str(i)] = group
-
-            # Copy the named groups
-            for name, group in match.groupdict().items():
-                engine.locals[name] = group
-
-            # Execute the alias
-            self.execute()
+            # Execute the alias with the variables of the match
+            self.execute(match_variables(match))
             return True
 
         return False
 
-    def execute(self):
-        """Execute the alias."""
+    def execute(self, frame=None):
+        """Execute the alias.
+
+        The frame contains the variables of the match, set only while
+        the action is executed.
+
+        """
         try:
-            self.sharp_engine.execute(self.action, variables=True)
+            self.sharp_engine.execute(self.action, variables=True,
+                    origin=self, frame=frame)
         except Exception:
             log = logger("client")
             log.exception("An error occurred while executing the alias " \
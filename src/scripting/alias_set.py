@@ -0,0 +1,137 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the AliasSet class."""
+
+import re
+
+## Constants
+# Regular expression to spot non-ASCII characters
+RE_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+
+class AliasSet:
+
+    """An index of aliases, to select the ones that could match a command.
+
+    Every command sent to the server is tested against the aliases,
+    which becomes costly with hundreds of aliases (pasted scripts
+    or '#repeat' send many commands at once).  Most aliases,
+    however, begin with a literal word, like "co *" or "gt *".  The
+    alias set groups these aliases by their first word (in
+    lowercase, as aliases ignore case), so that only the aliases
+    beginning with the first word of the command are tested.
+
+    Regular expressions (aliases beginning with '^') and aliases
+    whose first word contains a '*' sign can't be indexed:  they
+    are tested against every command.
+
+    The candidates are returned in the order in which the aliases
+    were defined, so the first matching alias is still the one
+    executed.
+
+    Example:
+        >>> aliases = AliasSet(world.aliases)
+        >>> for alias in aliases.find("co attack"):
+        ...     if alias.test("co attack"):
+        ...         break
+
+    """
+
+    def __init__(self, aliases=()):
+        self.aliases = list(aliases)
+        self.buckets = {}
+        self.always = []
+        self.build()
+
+    def __repr__(self):
+        return "<AliasSet ({} aliases, {} always tested)>".format(
+                len(self.aliases), len(self.always))
+
+    def __len__(self):
+        return len(self.aliases)
+
+    def build(self):
+        """Build the index of aliases.
+
+        Each bucket contains the aliases beginning with its word and
+        the aliases which can't be indexed, in the order in which
+        they were defined.
+
+        """
+        buckets = {}
+        always = []
+        for index, alias in enumerate(self.aliases):
+            key = self.find_key(alias.alias)
+            if key is None:
+                always.append((index, alias))
+            else:
+                buckets.setdefault(key, []).append((index, alias))
+
+        for key, bucket in buckets.items():
+            bucket.extend(always)
+            bucket.sort(key=lambda candidate: candidate[0])
+            buckets[key] = [alias for index, alias in bucket]
+
+        self.buckets = buckets
+        self.always = [alias for index, alias in always]
+
+    @staticmethod
+    def find_key(alias):
+        """Return the index key of the alias, or None.
+
+        The key is the lowercase first word of the alias (everything
+        before the first space).  Regular expressions don't have any
+        key, nor aliases whose first word contains a '*' sign or
+        non-ASCII characters (which may match in ways 'lower'
+        wouldn't predict when ignoring case).
+
+        """
+        if alias.startswith("^"):
+            return None
+
+        word = alias.split(" ", 1)[0]
+        if "*" in word or RE_NON_ASCII.search(word):
+            return None
+
+        return word.lower()
+
+    def find(self, command):
+        """Return the aliases that could match the command.
+
+        The aliases are returned in a list, in the order in which
+        they were defined.  They still need to be tested against
+        the command.
+
+        """
+        # A final line break can be matched by the end of an alias
+        word = command.split(" ", 1)[0].rstrip("\n")
+        if RE_NON_ASCII.search(word):
+            # The word can't be safely compared
+            return self.aliases
+
+        return self.buckets.get(word.lower(), self.always)
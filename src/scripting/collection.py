@@ -0,0 +1,145 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the IndexedCollection class."""
+
+class IndexedCollection:
+
+    """An ordered collection of objects, indexed by a key.
+
+    The world's aliases, channels, macros and triggers are kept in
+    indexed collections.  The objects are kept in the order in which
+    they were added (the order in which they are saved and tested),
+    while a dictionary associates each key (the alias, the channel
+    name, the macro shortcut or the trigger reaction) with its
+    object.  Hence, finding whether a key is already used doesn't
+    require browsing the collection.
+
+    The collection can be used like a list (iterated, compared,
+    modified with 'append', 'remove' or a slice assignment).  If
+    several objects share the same key, the first one is indexed.
+
+    Derived indexes (like the alias or trigger sets) can subscribe
+    to changes.  The callback is called with the action ("add",
+    "remove" or "reset") and the concerned object (None for a reset).
+
+    Example:
+        >>> aliases = IndexedCollection(lambda alias: alias.alias)
+        >>> aliases.subscribe(lambda action, alias: print(action))
+        >>> aliases.append(alias)
+        add
+        >>> aliases.get("co *")
+        <Alias co * ...>
+
+    """
+
+    def __init__(self, key, items=()):
+        self.key = key
+        self.items = list(items)
+        self.index = {}
+        self.callbacks = []
+        self.build()
+
+    def __repr__(self):
+        return "<IndexedCollection {}>".format(repr(self.items))
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __setitem__(self, index, value):
+        items = list(self.items)
+        items[index] = value
+        self.replace(items)
+
+    def __eq__(self, other):
+        if isinstance(other, IndexedCollection):
+            other = other.items
+        elif not isinstance(other, (list, tuple)):
+            return NotImplemented
+
+        return self.items == list(other)
+
+    def build(self):
+        """Build the index of keys."""
+        index = {}
+        key = self.key
+        for item in self.items:
+            index.setdefault(key(item), item)
+
+        self.index = index
+
+    def subscribe(self, callback):
+        """Call 'callback(action, item)' each time the collection changes."""
+        self.callbacks.append(callback)
+
+    def notify(self, action, item=None):
+        """Notify the subscribers of a change."""
+        for callback in self.callbacks:
+            callback(action, item)
+
+    def get(self, key, default=None):
+        """Return the first object with this key, or 'default'."""
+        return self.index.get(key, default)
+
+    def append(self, item):
+        """Add an object at the end of the collection."""
+        self.items.append(item)
+        self.index.setdefault(self.key(item), item)
+        self.notify("add", item)
+
+    def remove(self, item):
+        """Remove an object from the collection."""
+        self.items.remove(item)
+        key = self.key(item)
+        if self.index.get(key) is item:
+            del self.index[key]
+            for other in self.items:
+                if self.key(other) == key:
+                    self.index[key] = other
+                    break
+
+        self.notify("remove", item)
+
+    def replace(self, items):
+        """Replace the content of the collection."""
+        self.items = list(items)
+        self.build()
+        self.notify("reset")
+
+    def clear(self):
+        """Remove all the objects of the collection."""
+        self.replace(())
@@ -0,0 +1,205 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the ScriptExecutor class.
+
+Trigger actions are usually executed in the reactor thread, right
+after the line has been received.  A slow action (a long Python
+block, for instance) therefore blocks reading, decoding and
+displaying for every session.  Triggers with the 'async' flag
+('+async' in SharpScript) have their action executed by the world's
+script executor instead:  a worker thread with a bounded queue.  As
+each world has a single worker, the actions of a world are executed
+in the order of the lines which triggered them.
+
+Actions executed by the worker use a copy of the engine's variables,
+taken when the line was received (so that the next lines don't
+change them).  The variables they set are copied back to the engine
+in the reactor thread.  Actions are compiled before being submitted,
+and the SharpScript functions they call ('#send', '#delay',
+'#trigger'...) are executed in the reactor thread as well (see
+'Function.run_in_worker'), so the worker only executes the Python
+code of the action.
+
+"""
+
+from queue import Empty, Full, Queue
+from threading import Thread, current_thread
+from time import perf_counter
+
+from twisted.internet import reactor
+
+from log import logger
+
+def in_worker():
+    """Return whether the current thread is a script executor's worker."""
+    return isinstance(current_thread(), Worker)
+
+
+class Worker(Thread):
+
+    """The thread of a script executor."""
+
+    def __init__(self, executor):
+        Thread.__init__(self, name="ScriptExecutor-{}".format(
+                executor.name), daemon=True)
+        self.executor = executor
+
+    def run(self):
+        """Execute the jobs until stopped."""
+        executor = self.executor
+        while True:
+            job = executor.queue.get()
+            try:
+                if job is None:
+                    break
+
+                executor.execute(*job)
+            finally:
+                executor.queue.task_done()
+
+
+class ScriptExecutor:
+
+    """A worker thread executing SharpScript actions of a world.
+
+    The queue holds at most 'size' actions.  When it's full, new
+    actions are dropped (and logged), so that the reactor is never
+    blocked.  The executor keeps metrics:
+
+        depth: the number of actions waiting in the queue
+        executed: the number of executed actions
+        dropped: the number of actions dropped, the queue being full
+        latency: the total time spent by actions in the queue
+        max_latency: the longest time spent by an action in the queue
+
+    The worker thread is only created when the first action is
+    submitted, and stopped when the client is disconnected.
+
+    """
+
+    size = 100
+
+    def __init__(self, name="", clock=None, size=None):
+        self.name = name
+        self.clock = clock or reactor
+        self.queue = Queue(maxsize=size or self.size)
+        self.worker = None
+        self.executed = 0
+        self.dropped = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+
+    def __repr__(self):
+        return "<ScriptExecutor {} (depth={})>".format(repr(self.name),
+                self.depth)
+
+    @property
+    def depth(self):
+        """Return the number of actions waiting in the queue."""
+        return self.queue.qsize()
+
+    @property
+    def average_latency(self):
+        """Return the average time (in seconds) spent in the queue."""
+        return self.latency / self.executed if self.executed else 0.0
+
+    def submit(self, sharp, action, variables, origin=None):
+        """Submit an action to be executed by the worker.
+
+        The variables are a copy of the engine's variables.  Return
+        whether the action was queued.
+
+        """
+        if self.worker is None:
+            self.worker = Worker(self)
+            self.worker.start()
+
+        try:
+            self.queue.put_nowait((perf_counter(), sharp, action,
+                    variables, origin))
+        except Full:
+            self.dropped += 1
+            log = logger("client")
+            log.warning("The script executor of {} is full, the action " \
+                    "of {} is dropped".format(repr(self.name), origin))
+            return False
+
+        return True
+
+    def execute(self, queued, sharp, action, variables, origin):
+        """Execute an action in the worker thread."""
+        latency = perf_counter() - queued
+        self.latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+        initial = dict(variables)
+        try:
+            sharp.execute(action, variables=True, origin=origin,
+                    locals=variables)
+        except Exception:
+            log = logger("client")
+            log.exception("An error occurred while executing the " \
+                    "asynchronous action of {}".format(origin))
+        finally:
+            self.executed += 1
+
+        # Copy the variables set by the action in the reactor thread
+        changed = {name: value for name, value in variables.items()
+                if name != "args" and (name not in initial or
+                initial[name] is not value)}
+        if changed:
+            self.clock.callFromThread(sharp.locals.update, changed)
+
+    def join(self):
+        """Wait until all the queued actions have been executed."""
+        self.queue.join()
+
+    def stop(self):
+        """Stop the worker thread.
+
+        The actions waiting in the queue are dropped, the worker
+        stops once the action being executed, if any, is done.  This
+        method doesn't block, it can be called from the reactor.
+
+        """
+        if self.worker is None:
+            return
+
+        while True:
+            try:
+                self.queue.get_nowait()
+            except Empty:
+                break
+            else:
+                self.dropped += 1
+                self.queue.task_done()
+
+        self.queue.put_nowait(None)
+        self.worker = None
@@ -79,4 +79,5 @@ class Macro:
 
     def execute(self, engine, client):
         """Execute the macro."""
-        self.sharp_engine.execute(self.action, variables=True)
+        self.sharp_engine.execute(self.action, variables=True,
+                origin=self)
@@ -0,0 +1,209 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the literal prefilter of regular expressions.
+
+Testing a regular expression against a line is costly, especially when
+hundreds of regular expressions have to be tested against every line
+received from the server.  However, most regular expressions require
+some literal text to be present in the line to match:  the regular
+expression "^You (hit|miss) (.*)\\.$" can only match if the line
+contains "You ".
+
+This module offers two tools:
+1.  The 'find_literals' function, which returns the literal text
+    a regular expression requires to match.
+2.  The 'AhoCorasick' class, an automaton that can find several
+    words in a text with a single scan of this text.
+
+Together, they allow to select the regular expressions that could
+match a line without testing them all.
+
+"""
+
+import re
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+## Constants
+# Repetition operators (POSSESSIVE_REPEAT only exists in recent versions)
+REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT,
+        getattr(sre_parse, "POSSESSIVE_REPEAT", sre_parse.MAX_REPEAT))
+
+def find_literals(regex):
+    """Return the list of literal strings any match of regex contains.
+
+    The regex should be a compiled regular expression.  If it ignores
+    case, or if its pattern cannot be analyzed, an empty list is
+    returned.  Otherwise, the returned list contains the runs of
+    literal characters that are always part of a match.  Optional
+    parts of the pattern (alternatives, optional repetitions,
+    lookarounds) are ignored.
+
+    For instance:
+        >>> find_literals(re.compile(r"^You (hit|miss) (.*)\\.$"))
+        ['You ', ' ', '.']
+
+    """
+    if regex.flags & re.IGNORECASE:
+        return []
+
+    try:
+        parsed = sre_parse.parse(regex.pattern, regex.flags)
+    except Exception:
+        return []
+
+    literals = []
+    run = []
+
+    def flush():
+        """Close the current run of literal characters."""
+        if run:
+            literals.append("".join(run))
+            run[:] = []
+
+    def browse(items):
+        """Browse the parsed items, extracting literal characters."""
+        for operator, value in items:
+            if operator is sre_parse.LITERAL:
+                run.append(chr(value))
+            elif operator is sre_parse.AT:
+                # Zero-width assertions don't break a run of literals
+                continue
+            elif operator is sre_parse.SUBPATTERN:
+                add_flags, content = value[1], value[-1]
+                if add_flags & re.IGNORECASE:
+                    flush()
+                else:
+                    browse(content)
+            elif operator in REPEATS:
+                minimum, content = value[0], value[2]
+                flush()
+                if minimum >= 1:
+                    browse(content)
+                    flush()
+            else:
+                flush()
+
+    browse(parsed)
+    flush()
+    return literals
+
+
+class AhoCorasick:
+
+    """Automaton to find several words in a text in a single scan.
+
+    The automaton is built from a list of words.  Its 'search'
+    method returns the set of words found in the given text.  The
+    text is read only once, character by character, regardless of
+    the number of words to look for.
+
+    Example:
+        >>> automaton = AhoCorasick(["he", "she", "hers"])
+        >>> automaton.search("ushers")
+        {'he', 'she', 'hers'}
+
+    """
+
+    def __init__(self, words=()):
+        self.words = []
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for word in words:
+            self.add(word)
+
+        self.build()
+
+    def __repr__(self):
+        return "<AhoCorasick ({} words, {} states)>".format(
+                len(self.words), len(self.goto))
+
+    def add(self, word):
+        """Add a word to the automaton.
+
+        The 'build' method should be called once all words are added.
+
+        """
+        if not word or word in self.words:
+            return
+
+        self.words.append(word)
+        state = 0
+        for char in word:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            state = next_state
+
+        self.output[state] = (word, )
+
+    def build(self):
+        """Compute the failure links, in a breadth-first traversal."""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        queue = list(goto[0].values())
+        for state in queue:
+            fail[state] = 0
+
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+
+                link = goto[link].get(char, 0)
+                fail[next_state] = link
+                output[next_state] = output[next_state] + output[link]
+
+    def search(self, text):
+        """Return the set of words found in the text."""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+
+        return found
@@ -0,0 +1,108 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the Template class.
+
+A template is a text containing variables, like "You have $hp HP" or
+"Kill ${1}".  It is parsed once into a list of parts (literal strings
+and variables), and can then be rendered again and again, by looking
+up the variables and joining the parts.
+
+"""
+
+import re
+
+# Constants
+RE_VAR = re.compile(r"(?<!\\)\$\{?([A-Za-z0-9_]+)\}?")
+
+class Template:
+
+    """A text with variables, parsed once.
+
+    Variables can be written in two ways:
+        $variable (when surrounded by special characters)
+        ${variable} (if not).
+
+    Variables whose name is a number ($1, $2...) are read from
+    the 'args' dictionary, other variables are read directly
+    in the variables given to 'render'.  The dollar sign can be
+    escaped with \\$.
+
+    The 'parts' attribute contains the literal strings, with
+    None at the place of the variables.  The 'variables' attribute
+    contains tuples (index, name, is_argument) for each variable,
+    'index' being its place in 'parts'.
+
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.parts = []
+        self.variables = []
+
+        # Parse the text
+        last = 0
+        for match in RE_VAR.finditer(text):
+            self.add_literal(text[last:match.start()])
+            name = match.group(1)
+            self.variables.append((len(self.parts), name, name.isdigit()))
+            self.parts.append(None)
+            last = match.end()
+
+        self.add_literal(text[last:])
+
+    def __repr__(self):
+        return "<Template {}>".format(repr(self.text))
+
+    def add_literal(self, literal):
+        """Add a literal string, unescaping the dollar signs."""
+        if literal:
+            self.parts.append(literal.replace("\\$", "$"))
+
+    def lookup(self, variables, name, is_argument):
+        """Return the value of a variable (an empty string if not found)."""
+        if is_argument:
+            return variables.get("args", {}).get(name, "")
+
+        return variables.get(name, "")
+
+    def render(self, variables):
+        """Return the text with the variables replaced.
+
+        The 'variables' argument should be a dictionary (usually
+        the 'locals' of a SharpScript engine).
+
+        """
+        if not self.variables:
+            return "".join(self.parts)
+
+        parts = list(self.parts)
+        for index, name, is_argument in self.variables:
+            parts[index] = str(self.lookup(variables, name, is_argument))
+
+        return "".join(parts)
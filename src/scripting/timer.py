@@ -0,0 +1,225 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the Timer and TimerWheel classes.
+
+Timers execute a SharpScript action after a delay (#delay) or at
+regular intervals (#every), without blocking the reactor.  They are
+kept in a timer wheel:  rather than scheduling a delayed call for
+each timer, the wheel is a circular list of slots, advanced by a
+single looping call ('resolution' seconds between two ticks).  A
+timer is placed in the slot of the tick it should be executed on,
+so adding, cancelling and executing a timer doesn't depend on the
+number of timers.  Timers whose delay is longer than a full turn
+of the wheel are kept in their slot for several rounds.
+
+"""
+
+from twisted.internet import reactor
+from twisted.internet.task import LoopingCall
+
+from log import logger
+
+class Timer:
+
+    """A SharpScript action to be executed later.
+
+    A timer can be named, in which case it can be cancelled (see
+    the '#cancel' function).  If 'repeat' is set, the action is
+    executed every 'delay' seconds, until the timer is cancelled.
+
+    """
+
+    def __init__(self, sharp, delay, action, name="", repeat=False):
+        self.sharp_engine = sharp
+        self.delay = delay
+        self.action = action
+        self.name = name
+        self.repeat = repeat
+        self.active = False
+        self.slot = None
+        self.rounds = 0
+
+    def __repr__(self):
+        return "<Timer {} every={} (delay={})>".format(
+                repr(self.name or self.action), self.repeat, self.delay)
+
+    def execute(self):
+        """Execute the timer's action."""
+        try:
+            self.sharp_engine.execute(self.action, variables=True,
+                    origin=self)
+        except Exception:
+            log = logger("client")
+            log.exception("An error occurred while executing the timer " \
+                    "{}".format(repr(self.name or self.action)))
+
+
+class TimerWheel:
+
+    """A timer wheel, holding the timers of a world.
+
+    The wheel has 'size' slots and advances every 'resolution'
+    seconds, so that timers are executed with this precision.  The
+    looping call is only running when there are timers.  Named timers
+    are also kept in the 'timers' dictionary.  The timer being
+    executed is kept in 'executing', so that cancelling it from its
+    own action stops it.
+
+    """
+
+    resolution = 0.1
+    size = 512
+
+    def __init__(self, clock=None):
+        self.clock = clock or reactor
+        self.slots = [{} for i in range(self.size)]
+        self.index = 0
+        self.count = 0
+        self.timers = {}
+        self.loop = None
+        self.executing = None
+
+    def __len__(self):
+        return self.count
+
+    def add(self, timer):
+        """Add a timer, replacing the timer of the same name if any."""
+        if timer.name:
+            self.cancel(timer.name)
+            self.timers[timer.name] = timer
+
+        timer.active = True
+        self.schedule(timer)
+        self.start()
+
+    def schedule(self, timer):
+        """Place the timer in the slot it should be executed on."""
+        ticks = max(1, int(round(timer.delay / self.resolution)))
+        timer.slot = (self.index + ticks) % self.size
+        timer.rounds = (ticks - 1) // self.size
+        self.slots[timer.slot][timer] = None
+        self.count += 1
+
+    def remove(self, timer):
+        """Remove the timer from the wheel."""
+        timer.active = False
+        if timer.name and self.timers.get(timer.name) is timer:
+            del self.timers[timer.name]
+
+        if timer.slot is not None:
+            del self.slots[timer.slot][timer]
+            timer.slot = None
+            self.count -= 1
+            if self.count == 0:
+                self.stop()
+
+    def cancel(self, name):
+        """Cancel the timer of this name.
+
+        Return whether a timer has been cancelled.
+
+        """
+        timer = self.timers.get(name)
+        if timer is None:
+            return False
+
+        self.remove(timer)
+        return True
+
+    def clear(self):
+        """Cancel all the timers."""
+        if self.executing is not None:
+            self.executing.active = False
+
+        for slot in self.slots:
+            for timer in slot:
+                timer.active = False
+                timer.slot = None
+
+            slot.clear()
+
+        self.timers.clear()
+        self.count = 0
+        self.stop()
+
+    def start(self):
+        """Start the looping call, if it isn't running."""
+        if self.loop is None:
+            self.loop = LoopingCall.withCount(self.tick)
+            self.loop.clock = self.clock
+            self.loop.start(self.resolution, now=False)
+
+    def stop(self):
+        """Stop the looping call."""
+        if self.loop is not None:
+            if self.loop.running:
+                self.loop.stop()
+            self.loop = None
+
+    def tick(self, count=1):
+        """Advance the wheel by 'count' ticks, executing the timers.
+
+        The count is greater than 1 if the reactor was busy and
+        ticks were missed.
+
+        """
+        for i in range(count):
+            self.index = (self.index + 1) % self.size
+            slot = self.slots[self.index]
+            if not slot:
+                continue
+
+            for timer in list(slot):
+                if timer not in slot:
+                    # The timer was cancelled by a previous action
+                    continue
+
+                if timer.rounds > 0:
+                    timer.rounds -= 1
+                    continue
+
+                del slot[timer]
+                timer.slot = None
+                self.count -= 1
+                if not timer.repeat:
+                    self.remove(timer)
+
+                self.executing = timer
+                try:
+                    timer.execute()
+                finally:
+                    self.executing = None
+
+                if timer.repeat and timer.active:
+                    self.schedule(timer)
+                    self.start()
+
+            if self.count == 0:
+                self.stop()
+                break
@@ -33,6 +33,9 @@ import re
 from textwrap import dedent
 
 from log import sharp as logger
+from scripting.prefilter import find_literals
+from scripting.template import Template
+from scripting.variables import match_variables
 
 class Trigger:
 
@@ -51,10 +54,12 @@ class Trigger:
         self.re_reaction = self.find_regex(reaction)
         self.action = dedent(action.strip("\n"))
         self.substitution = substitution
+        self.template = None
 
         # Flags
         self.mute = False
         self.mark = False
+        self.asynchronous = False
         self.logger = logger
 
         # Set the trigger's level
@@ -75,6 +80,8 @@ class Trigger:
             arguments.append("+mute")
         if self.mark:
             arguments.append("+mark")
+        if self.asynchronous:
+            arguments.append("+async")
 
         statement = self.sharp_engine.format((tuple(arguments), ))
         return statement
@@ -86,6 +93,7 @@ class Trigger:
                 self.substitution)
         copy.mute = self.mute
         copy.mark = self.mark
+        copy.asynchronous = self.asynchronous
         copy.level = self.level
         return copy
 
@@ -113,54 +121,64 @@ class Trigger:
 
         return re.compile(reaction, re.IGNORECASE | re.UNICODE)
 
-    def set_variables(self, match):
-        """Set the variables of the trigger in the SharpScript engine.
+    @property
+    def literal(self):
+        """Return the longest literal text required by the reaction.
+
+        Only regular expressions (reactions beginning with '^') are
+        analyzed:  an empty string is returned for other triggers,
+        or if the regular expression doesn't require any literal text.
+        A line that doesn't contain this literal text cannot match.
+
+        """
+        if not self.reaction.startswith("^"):
+            return ""
+
+        literals = find_literals(self.re_reaction)
+        if not literals:
+            return ""
 
-        This method, to be used internally, put the trigger's variables
-        in the SharpEngine locales.  Obviously, this should only be
-        used before executing the trigger or asking for the substitution.
+        return max(literals, key=len)
+
+    def get_variables(self, match):
+        """Return the variables of the trigger (a dictionary).
+
+        The variables are the groups of the match (in the 'args'
+        dictionary) and the named groups.  They are pushed in the
+        SharpScript engine's variables only while the action is
+        executed or the substitution is rendered.
 
         The match can be a string.  In this case, the regular expression
         associated with this trigger is executed and the match is
-        created, if the expression matches.
+        created.  If the expression doesn't match, return None.
 
         """
         if isinstance(match, str):
             match = self.re_reaction.search(match)
             if not match:
-                return False
-
-        world = self.world
-        engine = self.sharp_engine
-        if "args" not in engine.locals:
-            engine.locals["args"] = {}
-
-        args = engine.locals["args"]
+                return None
 
-        # Copy the groups of this match
-        i = 0
-        for group in match.groups():
-            i += 1
-            args[str(i)] = group
+        return match_variables(match)
 
-        # Copy the named groups
-        for name, group in match.groupdict().items():
-            engine.locals[name] = group
-
-        return True
-
-    def replace(self):
+    def replace(self, match):
         """Return the replacement text if a substitution is set.
 
         The substsitution is itself a text that can contain variables.
         It is returned, with the variable replaced the same way as
-        in SharpScript.  The 'set_variables' must be called before
-        calling this method (either directly, or using the 'test'
-        method).
+        in SharpScript, using the variables of the match (see
+        'get_variables').
+
+        The substitution is parsed once in a template, parsed again
+        only if the substitution changes.
 
         """
+        template = self.template
+        if template is None or template.text != self.substitution:
+            template = self.template = Template(self.substitution)
+
         engine = self.sharp_engine
-        return engine.replace_variables(self.substitution)
+        with engine.variables.frame(self.get_variables(match)):
+            return engine.render(template)
 
     def test(self, line, execute=False):
         """Should the trigger be triggered by the text?
@@ -180,15 +198,29 @@ class Trigger:
             self.logger.debug("Trigger {}.{} fired.".format(
                     world, repr(self.reaction)))
 
-            # Put the variables in the SharpEngine locales
-            self.set_variables(match)
-
             # Execute the trigger
-            self.execute()
+            self.execute(match)
             return match
 
         return None
 
-    def execute(self):
-        """Execute the trigger."""
-        self.sharp_engine.execute(self.action, variables=True)
+    def execute(self, match=None):
+        """Execute the trigger, with the variables of the match."""
+        frame = None if match is None else self.get_variables(match)
+        self.sharp_engine.execute(self.action, variables=True,
+                origin=self, frame=frame)
+
+    def submit(self, match):
+        """Submit the action to the world's script executor.
+
+        The action will be executed in a worker thread, with a copy
+        of the engine's variables (and the trigger's variables set
+        from the match).  It is compiled here, in the reactor thread.
+        Return whether the action was queued.
+
+        """
+        engine = self.sharp_engine
+        code = engine.compile(self.action, variables=True)
+        variables = dict(engine.locals)
+        variables.update(self.get_variables(match))
+        return self.world.executor.submit(engine, code, variables, self)
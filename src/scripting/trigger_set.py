@@ -0,0 +1,185 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the TriggerSet class."""
+
+from operator import itemgetter
+import re
+
+from scripting.prefilter import AhoCorasick
+
+## Constants
+# Regular expression to spot non-ASCII characters
+RE_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+
+class TriggerSet:
+
+    """An index of triggers, to select the ones that could match a line.
+
+    Testing every trigger against every line received from the server
+    becomes costly when a world defines hundreds of triggers.  Most
+    of these triggers, however, are not regular expressions:  they
+    begin with some literal text, like "You are hungry" or
+    "You receive * gold coins".  The trigger set keeps these triggers
+    in a prefix tree, keyed by their whole literal prefix (the text
+    before the first '*' sign), so that only the triggers whose
+    prefix begins the line are tested against it.  Many triggers
+    begin with the same words ("You ..."), the whole prefix is
+    needed to tell them apart.
+
+    Regular expressions (reactions beginning with '^') are selected
+    by a literal prefilter:  the literal text a regular expression
+    requires is extracted and all these literals are searched in
+    the line at once, using an Aho-Corasick automaton.  Only the
+    regular expressions whose literal text appears in the line are
+    selected.  This prefilter can be disabled by setting the
+    'prefilter' argument to False.  Regular expressions without
+    literal text, and triggers beginning with a '*' sign, are
+    always selected.
+
+    The trigger set is only a filter:  the candidates it returns still
+    have to be tested and they are returned in the order in which
+    they were defined, so the triggers are fired in the same order
+    as without the index.
+
+    Example:
+        >>> triggers = TriggerSet(world.triggers)
+        >>> for trigger in triggers.find("You are hungry."):
+        ...     match = trigger.test("You are hungry.")
+
+    """
+
+    def __init__(self, triggers=(), prefilter=True):
+        self.triggers = list(triggers)
+        self.prefilter = prefilter
+        self.tree = {}
+        self.indexed = []
+        self.literals = {}
+        self.automaton = None
+        self.always = []
+        self.build()
+
+    def __repr__(self):
+        return "<TriggerSet ({} triggers, {} always tested)>".format(
+                len(self.triggers), len(self.always))
+
+    def __len__(self):
+        return len(self.triggers)
+
+    def build(self):
+        """Build the index of triggers.
+
+        Each simple trigger is placed in the prefix tree, under the
+        lowercase literal text it begins with.  Each node of the tree
+        is a dictionary associating a character with the next node,
+        the triggers ending at this node being kept under the None
+        key.  Each regular
+        expression is associated with the literal text it requires.
+        Triggers that cannot be indexed are placed in the 'always' list.
+
+        """
+        tree = {}
+        indexed = []
+        literals = {}
+        always = []
+        for index, trigger in enumerate(self.triggers):
+            key = self.find_key(trigger.reaction)
+            literal = self.prefilter and trigger.literal or ""
+            if key:
+                node = tree
+                for char in key:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, []).append((index, trigger))
+                indexed.append((index, trigger))
+            elif literal:
+                literals.setdefault(literal, []).append((index, trigger))
+            else:
+                always.append((index, trigger))
+
+        self.tree = tree
+        self.indexed = indexed
+        self.literals = literals
+        self.automaton = AhoCorasick(literals) if literals else None
+        self.always = always
+
+    @staticmethod
+    def find_key(reaction):
+        """Return the index key of the reaction, or an empty string.
+
+        The key is the lowercase literal text the trigger begins
+        with (everything before the first '*' sign).  Only ASCII
+        characters are kept, as other characters may match in ways
+        'lower' wouldn't predict when the regular expression ignores
+        case.  Regular expressions don't have any key.
+
+        """
+        if reaction.startswith("^"):
+            return ""
+
+        key = reaction.split("*", 1)[0]
+        non_ascii = RE_NON_ASCII.search(key)
+        if non_ascii:
+            key = key[:non_ascii.start()]
+
+        return key.lower()
+
+    def find(self, line):
+        """Return the triggers that could match the line.
+
+        The triggers are returned in a list, in the order in which
+        they were defined.  They still need to be tested against
+        the line.
+
+        """
+        candidates = []
+        node = self.tree
+        for char in line:
+            if char > "\x7f":
+                # The rest of the line can't be safely compared
+                candidates = list(self.indexed)
+                break
+
+            node = node.get(char.lower())
+            if node is None:
+                break
+
+            bucket = node.get(None)
+            if bucket:
+                candidates.extend(bucket)
+
+        if self.automaton:
+            literals = self.literals
+            for literal in self.automaton.search(line):
+                candidates.extend(literals[literal])
+
+        if not candidates:
+            return [trigger for index, trigger in self.always]
+
+        candidates.extend(self.always)
+        candidates.sort(key=itemgetter(0))
+        return [trigger for index, trigger in candidates]
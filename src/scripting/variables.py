@@ -0,0 +1,192 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the VariableStore class.
+
+The variables of a SharpScript engine are kept in its 'locals'
+dictionary, used to execute the compiled code (so that looking up
+a variable is a dictionary lookup).  The variable store manages
+this dictionary:
+
+*   The variables of a trigger or alias match (the 'args'
+    dictionary and the named groups) are pushed in a frame before
+    the action is executed, and popped afterward, restoring the
+    previous values.  They don't remain in the engine's variables
+    and don't clobber the variables of other triggers.
+*   Persistent variables are declared with a type (see the '#var'
+    function).  Values assigned with '#var' are converted to this
+    type, and declared variables are saved in the world's
+    configuration.
+*   The number of variables is capped:  beyond 'limit', the oldest
+    undeclared variables are removed and a warning is logged.
+
+"""
+
+from contextlib import contextmanager
+
+from log import sharp as logger
+
+# Constants
+MISSING = object()
+
+def to_bool(value):
+    """Convert a value to a boolean."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "on", "true", "yes")
+
+    return bool(value)
+
+TYPES = {
+    "bool": to_bool,
+    "float": float,
+    "int": int,
+    "str": str,
+}
+
+def match_variables(match):
+    """Return the variables of a regular expression match.
+
+    The groups are placed in the 'args' dictionary ('1', '2'...),
+    the named groups are variables of their own.
+
+    """
+    variables = dict(match.groupdict())
+    variables["args"] = {str(i): group for i, group in enumerate(
+            match.groups(), 1)}
+    return variables
+
+
+class VariableStore:
+
+    """The variables of a SharpScript engine.
+
+    The store manages the 'variables' dictionary (the engine's
+    'locals').  The 'types' dictionary contains the declared
+    variables and their type names, the 'frames' list contains, for
+    each pushed frame, the previous values of its variables.
+
+    """
+
+    limit = 10000
+
+    def __init__(self, variables=None):
+        self.variables = {} if variables is None else variables
+        self.types = {}
+        self.frames = []
+
+    def __repr__(self):
+        return "<VariableStore ({} variables, {} declared, {} frames)>" \
+                .format(len(self.variables), len(self.types),
+                len(self.frames))
+
+    def push(self, frame):
+        """Push a frame of variables (a dictionary)."""
+        variables = self.variables
+        self.frames.append([(name, variables.get(name, MISSING))
+                for name in frame])
+        variables.update(frame)
+
+    def pop(self):
+        """Pop the last frame, restoring the previous values."""
+        variables = self.variables
+        for name, value in reversed(self.frames.pop()):
+            if value is MISSING:
+                variables.pop(name, None)
+            else:
+                variables[name] = value
+
+    @contextmanager
+    def frame(self, frame):
+        """Push the frame for the duration of the 'with' block."""
+        self.push(frame)
+        try:
+            yield self.variables
+        finally:
+            self.pop()
+
+    def declare(self, name, value=MISSING, type=None):
+        """Declare a persistent variable and set its value.
+
+        If the type name isn't specified, the type of the existing
+        declaration is kept ('str' if the variable isn't declared).
+        A ValueError is raised if the type is unknown or if the value
+        can't be converted.
+
+        """
+        type = type or self.types.get(name, "str")
+        convert = TYPES.get(type)
+        if convert is None:
+            raise ValueError("unknown variable type {}, expected " \
+                    "one of {}".format(repr(type), ", ".join(sorted(TYPES))))
+
+        if value is MISSING:
+            value = self.variables.get(name, "")
+
+        value = convert(value)
+        self.types[name] = type
+        self.variables[name] = value
+        return value
+
+    @property
+    def declared(self):
+        """Return the declared variables as a list of (name, value, type)."""
+        return [(name, self.variables.get(name, ""), type)
+                for name, type in self.types.items()]
+
+    def check(self):
+        """Remove the oldest variables if there are too many.
+
+        Declared variables, the 'args' dictionary and the variables
+        of pushed frames are never removed.  Return the number of
+        removed variables.
+
+        """
+        variables = self.variables
+        excess = len(variables) - self.limit
+        if excess <= 0:
+            return 0
+
+        kept = set(self.types)
+        kept.add("args")
+        for frame in self.frames:
+            kept.update(name for name, value in frame)
+
+        removed = []
+        for name in list(variables):
+            if len(removed) >= excess:
+                break
+
+            if name not in kept:
+                del variables[name]
+                removed.append(name)
+
+        logger.warning("Too many SharpScript variables ({}, the limit " \
+                "is {}), {} removed: {}".format(len(variables) +
+                len(removed), self.limit, len(removed), ", ".join(
+                removed[:10]) + ("..." if len(removed) > 10 else "")))
+        return len(removed)
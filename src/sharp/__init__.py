@@ -2,27 +2,41 @@
 
 from sharp.function import Function
 from sharp.functions.alias import Alias
+from sharp.functions.cancel import Cancel
 from sharp.functions.channel import Channel
+from sharp.functions.clearqueue import ClearQueue
+from sharp.functions.delay import Delay
+from sharp.functions.every import Every
 from sharp.functions.feed import Feed
+from sharp.functions.flush import Flush
 from sharp.functions.macro import Macro
 from sharp.functions.play import Play
+from sharp.functions.profile import Profile
 from sharp.functions.randplay import RandPlay
 from sharp.functions.repeat import Repeat
 from sharp.functions.say import Say
 from sharp.functions.send import Send
 from sharp.functions.trigger import Trigger
 from sharp.functions.tts import TTS
+from sharp.functions.var import Var
 
 FUNCTIONS = {
     "alias": Alias,
+    "cancel": Cancel,
     "channel": Channel,
+    "clearqueue": ClearQueue,
+    "delay": Delay,
+    "every": Every,
     "feed": Feed,
+    "flush": Flush,
     "macro": Macro,
     "play": Play,
+    "profile": Profile,
     "randplay": RandPlay,
     "repeat": Repeat,
     "say": Say,
     "send": Send,
     "trigger": Trigger,
     "tts": TTS,
+    "var": Var,
 }
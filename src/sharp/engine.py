@@ -28,14 +28,30 @@
 
 """Module containing the SharpEngine class."""
 
+import ast
+from collections import OrderedDict
+import dis
+from functools import partial
 import re
 from textwrap import dedent
+from threading import RLock
 
 from log import logger
+from scripting.template import Template
+from scripting.variables import VariableStore
 from sharp import FUNCTIONS
 
 # Constants
-RE_VAR = re.compile(r"(?<!\\)\$\{?([A-Za-z0-9_]+)\}?")
+RE_BRACE = re.compile(r"[{}]")
+RE_SEMICOLON = re.compile(r";;?")
+RE_LINE_END = re.compile("[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+RE_WORD_END = re.compile("[ \n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+# Location of the AST nodes created by the compiler
+LOCATION = {"lineno": 1, "col_offset": 0}
+
+# Instructions loading a global name
+LOAD_GLOBALS = ("LOAD_GLOBAL", "LOAD_NAME")
 
 class SharpScript:
 
@@ -45,9 +61,43 @@ class SharpScript:
     and an individual client, which is itself optionally linked to
     the ui application.
 
+    Code executed by the engine is compiled once and kept in a cache,
+    keyed on the SharpScript code.  The compiler builds a Python AST
+    directly from the statements (see 'compile'), so a script becomes
+    a single code object.  Variables ($var) are replaced when the code
+    is executed, not when it is compiled, so the same code object can
+    be executed again and again.  The cache is bounded
+    ('cache_size' entries, the least recently used ones are removed)
+    and counts its hits and misses.  Texts with variables are
+    parsed once into templates (see 'get_template'), kept in a
+    cache of the same size.  Set 'log_variables' to log every
+    variable lookup.
+
+    When profiling is on ('profiler' is set and active, see the
+    '#profile' function), each statement is executed and timed
+    separately.
+
+    Functions (#send, #play...) are created when a compiled script
+    first uses them (see 'bind_functions'), so creating an engine
+    is cheap and the user interface parts of the functions (the
+    'display' and 'complete' methods) aren't imported unless the
+    editor needs them.
+
+    Asynchronous actions are executed by a worker thread (see
+    'scripting.executor').  The caches and the functions are then
+    protected by the engine's lock, and the functions are called
+    through their 'run_in_worker' method (see 'namespace').
+
+    Python code ('{+ ... }' blocks) is executed with a copy of this
+    module's namespace as globals, so it can use the modules
+    imported here ('re', for instance), the functions and the
+    '_replace_variables' function.
+
     """
 
     id = 0
+    cache_size = 500
+    log_variables = False
 
     def __init__(self, engine, client, world):
         self.id = type(self).id + 1
@@ -56,66 +106,308 @@ class SharpScript:
         self.client = client
         self.world = world
         self.globals = dict(globals())
+        self.globals["_replace_variables"] = self.replace_variables
         self.locals = {}
+        self.variables = VariableStore(self.locals)
         self.functions = {}
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.templates = OrderedDict()
+        self.profiler = None
+        self.lock = RLock()
         self.logger = logger("sharp")
         self.logger.debug("Creating SharpScript #{}".format(self.id))
 
-        # Adding the functions
-        for name, function in FUNCTIONS.items():
-            function.name = name
-            function = function(engine, client, self, world)
-            self.functions[name] = function
-            self.globals[name] = function.run
-
     def bind_client(self, client):
         """Bind a client to the sharp engine."""
         self.client = client
         for function in self.functions.values():
             function.client = client
 
-    def execute(self, code, debug=False, variables=False):
-        """Execute the SharpScript code given as an argument."""
+    def get_function(self, name):
+        """Return the function object of this name, creating it if needed.
+
+        The function is added to the engine's globals, so that the
+        code executed by the engine can call it.  A KeyError is
+        raised if the function doesn't exist.
+
+        """
+        with self.lock:
+            function = self.functions.get(name)
+            if function is None:
+                function = FUNCTIONS[name]
+                function.name = name
+                function = function(self.engine, self.client, self,
+                        self.world)
+                self.functions[name] = function
+                self.globals[name] = function.run
+
+        return function
+
+    def load_functions(self):
+        """Create all the functions and return them.
+
+        This is only used by the user interface, which needs to
+        list the functions.
+
+        """
+        return [self.get_function(name) for name in FUNCTIONS]
+
+    def bind_functions(self, code):
+        """Create the functions used by a code object.
+
+        The global names loaded by the code object (and the nested
+        code objects, like functions defined in the script) are
+        browsed, and the functions not yet created are created.
+        Attributes ('client.send') don't create functions.
+
+        """
+        codes = [code]
+        with self.lock:
+            while codes:
+                code = codes.pop()
+                names = [name for name in code.co_names if name in
+                        FUNCTIONS and name not in self.globals]
+                if names:
+                    for instruction in dis.get_instructions(code):
+                        if instruction.opname in LOAD_GLOBALS and \
+                                instruction.argval in names:
+                            self.get_function(instruction.argval)
+
+                codes.extend(const for const in code.co_consts if
+                        isinstance(const, type(code)))
+
+    def execute(self, code, debug=False, variables=False, origin=None,
+            locals=None, frame=None):
+        """Execute the SharpScript code given as an argument.
+
+        The origin is the object executing the code (a trigger, an
+        alias...), only used when profiling.  If 'locals' is set, the
+        code is executed with these variables rather than the
+        engine's (see 'namespace').  Otherwise, the frame (a
+        dictionary of variables, like the ones of a trigger match)
+        is pushed in the engine's variables while the code is
+        executed (see 'VariableStore').
+
+        """
+        profiler = self.profiler
+        profiling = profiler is not None and profiler.active
         if isinstance(code, str):
-            instructions = self.feed(code, variables=variables)
+            if debug:
+                self.logger.debug("Executing SharpScript\n{}".format(code))
+            if profiling:
+                code = self.compile_statements(code, variables)
+            else:
+                code = self.compile(code, variables=variables)
+        else:
+            self.bind_functions(code)
+            if profiling:
+                code = [("<compiled>", code)]
+
+        if locals is None:
+            store = self.variables
+            if frame is not None:
+                store.push(frame)
         else:
-            instructions = [code]
+            store = None
+            if frame is not None:
+                locals.update(frame)
+
+        globals, locals = self.namespace(locals)
+        try:
+            if profiling:
+                profiler.execute(code, origin, globals, locals)
+            else:
+                exec(code, globals, locals)
+        finally:
+            if store is not None:
+                if frame is not None:
+                    store.pop()
+                store.check()
+
+    def namespace(self, locals=None):
+        """Return the globals and locals to execute code.
+
+        If 'locals' isn't set, the engine's are returned.  Otherwise,
+        a copy of the globals is returned, replacing the variables
+        with the given locals.  This is used by the script executor's
+        worker:  the functions are then replaced by their
+        'run_in_worker' method, which calls them in the reactor thread
+        (see 'Function').
 
-        globals = self.globals
-        locals = self.locals
+        """
+        if locals is None:
+            return self.globals, self.locals
 
-        for instruction in instructions:
-            if debug:
-                self.logger.debug("Executing SharpScript\n{}".format(
-                        instruction))
-            exec(instruction, globals, locals)
+        with self.lock:
+            globals = dict(self.globals)
+            functions = list(self.functions.items())
 
-    def feed(self, content, variables=False):
-        """Feed the SharpScript engine with a string content.
+        globals["_replace_variables"] = lambda line: self.replace_variables(
+                line, locals)
+        for name, function in functions:
+            if globals.get(name) == function.run:
+                globals[name] = partial(function.run_in_worker, locals)
 
-        The content is probably a file with several statements in
-        SharpScript, or a single statement.  In all cases, this function
-        returns the list of Python codes corresponding with
-        this suite of statements.
+        return globals, locals
+
+    def compile_statements(self, content, variables=False):
+        """Compile each statement of the content separately.
+
+        Return a list of tuples (source, code), used when profiling.
+        The list is kept by the profiler, which keeps at most
+        'cache_size' contents, like the cache.
 
         """
-        # Execute Python code if necessary
-        codes = []
+        profiler = self.profiler
+        key = (content, variables)
+        with self.lock:
+            statements = profiler.compiled.get(key)
+            if statements is not None:
+                profiler.compiled.move_to_end(key)
+
+        if statements is None:
+            statements = []
+            for statement in self.parse(content):
+                if isinstance(statement, str):
+                    source = statement
+                else:
+                    source = " ".join(statement)
+
+                code = self.build([statement], variables=variables)
+                statements.append((source, code))
+
+            with self.lock:
+                profiler.compiled[key] = statements
+                if len(profiler.compiled) > self.cache_size:
+                    profiler.compiled.popitem(last=False)
+
+        return statements
+
+    def compile(self, content, variables=False, cache=True):
+        """Compile the SharpScript content, using the cache if possible.
+
+        Return a code object.  If 'variables' is set, the variables
+        are replaced when the code object is executed.  If 'cache'
+        is unset, the code object isn't kept in the cache (this is
+        useful for scripts executed once).
+
+        """
+        key = (content, variables)
+        with self.lock:
+            code = self.cache.get(key)
+            if code is not None:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return code
+
+            self.misses += 1
+
+        code = self.build(self.parse(content), variables=variables)
+        if cache:
+            with self.lock:
+                self.cache[key] = code
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+        return code
+
+    def build(self, statements, variables=False):
+        """Build a code object from the parsed statements (see 'parse')."""
+        body = []
+        for statement in statements:
+            if isinstance(statement, str):
+                body.extend(ast.parse(statement).body)
+            else:
+                body.append(ast.Expr(value=self.convert_to_ast(statement,
+                        variables=variables), **LOCATION))
+
+        # The module is parsed, as its fields differ between versions
+        module = ast.parse("")
+        module.body = body
+        code = compile(module, "<sharp>", "exec")
+        self.bind_functions(code)
+        return code
+
+    def parse(self, content):
+        """Parse the SharpScript content.
+
+        Return a list of statements:  Python code at the top of the
+        content is returned as strings, SharpScript statements as
+        tuples (see 'split_statements').
+
+        """
+        statements = []
         while content.startswith("{+"):
             end = self.find_right_brace(content)
             code = content[2:end - 1].lstrip("\n").rstrip("\n ")
             code = dedent(code)
-            codes.append(code)
+            statements.append(code)
             content = content[end + 1:]
 
         # The remaining must be SharpScript, splits into statements
-        statements = self.split_statements(content)
-        for statement in statements:
-            pycode = self.convert_to_python(statement, variables=variables)
-            codes.append(pycode)
+        statements.extend(self.split_statements(content))
+        return statements
+
+    def feed(self, content, variables=False):
+        """Feed the SharpScript engine with a string content.
+
+        The content is probably a file with several statements in
+        SharpScript, or a single statement.  In all cases, this function
+        returns the list of Python codes corresponding with
+        this suite of statements.
+
+        """
+        codes = []
+        for statement in self.parse(content):
+            if isinstance(statement, str):
+                codes.append(statement)
+            else:
+                codes.append(self.convert_to_python(statement,
+                        variables=variables))
 
         return codes
 
+    def convert_to_ast(self, statement, variables=False):
+        """Convert the statement to a Python AST call and return it.
+
+        The arguments are converted as in 'convert_to_python', but
+        they are kept as string constants, without being written in
+        Python and parsed again.  If 'variables' is set, arguments
+        containing variables are wrapped in a call to
+        'replace_variables', so they are replaced each time the code
+        is executed.
+
+        """
+        function_name = statement[0][1:].lower()
+        arguments = []
+        keywords = []
+        for argument in statement[1:]:
+            if argument.startswith("{+"):
+                argument = dedent(argument)
+            elif argument.startswith("{"):
+                argument = self.replace_semicolons(argument[1:-1])
+            elif argument[0] in "-+":
+                keywords.append(ast.keyword(arg=argument[1:],
+                        value=ast.Constant(value=argument[0] == "+",
+                        **LOCATION), **LOCATION))
+                continue
+            else:
+                argument = self.replace_semicolons(argument)
+
+            node = ast.Constant(value=argument, **LOCATION)
+            if variables and "$" in argument and not argument.startswith(
+                    "{+"):
+                node = ast.Call(func=ast.Name(id="_replace_variables",
+                        ctx=ast.Load(), **LOCATION), args=[node],
+                        keywords=[], **LOCATION)
+
+            arguments.append(node)
+
+        return ast.Call(func=ast.Name(id=function_name, ctx=ast.Load(),
+                **LOCATION), args=arguments, keywords=keywords, **LOCATION)
+
     def convert_to_python(self, statement, variables=False):
         """Convert the statement to Python and return the str code.
 
@@ -165,23 +457,20 @@ class SharpScript:
         A statement is one-line short at the very least.  It can be
         longer by that, if it's enclosed into braces.
 
+        The content is read in a single pass, using indexes:  no
+        part of the content is copied, except the arguments themselves.
+
         """
         statements = []
         i = 0
+        end = len(content.rstrip())
         function_name = ""
         arguments = []
-        while True:
-            remaining = content[i:]
+        while i < end:
+            char = content[i]
 
-            # If remaining is empty, saves the statement and exits the loop
-            if not remaining or remaining.isspace():
-                if function_name:
-                    statements.append((function_name, ) + tuple(arguments))
-
-                break
-
-            # If remaining begins with a new line
-            if remaining[0] == "\n":
+            # A new line ends the statement
+            if char == "\n":
                 if function_name:
                     statements.append((function_name, ) + tuple(arguments))
                     function_name = ""
@@ -190,48 +479,66 @@ class SharpScript:
                 i += 1
                 continue
 
-            # If remaining begins with a space
-            if remaining[0].isspace():
-                remaining = remaining[1:]
+            # Skip the spaces
+            if char.isspace():
                 i += 1
                 continue
 
             # If the function_name is not defined, take the first parameter
             if not function_name:
-                if remaining.startswith("#") and not remaining.startswith(
-                        "##"):
+                if char == "#" and not content.startswith("##", i):
                     # This is obviously a function name
-                    function_name = remaining.splitlines()[0].split(" ")[0]
+                    function_name = content[i:self.find_word_end(content, i)]
                     arguments = []
                     i += len(function_name)
                 else:
                     function_name = "#send"
-                    argument = remaining.splitlines()[0]
+                    argument = content[i:self.find_line_end(content, i)]
                     i += len(argument)
 
                     if argument.startswith("##"):
                         argument = argument[1:]
 
                     arguments = [argument]
-            elif remaining[0] == "{":
-                end = self.find_right_brace(remaining)
-                argument = remaining[:end + 1]
-                i += end + 1
-                if argument.startswith("##"):
-                    argument = argument[1:]
+            elif char == "{":
+                right = self.find_right_brace(content, i)
+                if right is None:
+                    right = len(content) - 1
 
+                argument = content[i:right + 1]
+                i = right + 1
                 arguments.append(argument)
             else:
-                argument = remaining.splitlines()[0].split(" ")[0]
+                argument = content[i:self.find_word_end(content, i)]
                 i += len(argument)
                 if argument.startswith("##"):
                     argument = argument[1:]
 
                 arguments.append(argument)
 
+        if function_name:
+            statements.append((function_name, ) + tuple(arguments))
+
         return statements
 
-    def find_right_brace(self, text):
+    @staticmethod
+    def find_line_end(text, start=0):
+        """Return the index of the end of the line beginning at start."""
+        match = RE_LINE_END.search(text, start)
+        return match.start() if match else len(text)
+
+    @staticmethod
+    def find_word_end(text, start=0):
+        """Return the index of the end of the word beginning at start.
+
+        Words are separated by spaces or line breaks.
+
+        """
+        match = RE_WORD_END.search(text, start)
+        return match.start() if match else len(text)
+
+    @staticmethod
+    def find_right_brace(text, start=0):
         """Find the right brace matching the opening one.
 
         This function doesn't only look for the first right brace (}).
@@ -240,75 +547,85 @@ class SharpScript:
             >>> Engine.find_right_brace("{first parameter {with} something} else")
             33
 
+        The search begins at 'start', which should be the position of
+        the opening brace.  None is returned if no brace matches.
+
         """
         level = 0
-        i = 0
-        while i < len(text):
-            char = text[i]
-            if char == "{":
+        for match in RE_BRACE.finditer(text, start):
+            if match.group() == "{":
                 level += 1
-            elif char == "}":
+            else:
                 level -= 1
 
             if level == 0:
-                return i
-
-            i += 1
+                return match.start()
 
         return None
 
     @staticmethod
     def replace_semicolons(text):
-        """Replace all not-escaped semi-colons."""
-        i = 0
-        while i < len(text):
-            remaining = text[i:]
-            if remaining.startswith(";;"):
-                i += 2
-                continue
-            elif remaining.startswith(";"):
-                text = text[:i] + "\n" + text[i + 1:]
-            i += 1
+        """Replace all not-escaped semi-colons.
 
-        return text.replace(";;", ";")
+        A single semi-colon is replaced by a line break, two semi-colons
+        are replaced by one.
 
-    def replace_variables(self, line):
+        """
+        return RE_SEMICOLON.sub(lambda match: ";" if len(
+                match.group()) == 2 else "\n", text)
+
+    def get_template(self, text):
+        """Return the template of this text, using the cache if possible."""
+        with self.lock:
+            template = self.templates.get(text)
+            if template is None:
+                template = Template(text)
+                self.templates[text] = template
+                if len(self.templates) > self.cache_size:
+                    self.templates.popitem(last=False)
+            else:
+                self.templates.move_to_end(text)
+
+        return template
+
+    def render(self, template, variables=None):
+        """Render the template with the engine's variables.
+
+        Other variables can be given (a dictionary).  Lookups are
+        logged only if 'log_variables' is set.
+
+        """
+        if variables is None:
+            variables = self.locals
+
+        if self.log_variables:
+            for index, variable, is_argument in template.variables:
+                value = template.lookup(variables, variable, is_argument)
+                self.logger.debug("#{} requests variable {}, value={}".format(
+                        self.id, repr(variable), repr(value)))
+
+        return template.render(variables)
+
+    def replace_variables(self, line, variables=None):
         """Replace the variables in the line (str) and return the new line.
 
         Variables can be written in two ways:
             $variable (when surrounded by special characters)
             ${variable} (if not).
 
-        The dollar sign can be espaced with \$.
+        The dollar sign can be espaced with \\$.
 
         For instance:
             "You see your heal point is now $pv."
             "You have ${pv}PV left."
             "You can earn ${sum}USD if you move quickly."
-            "You can earn \$$sum if you move quickly."
-
-        """
-        def spot(match):
-            """A variable has been found and should be replaced."""
-            variable = match.group(1)
-            args = self.locals.get("args", {})
-            if variable.isdigit():
-                # Get from the 'args' variable
-                value = args.get(variable, "")
-            else:
-                value = self.locals.get(variable, "")
+            "You can earn \\$$sum if you move quickly."
 
-            self.logger.debug("#{} requests variable {}, value={}".format(
-                    self.id, repr(variable), repr(value)))
-            return str(value)
+        The line is parsed once (see 'get_template').  Other variables
+        can be given, as in 'render'.
 
-        # Replace the variables
-        line = RE_VAR.sub(spot, line)
-
-        # Escape the double $ sign
-        line = line.replace("\\$", "$")
-
-        return line
+        """
+        return self.render(self.get_template(line), variables)
 
     def format(self, content, return_str=True):
         """Write SharpScript and return a string.
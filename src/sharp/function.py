@@ -51,6 +51,23 @@ class Function(object):
         """Execute the function with arguments."""
         raise NotImplementedError
 
+    def run_in_worker(self, variables, *args, **kwargs):
+        """Execute the function from a script executor's worker.
+
+        Functions use the client, the world and the reactor, which
+        can only be used in the reactor thread:  by default, the call
+        to 'run' is made in the reactor thread, in order, and the
+        worker doesn't wait for it.  The variables are those of the
+        action being executed.
+
+        """
+        if self.world is not None:
+            clock = self.world.executor.clock
+        else:
+            from twisted.internet import reactor as clock
+
+        clock.callFromThread(self.run, *args, **kwargs)
+
     def display(self, panel):
         """Display the function's argument."""
         pass
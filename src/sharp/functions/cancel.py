@@ -0,0 +1,75 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the Cancel function class."""
+
+from sharp import Function
+
+class Cancel(Function):
+
+    """Function SharpScript '#cancel'.
+
+    This function cancels a named timer, created with '#delay' or
+    '#every'.  Without argument, all the timers are cancelled.
+
+        #cancel autosave
+
+    """
+
+    description = "Cancel one or all timers"
+
+    def run(self, name=None):
+        """Cancel the timer."""
+        if not self.world:
+            return
+
+        if name is None:
+            self.world.timers.clear()
+        else:
+            self.world.timers.cancel(name)
+
+    def display(self, dialog, name=""):
+        """Display the function's argument."""
+        import wx
+
+        l_name = self.t("name", "Name of the timer to cancel " \
+                "(leave blank to cancel all the timers)")
+
+        l_name = wx.StaticText(dialog, label=l_name)
+        t_name = wx.TextCtrl(dialog, value=name)
+        dialog.name = t_name
+        dialog.top.Add(l_name)
+        dialog.top.Add(t_name)
+
+    def complete(self, dialog):
+        """The user pressed 'ok' in the dialog."""
+        name = dialog.name.GetValue()
+        if name:
+            return (name, )
+
+        return ()
@@ -28,11 +28,8 @@
 
 """Module containing the Channel function class."""
 
-import wx
-
 from scripting.channel import Channel as ObjChannel
 from sharp import Function
-from ui.dialogs.channel import ChannelsDialog
 from screenreader import ScreenReader
 
 class Channel(Function):
@@ -45,16 +42,19 @@ class Channel(Function):
     def run(self, name, show=True):
         """Create a channel."""
         if self.world:
-            if name not in [ch.name for ch in self.world.channels]:
+            if self.world.channels.get(name) is None:
                 channel = ObjChannel(self.world, name)
                 self.world.add_channel(channel)
             else:
                 if show and Channel.allow_creation:
+                    from ui.dialogs.channel import ChannelsDialog
                     dialog = ChannelsDialog(self.engine, self.world, self.world.channels, name)
                     dialog.ShowModal()
 
     def display(self, dialog, name="", show=True):
         """Display the function's argument."""
+        import wx
+
         l_name = self.t("name", "Unique name of the channel")
         l_show = self.t("show", "Show this channel in a dialog box")
 
@@ -74,6 +74,8 @@ class Channel(Function):
 
     def complete(self, dialog):
         """The user pressed 'ok' in the dialog."""
+        import wx
+
         name = dialog.name.GetValue()
         empty_name = self.t("empty_name",
                 "The channel name is empty.  How do you want to call it?")
@@ -0,0 +1,69 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the ClearQueue function class."""
+
+from sharp import Function
+
+class ClearQueue(Function):
+
+    """Function SharpScript '#clearqueue'.
+
+    This function removes the commands waiting in the queue of
+    commands, without sending them.  It can be used to stop a long
+    '#repeat' when the world limits the number of commands sent
+    per second.
+
+        #clearqueue
+
+    """
+
+    description = "Remove the queued commands"
+
+    def run(self):
+        """Remove the queued commands."""
+        if not self.client:
+            return
+
+        count = self.client.queue.clear()
+        self.client.handle_message(self.t("cleared",
+                "{count} commands removed from the queue.").format(
+                count=count))
+
+    def display(self, dialog):
+        """Display the function's explanation, it has no argument."""
+        import wx
+
+        l_help = self.t("help", "The commands waiting to be sent " \
+                "will be removed without being sent.")
+        l_help = wx.StaticText(dialog, label=l_help)
+        dialog.top.Add(l_help)
+
+    def complete(self, dialog):
+        """The user pressed 'ok' in the dialog."""
+        return ()
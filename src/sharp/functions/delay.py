@@ -0,0 +1,128 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the Delay function class."""
+
+from textwrap import dedent
+
+from ytranslate import t
+
+from scripting.timer import Timer
+from sharp import Function
+
+class Delay(Function):
+
+    """Function SharpScript '#delay'.
+
+    This function executes an action after a delay (in seconds),
+    without blocking the client.  The timer can be named, to be
+    cancelled with '#cancel'.  A new timer replaces the timer of
+    the same name, if any.
+
+        #delay 2.5 {say {You can cast again.}}
+        #delay 60 {#send save} autosave
+
+    """
+
+    description = "Execute an action after a delay"
+    repeat = False
+
+    def run(self, delay, action, name=""):
+        """Create the timer."""
+        if not self.world:
+            return
+
+        action = dedent(action.strip("\n"))
+        timer = Timer(self.sharp_engine, float(delay), action, name,
+                repeat=self.repeat)
+        self.world.timers.add(timer)
+
+    def display(self, dialog, delay="", action="", name=""):
+        """Display the function's arguments."""
+        import wx
+
+        l_delay = self.t("delay", "Delay in seconds")
+        l_action = self.t("action", "Action to execute")
+        l_name = self.t("name", "Name of the timer (optional)")
+
+        # Delay
+        l_delay = wx.StaticText(dialog, label=l_delay)
+        t_delay = wx.TextCtrl(dialog, value=delay)
+        dialog.delay = t_delay
+        dialog.top.Add(l_delay)
+        dialog.top.Add(t_delay)
+
+        # Action
+        l_action = wx.StaticText(dialog, label=l_action)
+        t_action = wx.TextCtrl(dialog, value=dedent(action.strip("\n")),
+                style=wx.TE_MULTILINE)
+        dialog.action = t_action
+        dialog.top.Add(l_action)
+        dialog.top.Add(t_action)
+
+        # Name
+        l_name = wx.StaticText(dialog, label=l_name)
+        t_name = wx.TextCtrl(dialog, value=name)
+        dialog.name = t_name
+        dialog.top.Add(l_name)
+        dialog.top.Add(t_name)
+
+    def complete(self, dialog):
+        """The user pressed 'ok' in the dialog."""
+        import wx
+
+        delay = dialog.delay.GetValue()
+        action = dialog.action.GetValue()
+        name = dialog.name.GetValue()
+        invalid_delay = self.t("invalid_delay",
+                "The delay you specified isn't a valid number of seconds.")
+        empty_action = self.t("empty_action",
+                "The action is empty.  What should the timer do?")
+
+        try:
+            valid = float(delay) > 0
+        except ValueError:
+            valid = False
+
+        if not valid:
+            wx.MessageBox(invalid_delay, t("ui.alert.error"),
+                    wx.OK | wx.ICON_ERROR)
+            dialog.delay.SetFocus()
+            return None
+
+        if not action:
+            wx.MessageBox(empty_action, t("ui.alert.error"),
+                    wx.OK | wx.ICON_ERROR)
+            dialog.action.SetFocus()
+            return None
+
+        arguments = [delay, action]
+        if name:
+            arguments.append(name)
+
+        return tuple(arguments)
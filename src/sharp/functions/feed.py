@@ -28,8 +28,6 @@
 
 """Module containing the Feed function class."""
 
-import wx
-
 from sharp import Function
 
 class Feed(Function):
@@ -48,6 +46,8 @@ class Feed(Function):
 
     def display(self, dialog, channel="", message=""):
         """Display the function's argument."""
+        import wx
+
         l_channel = self.t("channel", "Name of the channel to be fed")
         l_message = self.t("message", "Message to feed to the channel")
 
@@ -68,6 +68,8 @@ class Feed(Function):
 
     def complete(self, dialog):
         """The user pressed 'ok' in the dialog."""
+        import wx
+
         channel = dialog.channel.GetValue()
         empty_channel = self.t("empty_channel",
                 "The channel name is empty.  Where to send the message?")
@@ -30,7 +30,6 @@
 
 import os
 
-import wx
 from ytranslate import t
 
 from audio import audiolib
@@ -89,6 +88,8 @@ class Play(Function):
 
     def display(self, dialog, filename=""):
         """Display the function's argument."""
+        import wx
+
         self.dialog = dialog
         directory = os.path.join(self.world.path, "sounds")
         if not os.path.isdir(directory):
@@ -115,6 +116,8 @@ class Play(Function):
 
     def complete(self, dialog):
         """The user pressed 'ok' in the dialog."""
+        import wx
+
         file = dialog.default_file
         empty_path = self.t("empty_path",
                 "The path hasn't been set.  What file should I play?")
@@ -128,6 +131,8 @@ class Play(Function):
 
     def browse_file(self, e):
         """Browse for a file."""
+        import wx
+
         choose_file = t("ui.button.choose_file")
         parent = self.dialog
         extensions = "Audio file (*.wav,*.ogg,*.mp3)|*.wav;*.ogg;*.mp3"
@@ -0,0 +1,149 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the Profile function class."""
+
+import os
+
+from ytranslate import t
+
+from sharp import Function
+from sharp.profiler import Profiler
+
+# Actions of the profiler, with their default label
+ACTIONS = (
+    ("on", "Start profiling"),
+    ("off", "Stop profiling"),
+    ("report", "Display the report"),
+    ("reset", "Remove the recorded data"),
+    ("dump", "Write the data in a JSON file"),
+)
+
+class Profile(Function):
+
+    """Function SharpScript '#profile'.
+
+    This function controls the SharpScript profiler, which times
+    each statement executed by the engine, and each trigger, alias,
+    macro or timer executing SharpScript:
+
+        #profile on
+        #profile off
+        #profile report
+        #profile reset
+        #profile dump [filename]
+
+    The report is displayed.  The dump writes the data in a JSON
+    file, 'profile.json' in the world's directory by default.
+
+    """
+
+    description = "Control the SharpScript profiler"
+
+    def run(self, action="report", filename="profile.json"):
+        """Control the profiler."""
+        sharp = self.sharp_engine
+        profiler = sharp.profiler
+        action = action.lower()
+        if action == "on":
+            if profiler is None:
+                profiler = sharp.profiler = Profiler()
+            profiler.active = True
+            self.message(self.t("on", "Profiling is on."))
+        elif action == "off":
+            if profiler is not None:
+                profiler.active = False
+            self.message(self.t("off", "Profiling is off."))
+        elif profiler is None:
+            self.message(self.t("none", "Profiling hasn't been started, " \
+                    "use #profile on."))
+        elif action == "reset":
+            profiler.reset()
+        elif action == "report":
+            self.message(profiler.report())
+        elif action == "dump":
+            if self.world and self.world.engine:
+                filename = os.path.join(self.world.path, filename)
+
+            with open(filename, "w", encoding="utf-8") as file:
+                file.write(profiler.to_json())
+            self.message(self.t("dump", "The profile was written in " \
+                    "{filename}.").format(filename=filename))
+        else:
+            raise ValueError("unknown profile action {}".format(
+                    repr(action)))
+
+    def message(self, message):
+        """Display a message in the client."""
+        if self.client:
+            self.client.handle_message(message)
+
+    def display(self, dialog, action="report", filename="profile.json"):
+        """Display the function's arguments."""
+        import wx
+
+        l_action = self.t("action", "Action of the profiler")
+        l_filename = self.t("filename", "File to write the data in " \
+                "(only used when writing in a file)")
+        labels = [self.t("action_" + name, label) for name, label in ACTIONS]
+        names = [name for name, label in ACTIONS]
+
+        # Action
+        l_action = wx.StaticText(dialog, label=l_action)
+        c_action = wx.Choice(dialog, choices=labels)
+        action = action.lower()
+        c_action.SetSelection(names.index(action) if action in names else 0)
+        dialog.action = c_action
+        dialog.top.Add(l_action)
+        dialog.top.Add(c_action)
+
+        # File name
+        l_filename = wx.StaticText(dialog, label=l_filename)
+        t_filename = wx.TextCtrl(dialog, value=filename)
+        dialog.filename = t_filename
+        dialog.top.Add(l_filename)
+        dialog.top.Add(t_filename)
+
+    def complete(self, dialog):
+        """The user pressed 'ok' in the dialog."""
+        import wx
+
+        action = ACTIONS[dialog.action.GetSelection()][0]
+        if action != "dump":
+            return (action, )
+
+        filename = dialog.filename.GetValue()
+        empty_filename = self.t("empty_filename",
+                "The file name is empty.  Where should the data be written?")
+        if not filename:
+            wx.MessageBox(empty_filename, t("ui.alert.error"),
+                    wx.OK | wx.ICON_ERROR)
+            dialog.filename.SetFocus()
+            return None
+
+        return (action, filename)
@@ -31,7 +31,6 @@
 import os
 from random import choice
 
-import wx
 from ytranslate import t
 
 from log import logger
@@ -28,7 +28,6 @@
 
 """Module containing the Repeat function class."""
 
-import wx
 from ytranslate import t
 
 from sharp import Function
@@ -64,11 +63,12 @@ class Repeat(Function):
 
         times = int(times)
         if command:
-            for time in range(times):
-                self.client.write(command)
+            self.client.write([command] * times)
 
     def display(self, dialog, times="1", command=""):
         """Display the function's arguments."""
+        import wx
+
         l_times = self.t("times", "Number of times to repeat the command")
         l_command = self.t("command", "Command to repeat (leave blank " \
                 "to send the last command in your history")
@@ -90,6 +90,8 @@ class Repeat(Function):
 
     def complete(self, dialog):
         """The user pressed 'ok' in the dialog."""
+        import wx
+
         times = dialog.times.GetValue()
         empty_times = self.t("empty_times",
                 "You didn't specify the number of times you want " \
@@ -28,8 +28,6 @@
 
 """Module containing the Say function class."""
 
-import wx
-
 from ytranslate import t
 
 from sharp import Function
@@ -53,6 +51,8 @@ class Say(Function):
 
     def display(self, dialog, text="", screen=True, speech=True, braille=True):
         """Display the function's argument."""
+        import wx
+
         l_text = self.t("text", "Text to be displayed and sent")
         l_screen = self.t("screen", "Display the message in the client")
         l_speech = self.t("speech", "Speak the message aloud")
@@ -81,6 +81,8 @@ class Say(Function):
 
     def complete(self, dialog):
         """The user pressed 'ok' in the dialog."""
+        import wx
+
         text = dialog.text.GetValue()
         empty_text = self.t("empty_text",
                 "The text field is empty.  What should I say?")
@@ -30,7 +30,6 @@
 
 from textwrap import dedent
 
-import wx
 from ytranslate import t
 
 from sharp import Function
@@ -50,11 +49,12 @@ class Send(Function):
         """Send the text."""
         text = dedent(text.strip("\n"))
         if self.client:
-            for line in text.splitlines():
-                self.client.write(line, alias=False)
+            self.client.write(text.splitlines(), alias=False)
 
     def display(self, dialog, commands=""):
         """Display the function's argument."""
+        import wx
+
         try:
             label = t("sharp.send.command")
         except ValueError:
@@ -69,6 +69,8 @@ class Send(Function):
 
     def complete(self, dialog):
         """The user pressed 'ok' in the dialog."""
+        import wx
+
         commands = dialog.commands.GetValue()
         try:
             empty_commands = t("sharp.send.empty_commands")
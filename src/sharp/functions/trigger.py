@@ -36,11 +36,17 @@ class Trigger(Function):
     """Function SharpScript 'trigger'."""
 
     def run(self, reaction, action, substitution="", mute=False,
-            mark=False):
-        """Say the text."""
+            mark=False, **flags):
+        """Create the trigger.
+
+        The '+async' flag can't be a named argument, 'async' being
+        a Python keyword.
+
+        """
         trigger = ObjTrigger(self.sharp_engine, reaction, action,
                 substitution)
         trigger.mute = mute
         trigger.mark = mark
+        trigger.asynchronous = flags.get("async", False)
         if self.world:
             self.world.add_trigger(trigger)
@@ -0,0 +1,132 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the Var function class."""
+
+from ytranslate import t
+
+from scripting.variables import MISSING, TYPES, VariableStore
+from sharp import Function
+
+class Var(Function):
+
+    """Function SharpScript '#var'.
+
+    This function declares a persistent variable, with an optional
+    type (str, int, float or bool, str by default), and sets its
+    value.  Declared variables are saved in the world's configuration.
+
+        #var hp 100 int
+        #var target {a rat}
+        #var hp 80
+
+    The last line keeps the 'int' type of the variable.  Values are
+    converted to the variable's type.
+
+    """
+
+    description = "Declare a persistent variable"
+
+    def run(self, name, value=None, type=None):
+        """Declare the variable."""
+        if value is None:
+            value = MISSING
+
+        self.sharp_engine.variables.declare(name, value, type)
+
+    def run_in_worker(self, variables, name, value=None, type=None):
+        """Declare the variable from an asynchronous action.
+
+        The variable is set in the action's variables, so the next
+        statements of the action can use it, and declared in the
+        reactor thread.
+
+        """
+        if value is None:
+            value = MISSING
+
+        type = type or self.sharp_engine.variables.types.get(name, "str")
+        value = VariableStore(variables).declare(name, value, type)
+        super().run_in_worker(variables, name, value, type)
+
+    def display(self, dialog, name="", value="", type=""):
+        """Display the function's arguments."""
+        import wx
+
+        l_name = self.t("name", "Name of the variable")
+        l_value = self.t("value", "Value of the variable")
+        l_type = self.t("type", "Type of the variable")
+        keep = self.t("keep", "Keep the current type (str by default)")
+        types = [""] + sorted(TYPES)
+
+        # Name
+        l_name = wx.StaticText(dialog, label=l_name)
+        t_name = wx.TextCtrl(dialog, value=name)
+        dialog.name = t_name
+        dialog.top.Add(l_name)
+        dialog.top.Add(t_name)
+
+        # Value
+        l_value = wx.StaticText(dialog, label=l_value)
+        t_value = wx.TextCtrl(dialog, value=value)
+        dialog.value = t_value
+        dialog.top.Add(l_value)
+        dialog.top.Add(t_value)
+
+        # Type
+        l_type = wx.StaticText(dialog, label=l_type)
+        c_type = wx.Choice(dialog, choices=[keep] + types[1:])
+        c_type.SetSelection(types.index(type) if type in types else 0)
+        dialog.types = types
+        dialog.type = c_type
+        dialog.top.Add(l_type)
+        dialog.top.Add(c_type)
+
+    def complete(self, dialog):
+        """The user pressed 'ok' in the dialog."""
+        import wx
+
+        name = dialog.name.GetValue()
+        value = dialog.value.GetValue()
+        type = dialog.types[dialog.type.GetSelection()]
+        empty_name = self.t("empty_name",
+                "The variable name is empty.  How do you want to call it?")
+
+        if not name:
+            wx.MessageBox(empty_name, t("ui.alert.error"),
+                    wx.OK | wx.ICON_ERROR)
+            dialog.name.SetFocus()
+            return None
+
+        arguments = [name]
+        if value or type:
+            arguments.append(value)
+        if type:
+            arguments.append(type)
+
+        return tuple(arguments)
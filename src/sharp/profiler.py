@@ -0,0 +1,171 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the SharpScript profiler.
+
+When profiling is on (see the '#profile' function), the SharpScript
+engine executes each statement separately and times it.  The
+profiler records, for each statement (its source) and for each
+object which executed the code (a trigger, an alias, a macro, a
+timer, or the script itself), the number of calls, the cumulative
+and the maximum wall time.  When profiling is off, the engine only
+checks its 'profiler' attribute.
+
+"""
+
+from collections import OrderedDict
+import json
+from threading import Lock
+from time import perf_counter
+
+# Attribute identifying the objects executing SharpScript
+ORIGINS = {
+    "alias": "alias",
+    "macro": "shortcut",
+    "timer": "name",
+    "trigger": "reaction",
+}
+
+class Profiler:
+
+    """The SharpScript profiler of an engine.
+
+    The 'statements' and 'origins' dictionaries contain, for each
+    statement source or origin label, a list [calls, total, max]
+    (times in seconds).  The 'compiled' ordered dictionary contains,
+    for each SharpScript content, the list of its statements, compiled
+    separately (tuples (source, code)), and is limited like the
+    engine's cache.  As asynchronous actions are executed in a worker
+    thread, the data is protected by a lock.
+
+    """
+
+    def __init__(self):
+        self.active = True
+        self.statements = {}
+        self.origins = {}
+        self.compiled = OrderedDict()
+        self.lock = Lock()
+
+    def __repr__(self):
+        return "<Profiler active={}, {} statements>".format(self.active,
+                len(self.statements))
+
+    def reset(self):
+        """Remove the recorded data."""
+        with self.lock:
+            self.statements.clear()
+            self.origins.clear()
+            self.compiled.clear()
+
+    @staticmethod
+    def describe(origin):
+        """Return the label of the object which executed the code."""
+        if origin is None:
+            return "script"
+
+        kind = type(origin).__name__.lower()
+        attribute = ORIGINS.get(kind)
+        name = getattr(origin, attribute, "") if attribute else ""
+        return "{} {}".format(kind, name or repr(origin)).rstrip()
+
+    @staticmethod
+    def add(stats, key, elapsed):
+        """Add a call to the stats of this key."""
+        stat = stats.get(key)
+        if stat is None:
+            stats[key] = [1, elapsed, elapsed]
+        else:
+            stat[0] += 1
+            stat[1] += elapsed
+            if elapsed > stat[2]:
+                stat[2] = elapsed
+
+    def execute(self, statements, origin, globals, locals):
+        """Execute and time the compiled statements.
+
+        The statements are a list of tuples (source, code).  An
+        exception raised by a statement is raised again, once the
+        statement has been recorded.
+
+        """
+        begin = perf_counter()
+        try:
+            for source, code in statements:
+                start = perf_counter()
+                try:
+                    exec(code, globals, locals)
+                finally:
+                    elapsed = perf_counter() - start
+                    with self.lock:
+                        self.add(self.statements, source, elapsed)
+        finally:
+            elapsed = perf_counter() - begin
+            with self.lock:
+                self.add(self.origins, self.describe(origin), elapsed)
+
+    def report(self, limit=20):
+        """Return the report as a string.
+
+        The statements and origins are sorted by cumulative time,
+        only the first 'limit' of each are displayed.
+
+        """
+        lines = []
+        for title, stats in (("Statements", self.statements),
+                ("Origins", self.origins)):
+            lines.append("{} ({}):".format(title, len(stats)))
+            lines.append("  {:>7} {:>10} {:>10} {:>10}  {}".format("calls",
+                    "total ms", "avg ms", "max ms", "source"))
+            with self.lock:
+                ordered = sorted(stats.items(),
+                        key=lambda item: item[1][1], reverse=True)
+            for key, (calls, total, longest) in ordered[:limit]:
+                key = " ".join(key.split())
+                if len(key) > 60:
+                    key = key[:57] + "..."
+
+                lines.append("  {:>7} {:>10.3f} {:>10.3f} {:>10.3f}  " \
+                        "{}".format(calls, total * 1000,
+                        total * 1000 / calls, longest * 1000, key))
+
+        return "\n".join(lines)
+
+    def to_json(self):
+        """Return the recorded data as a JSON string."""
+        data = {}
+        for name, stats in (("statements", self.statements),
+                ("origins", self.origins)):
+            with self.lock:
+                stats = [(key, list(stat)) for key, stat in stats.items()]
+
+            data[name] = [{"name": key, "calls": calls, "total": total,
+                    "max": longest} for key, (calls, total, longest) in sorted(
+                    stats, key=lambda item: item[1][1], reverse=True)]
+
+        return json.dumps(data, indent=4)
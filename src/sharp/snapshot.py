@@ -0,0 +1,110 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Module containing the snapshots of compiled SharpScript files.
+
+Compiling a large 'config.set' file takes time, even though the file
+seldom changes.  A snapshot of the compiled code is therefore kept
+next to the file (in 'config.set.snapshot').  It contains the code
+object (marshalled), along with the modification time and a hash of
+the file's content:  if both are unchanged, the code object is used
+without parsing the file again.
+
+Snapshots also depend on the Python version (marshalled code objects
+can't be shared between versions) and on SNAPSHOT_VERSION, to be
+incremented when the compiler changes.
+
+"""
+
+from hashlib import sha1
+from importlib.util import MAGIC_NUMBER
+import marshal
+import os
+
+from log import sharp as logger
+
+# Constants
+SNAPSHOT_VERSION = 1
+EXTENSION = ".snapshot"
+
+def read_script(path):
+    """Read the script and return a tuple (content, encoding, digest).
+
+    The script is read in UTF-8 or, if it fails, in latin-1.  Line
+    breaks are converted to '\\n'.  The digest is computed on the
+    raw content of the file.
+
+    """
+    with open(path, "rb") as file:
+        raw = file.read()
+
+    digest = sha1(raw).hexdigest()
+    try:
+        content = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        content = raw.decode("latin-1")
+        encoding = "latin-1"
+    else:
+        encoding = "utf-8"
+
+    content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content, encoding, digest
+
+def compile_script(sharp_engine, path):
+    """Return the compiled script and its encoding.
+
+    The snapshot of the script is used if it's still valid.  Otherwise,
+    the script is compiled and a new snapshot is written.  A tuple
+    (code, encoding) is returned.
+
+    """
+    mtime = os.stat(path).st_mtime_ns
+    content, encoding, digest = read_script(path)
+    key = (SNAPSHOT_VERSION, MAGIC_NUMBER, mtime, digest)
+    snapshot = path + EXTENSION
+
+    # Try to read the snapshot
+    if os.path.exists(snapshot):
+        try:
+            with open(snapshot, "rb") as file:
+                data = marshal.load(file)
+            if data[0] == key:
+                return data[1], encoding
+        except Exception:
+            logger.exception("The snapshot {} can't be read".format(
+                    repr(snapshot)))
+
+    code = sharp_engine.compile(content, cache=False)
+    try:
+        with open(snapshot, "wb") as file:
+            marshal.dump((key, code), file)
+    except OSError:
+        logger.exception("The snapshot {} can't be written".format(
+                repr(snapshot)))
+
+    return code, encoding
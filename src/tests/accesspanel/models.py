@@ -0,0 +1,106 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from collections import OrderedDict, deque
+from unittest import TestCase
+
+from accesspanel import AccessPanel
+
+class FakeOutput:
+
+    """A stand-in for the output TextCtrl, holding its text in a string.
+
+    Positions are counted as in a rich text field, where each line
+    ending is one position.
+
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.insertion_point = 0
+
+    def GetInsertionPoint(self):
+        return self.insertion_point
+
+    def SetInsertionPoint(self, pos):
+        self.insertion_point = pos
+
+    def GetLastPosition(self):
+        return len(self.text)
+
+    def GetRange(self, start, end):
+        return self.text[start:end]
+
+    def AppendText(self, text):
+        self.text += text.replace("\r\n", "\n")
+        self.insertion_point = len(self.text)
+
+    def WriteText(self, text):
+        pos = self.insertion_point
+        text = text.replace("\r\n", "\n")
+        self.text = self.text[:pos] + text + self.text[pos:]
+        self.insertion_point = pos + len(text)
+
+    def Remove(self, start, end):
+        self.text = self.text[:start] + self.text[end:]
+
+    def Clear(self):
+        self.text = ""
+        self.insertion_point = 0
+
+    def Freeze(self):
+        pass
+
+    def Thaw(self):
+        pass
+
+    def SetStyle(self, start, end, style):
+        pass
+
+
+class MockPanel(TestCase):
+
+    """Base class for the tests of the AccessPanel.
+
+    The panel is created without a window: its output is a FakeOutput.
+
+    """
+
+    def setUp(self):
+        """Create the panel."""
+        panel = AccessPanel.__new__(AccessPanel)
+        panel.editing_pos = 0
+        panel.max_lines = 0
+        panel.max_chars = 0
+        panel.output_lines = deque()
+        panel.output_size = 0
+        panel.extensions = OrderedDict()
+        panel.rich = True
+        panel.screenreader_support = True
+        panel.output = FakeOutput()
+        self.panel = panel
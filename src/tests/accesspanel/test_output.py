@@ -0,0 +1,72 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest.mock import MagicMock
+
+from .models import MockPanel
+
+class TestOutput(MockPanel):
+
+    """Test the display of messages before the input."""
+
+    def send(self, message, pos=None):
+        """Display a message in the panel."""
+        event = MagicMock()
+        event.GetValue.return_value = message
+        event.GetPos.return_value = pos
+        self.panel.OnMessage(event)
+
+    def test_insert(self):
+        """Test that messages are inserted before the input."""
+        output = self.panel.output
+        self.send("first")
+        output.AppendText("loo")
+        self.send("second\nthird")
+        self.assertEqual(output.text, "first\nsecond\nthird\nloo")
+        self.assertEqual(self.panel.editing_pos, 19)
+        self.assertEqual(self.panel.input, "loo")
+        self.assertEqual(output.GetInsertionPoint(), 22)
+
+    def test_no_read(self):
+        """Test that the output isn't read back or removed."""
+        output = self.panel.output
+        self.send("first")
+        output.AppendText("look")
+        output.GetRange = MagicMock()
+        output.Remove = MagicMock()
+        self.send("second")
+        output.GetRange.assert_not_called()
+        output.Remove.assert_not_called()
+
+    def test_cursor_in_output(self):
+        """Test that the cursor stays in the output if it was there."""
+        output = self.panel.output
+        self.send("first\nsecond")
+        output.SetInsertionPoint(3)
+        self.send("third")
+        self.assertEqual(output.GetInsertionPoint(), 3)
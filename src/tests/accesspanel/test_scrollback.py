@@ -0,0 +1,137 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest.mock import MagicMock
+
+from accesspanel.extensions import ANSI
+from .models import MockPanel
+
+class TestScrollback(MockPanel):
+
+    """Test the bounded scrollback of the AccessPanel."""
+
+    def send(self, message, pos=None):
+        """Display a message in the panel."""
+        event = MagicMock()
+        event.GetValue.return_value = message
+        event.GetPos.return_value = pos
+        self.panel.OnMessage(event)
+
+    def test_unlimited(self):
+        """Test that the output isn't trimmed without limits."""
+        for i in range(100):
+            self.send("line {}".format(i))
+
+        self.assertEqual(len(self.panel.output_lines), 100)
+        self.assertTrue(self.panel.output.text.startswith("line 0\n"))
+
+    def test_lines(self):
+        """Test the limit in lines."""
+        self.panel.max_lines = 8
+        for i in range(8):
+            self.send("line {}".format(i))
+
+        self.assertTrue(self.panel.output.text.startswith("line 0\n"))
+
+        # The ninth line removes a block of three lines
+        self.send("line 8")
+        output = self.panel.output
+        self.assertEqual(len(self.panel.output_lines), 6)
+        self.assertEqual(output.text, "".join("line {}\n".format(i)
+                for i in range(3, 9)))
+        self.assertEqual(self.panel.output_size, len(output.text))
+        self.assertEqual(self.panel.editing_pos, len(output.text))
+
+    def test_chars(self):
+        """Test the limit in characters."""
+        self.panel.max_chars = 40
+        for i in range(6):
+            self.send("line {}".format(i))
+
+        # Each line takes 7 positions, 30 are kept at most
+        output = self.panel.output
+        self.assertEqual(output.text, "".join("line {}\n".format(i)
+                for i in range(2, 6)))
+        self.assertEqual(self.panel.output_size, 28)
+
+    def test_chars_only(self):
+        """Test that only the exceeded limit removes lines."""
+        self.panel.max_lines = 8
+        self.panel.max_chars = 75
+        self.send("x" * 29)
+        for i in range(7):
+            self.send("line {}".format(i))
+
+        # Removing the long line is enough, the line limit isn't exceeded
+        output = self.panel.output
+        self.assertEqual(len(self.panel.output_lines), 7)
+        self.assertEqual(output.text, "".join("line {}\n".format(i)
+                for i in range(7)))
+        self.assertEqual(self.panel.output_size, 49)
+
+    def test_input(self):
+        """Test that the input and the cursor are kept after a trim."""
+        self.panel.max_lines = 4
+        for i in range(4):
+            self.send("line {}".format(i))
+
+        self.panel.output.AppendText("look")
+        self.panel.output.SetInsertionPoint(self.panel.editing_pos + 2)
+        self.send("line 4")
+        output = self.panel.output
+        self.assertEqual(output.text, "line 2\nline 3\nline 4\nlook")
+        self.assertEqual(self.panel.input, "look")
+        self.assertEqual(output.GetInsertionPoint(),
+                self.panel.editing_pos + 2)
+
+    def test_mark(self):
+        """Test that a mark is moved after a trim."""
+        self.panel.max_lines = 4
+        for i in range(4):
+            self.send("line {}".format(i))
+
+        self.panel.output.SetInsertionPoint(self.panel.editing_pos)
+        self.send("line 4\nnext", pos=5)
+        output = self.panel.output
+        self.assertEqual(output.text, "line 3\nline 4\nnext\n")
+        self.assertEqual(output.GetInsertionPoint(), 7 + 5)
+
+    def test_ansi(self):
+        """Test that the ANSI positions are moved after a trim."""
+        ansi = ANSI.__new__(ANSI)
+        ansi.panel = self.panel
+        ansi.modifiers = [(30, None)]
+        ansi.start_mark = 25
+        ansi.last_mark = None
+        self.panel.extensions["ANSI"] = ansi
+        self.panel.output_lines.extend([10, 10, 10])
+        self.panel.output_size = 30
+        self.panel.max_chars = 20
+        self.assertEqual(self.panel.TrimOutput(), 20)
+        self.assertEqual(ansi.modifiers, [(10, None)])
+        self.assertEqual(ansi.start_mark, 5)
@@ -0,0 +1,93 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+from unittest.mock import MagicMock, call
+
+from accesspanel.extensions import ANSI
+from accesspanel.tokenizer import ANSITokenizer, DEFAULT, runs
+
+RED = (1, None, 0)
+GREEN = (2, None, 0)
+
+class TestStyles(TestCase):
+
+    """Test the merging of style runs in the ANSI extension."""
+
+    def setUp(self):
+        """Create the extension with a mocked panel."""
+        ansi = ANSI.__new__(ANSI)
+        ansi.panel = MagicMock()
+        ansi.panel.editing_pos = 0
+        ansi.modifiers = []
+        ansi.start_mark = None
+        ansi.last_mark = None
+        ansi.tokenizer = ANSITokenizer()
+        ansi.default_style = DEFAULT
+        ansi.nb_styles = 0
+        ansi.nb_saved = 0
+        ansi.GetAttribute = lambda style: style
+        self.ansi = ansi
+
+    def display(self, message):
+        """Display a message and return the text without ANSI codes."""
+        text = self.ansi.OnMessage(message)
+        self.ansi.PostMessage(text)
+        self.ansi.panel.editing_pos += len(text) + 1
+        return text
+
+    def test_runs(self):
+        """Test merging the spans."""
+        self.assertEqual(runs([]), ([], None))
+        self.assertEqual(runs([(0, RED), (2, RED), (4, RED)]),
+                ([], (0, RED)))
+        self.assertEqual(runs([(0, RED), (2, GREEN), (2, RED), (4, DEFAULT)]),
+                ([(0, 4, RED)], (4, DEFAULT)))
+
+    def test_merge(self):
+        """Test that lines of the same color are styled once."""
+        self.display("\x1b[31mred\r\nred\r\n\x1b[31mred\x1b[0m plain")
+        output = self.ansi.panel.output
+        output.SetStyle.assert_called_once_with(0, 11, RED)
+        self.assertEqual(self.ansi.nb_styles, 1)
+        self.assertEqual(self.ansi.nb_saved, 2)
+
+    def test_default(self):
+        """Test that the default style isn't applied."""
+        self.display("plain")
+        self.display("still plain")
+        self.ansi.panel.output.SetStyle.assert_not_called()
+        self.assertEqual(self.ansi.nb_saved, 1)
+
+    def test_continue(self):
+        """Test that a style is continued in the next message."""
+        self.display("\x1b[31mred")
+        self.display("still red\x1b[32mgreen\x1b[0m")
+        output = self.ansi.panel.output
+        self.assertEqual(output.SetStyle.call_args_list, [
+                call(0, 13, RED), call(13, 18, GREEN)])
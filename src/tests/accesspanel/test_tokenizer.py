@@ -0,0 +1,84 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from accesspanel.tokenizer import ANSITokenizer, DEFAULT, join, rgb
+from accesspanel.tokenizer import BOLD, UNDERLINE, REVERSE
+
+class TestTokenizer(TestCase):
+
+    """Test the ANSI tokenizer."""
+
+    def setUp(self):
+        """Create the tokenizer."""
+        self.tokenizer = ANSITokenizer()
+
+    def test_plain(self):
+        """Test a line without escape sequences."""
+        self.assertEqual(self.tokenizer.feed("You are hungry."),
+                ("You are hungry.", [(0, DEFAULT)]))
+
+    def test_colors(self):
+        """Test the basic colors and flags."""
+        text, spans = self.tokenizer.feed(
+                "\x1b[1;31mred\x1b[0;44m on blue\x1b[4;7m!\x1b[m")
+        self.assertEqual(text, "red on blue!")
+        self.assertEqual(spans, [(0, (1, None, BOLD)), (3, (None, 4, 0)),
+                (11, (None, 4, UNDERLINE | REVERSE)), (12, DEFAULT)])
+
+    def test_state(self):
+        """Test that the style is kept from one line to the next."""
+        self.tokenizer.feed("\x1b[32mgreen")
+        self.assertEqual(self.tokenizer.feed("still green"),
+                ("still green", [(0, (2, None, 0))]))
+        self.tokenizer.reset()
+        self.assertEqual(self.tokenizer.feed("default")[1], [(0, DEFAULT)])
+
+    def test_extended(self):
+        """Test the 256 colors and RGB colors."""
+        text, spans = self.tokenizer.feed(
+                "\x1b[38;5;208mo\x1b[48;2;10;20;30mr\x1b[92;39mx")
+        self.assertEqual(text, "orx")
+        self.assertEqual(spans, [(0, (208, None, 0)),
+                (1, (208, (10, 20, 30), 0)), (2, (None, (10, 20, 30), 0))])
+        self.assertEqual(rgb(208), (255, 135, 0))
+        self.assertEqual(rgb(244), (128, 128, 128))
+
+    def test_other_sequences(self):
+        """Test that other escape sequences are removed."""
+        self.assertEqual(self.tokenizer.feed("\x1b[2Ja\x1bb\x1b[K"),
+                ("ab", [(0, DEFAULT)]))
+
+    def test_join(self):
+        """Test joining lines and removing empty ones."""
+        lines = [self.tokenizer.feed(line) for line in (
+                "\x1b[31mfirst", "\x1b[0m", "second")]
+        self.assertEqual(join(lines), ("first\nsecond",
+                [(0, (1, None, 0)), (6, DEFAULT)]))
+        self.assertEqual(join(lines, keep_empty=True)[0], "first\n\nsecond")
@@ -29,6 +29,8 @@
 from unittest.mock import MagicMock
 import unittest
 
+from twisted.internet.task import Clock
+
 from client import Client
 from sharp.engine import SharpScript
 
@@ -45,6 +47,7 @@ class MockClient(unittest.TestCase):
         peer.port = 4000
         self.client.transport.getPeer = MagicMock(return_value=peer)
         self.client.factory = MagicMock()
+        self.client.clock = Clock()
 
         # Create the sharp engine
         sharp = SharpScript(self.client.factory.engine, self.client,
@@ -62,3 +65,7 @@ class MockClient(unittest.TestCase):
 
         self.client.factory.engine.settings.__getitem__ = MagicMock(
                 side_effect=get_setting)
+
+    def send(self):
+        """Send the queued commands, as the reactor would."""
+        self.client.clock.advance(0)
@@ -30,6 +30,7 @@ from unittest.mock import MagicMock
 
 from .models import MockClient
 from scripting.alias import Alias
+from scripting.alias_set import AliasSet
 
 class TestAliases(MockClient):
 
@@ -37,7 +38,9 @@ class TestAliases(MockClient):
 
     def test_without(self):
         """Test without any aliases."""
+        self.client.factory.world.alias_set = AliasSet()
         self.client.write("some command")
+        self.send()
         self.client.transport.write.assert_called_once_with(
                 b"some command\r\n")
 
@@ -45,26 +48,30 @@ class TestAliases(MockClient):
         """Test a simple alias without any replacement."""
         alias = Alias(self.client.factory.sharp_engine, "l", "look")
         self.assertEqual(alias.sharp_script, "#alias l look")
-        self.client.factory.world.aliases = [alias]
+        self.client.factory.world.alias_set = AliasSet([alias])
         self.client.write("l")
+        self.send()
         self.client.transport.write.assert_called_once_with(b"look\r\n")
 
     def test_variable(self):
         """Test a simple alias with one variable."""
         alias = Alias(self.client.factory.sharp_engine, "s*", "say $1")
         self.assertEqual(alias.sharp_script, "#alias s* {say $1}")
-        self.client.factory.world.aliases = [alias]
+        self.client.factory.world.alias_set = AliasSet([alias])
         self.client.write("l")
+        self.send()
         self.client.transport.write.assert_called_once_with(b"l\r\n")
         self.client.transport.write = MagicMock()
         self.client.write("syes!")
+        self.send()
         self.client.transport.write.assert_called_once_with(b"say yes!\r\n")
 
     def test_variable_special(self):
         """Test an alias with one variable containing special characters."""
         alias = Alias(self.client.factory.sharp_engine, "s*", "say $1")
-        self.client.factory.world.aliases = [alias]
+        self.client.factory.world.alias_set = AliasSet([alias])
         self.client.write("s\x82lite")
+        self.send()
         self.client.transport.write.assert_called_once_with(b"say \x82lite\r\n")
 
     def test_variables(self):
@@ -73,8 +80,9 @@ class TestAliases(MockClient):
                 "w*=*", "whisper $2 to $1")
         self.assertEqual(alias.sharp_script,
                 "#alias w*=* {whisper $2 to $1}")
-        self.client.factory.world.aliases = [alias]
+        self.client.factory.world.alias_set = AliasSet([alias])
         self.client.write("wman=good")
+        self.send()
         self.client.transport.write.assert_called_once_with(
                 b"whisper good to man\r\n")
 
@@ -84,9 +92,10 @@ class TestAliases(MockClient):
                 "hp", "#say {HP = 8}")
         self.assertEqual(alias.sharp_script,
                 "#alias hp {#say {HP = 8}}")
-        self.client.factory.world.aliases = [alias]
+        self.client.factory.world.alias_set = AliasSet([alias])
         self.client.handle_message = MagicMock()
         self.client.write("hp")
+        self.send()
         self.client.transport.write.assert_not_called()
         kwargs = {
                 "screen": True,
@@ -95,3 +104,29 @@ class TestAliases(MockClient):
         }
 
         self.client.handle_message.assert_called_once_with("HP = 8", **kwargs)
+
+    def test_index(self):
+        """Test that only the possible aliases are selected."""
+        sharp = self.client.factory.sharp_engine
+        regex, co, star, north, gt = [Alias(sharp, alias, "look") for alias
+                in ("^ki(ll)? (.*)$", "co *", "s*", "NORTH", "gt *")]
+        alias_set = AliasSet([regex, co, star, north, gt])
+        self.assertEqual(alias_set.find("co attack"), [regex, co, star])
+        self.assertEqual(alias_set.find("north"), [regex, star, north])
+        self.assertEqual(alias_set.find("North\n"), [regex, star, north])
+        self.assertEqual(alias_set.find("kill rat"), [regex, star])
+        self.assertEqual(alias_set.find(""), [regex, star])
+
+        # Words with special characters select every alias
+        self.assertEqual(alias_set.find("ſouth"),
+                [regex, co, star, north, gt])
+
+    def test_first_match(self):
+        """Test that the first matching alias is executed."""
+        sharp = self.client.factory.sharp_engine
+        first = Alias(sharp, "^k (.*)$", "kill $1")
+        second = Alias(sharp, "k *", "kick $1")
+        self.client.factory.world.alias_set = AliasSet([first, second])
+        self.client.write("k rat")
+        self.send()
+        self.client.transport.write.assert_called_once_with(b"kill rat\r\n")
@@ -0,0 +1,101 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest.mock import MagicMock, call
+
+from twisted.internet.task import Clock
+
+from .models import MockClient
+
+class TestLines(MockClient):
+
+    """Test the assembling and decoding of the received lines."""
+
+    def setUp(self):
+        """Replace the clock and the line handler."""
+        super().setUp()
+        self.client.clock = Clock()
+        self.client.handle_lines = MagicMock()
+
+    def test_complete(self):
+        """Test complete lines received in one packet."""
+        self.client.applicationDataReceived(b"first\nsecond\n")
+        self.client.handle_lines.assert_called_once_with("first\nsecond\n")
+        self.assertIsNone(self.client.prompt_call)
+
+    def test_split(self):
+        """Test a line split across two packets."""
+        self.client.applicationDataReceived(b"first\nYou are hu")
+        self.client.handle_lines.assert_called_once_with("first\n")
+        self.client.applicationDataReceived(b"ngry.\nsec")
+        self.client.applicationDataReceived(b"ond\n")
+        self.client.handle_lines.assert_has_calls([call("first\n"),
+                call("You are hungry.\n"), call("second\n")])
+        self.assertEqual(self.client.handle_lines.call_count, 3)
+
+    def test_go_ahead(self):
+        """Test that a prompt is displayed on GA and EOR."""
+        self.client.applicationDataReceived(b"HP: 30> ")
+        self.client.handle_lines.assert_not_called()
+        self.client.telnet_GA(None)
+        self.client.handle_lines.assert_called_once_with("HP: 30> ")
+        self.client.applicationDataReceived(b"HP: 25> ")
+        self.client.telnet_EOR(None)
+        self.client.handle_lines.assert_called_with("HP: 25> ")
+        self.assertEqual(self.client.clock.getDelayedCalls(), [])
+
+    def test_timeout(self):
+        """Test that a prompt is displayed after the timeout."""
+        self.client.applicationDataReceived(b"HP: 30> ")
+        self.client.clock.advance(0.1)
+        self.client.applicationDataReceived(b"MP: 10> ")
+        self.client.clock.advance(0.1)
+        self.client.handle_lines.assert_not_called()
+        self.client.clock.advance(0.1)
+        self.client.handle_lines.assert_called_once_with("HP: 30> MP: 10> ")
+
+    def test_encoding(self):
+        """Test characters encoded on several bytes split across packets."""
+        self.client.set_encoding("utf-8")
+        data = "Vous êtes affamé.\n".encode("utf-8")
+        split = data.index(b"\xc3") + 1
+        self.client.applicationDataReceived(data[:split])
+        self.client.telnet_GA(None)
+        self.client.applicationDataReceived(data[split:])
+        self.client.handle_lines.assert_has_calls([call("Vous "),
+                call("êtes affamé.\n")])
+
+    def test_set_encoding(self):
+        """Test that the decoder is only replaced when the encoding changes."""
+        self.client.applicationDataReceived(b"caf\xe9\n")
+        self.client.handle_lines.assert_called_once_with("café\n")
+        decoder = self.client.decoder
+        self.client.set_encoding("latin-1")
+        self.assertIs(self.client.decoder, decoder)
+        self.client.set_encoding("utf-8")
+        self.assertIsNot(self.client.decoder, decoder)
@@ -0,0 +1,87 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Tests for the macros."""
+
+from scripting.macro import Macro
+from world import MergingMethod, World
+from .models import MockClient
+
+class TestMacros(MockClient):
+
+    """Test the macros and their index."""
+
+    def setUp(self):
+        """Use a real world, to keep the index of macros."""
+        super().setUp()
+        self.world = World("test")
+        self.client.factory.world = self.world
+
+    def test_execute(self):
+        """Test that the macro matching the shortcut is executed."""
+        sharp = self.client.factory.sharp_engine
+        self.world.add_macro(Macro(341, 0, "north", sharp))
+        self.world.add_macro(Macro(341, 2, "south", sharp))
+        self.assertFalse(self.client.test_macros(342, 0))
+        self.assertTrue(self.client.test_macros(341, 2))
+        self.send()
+        self.client.transport.write.assert_called_once_with(b"south\r\n")
+
+    def test_conflicts(self):
+        """Test that conflicting macros are ignored or replaced."""
+        sharp = self.client.factory.sharp_engine
+        first = Macro(341, 0, "north", sharp)
+        self.world.add_macro(first)
+        self.world.add_macro(Macro(341, 0, "south", sharp))
+        self.assertEqual(self.world.macros, [first])
+        self.assertEqual(first.action, "north")
+
+        self.world.merging = MergingMethod.replace
+        self.world.add_macro(Macro(341, 0, "south", sharp))
+        self.assertEqual(self.world.macros, [first])
+        self.assertEqual(first.action, "south")
+
+    def test_index(self):
+        """Test that the index follows added and removed macros."""
+        sharp = self.client.factory.sharp_engine
+        north = Macro(341, 0, "north", sharp)
+        south = Macro(342, 0, "south", sharp)
+        self.world.add_macro(north)
+        self.world.add_macro(south)
+        self.assertEqual(self.world.macros.index,
+                {(341, 0): north, (342, 0): south})
+        self.world.remove_macro(north)
+        self.assertEqual(self.world.macros.index, {(342, 0): south})
+        self.assertFalse(self.client.test_macros(341, 0))
+
+        # The index is rebuilt when the list is replaced
+        self.world.macros[:] = [north]
+        self.assertEqual(self.world.macros.index, {(341, 0): north})
+        self.assertEqual(self.world.macro_keys, {341: {0: north}})
+        self.assertTrue(self.client.test_macros(341, 0))
+        self.assertFalse(self.client.test_macros(341, 2))
@@ -0,0 +1,140 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest.mock import MagicMock, call
+import zlib
+
+from twisted.conch.telnet import Telnet
+from twisted.internet.task import Clock
+try:
+    from twisted.internet.testing import StringTransport
+except ImportError:
+    from twisted.test.proto_helpers import StringTransport
+
+from .models import MockClient
+from client import COMPRESS2, COMPRESS3, COMPRESS2_START
+
+class MCCPServer(Telnet):
+
+    """A stand-in server offering MCCP2 and MCCP3."""
+
+    def connectionMade(self):
+        """Offer MCCP2 and MCCP3 to the client."""
+        self.accepted = []
+        for option in (COMPRESS2, COMPRESS3):
+            self.will(option).addCallback(
+                    lambda result, option=option: self.accepted.append(
+                    option))
+
+    def enableLocal(self, option):
+        """Accept to use the MCCP options."""
+        return option in (COMPRESS2, COMPRESS3)
+
+    def send_compressed(self, before, text, after=b""):
+        """Send text, compressed, between some uncompressed data.
+
+        If 'after' is set, the compressed stream is ended before
+        sending it.
+
+        """
+        compressor = zlib.compressobj()
+        mode = zlib.Z_FINISH if after else zlib.Z_SYNC_FLUSH
+        data = compressor.compress(text) + compressor.flush(mode)
+        self.transport.write(before + COMPRESS2_START + data + after)
+
+
+class TestMCCP(MockClient):
+
+    """Test the MCCP compression with a stand-in server."""
+
+    def setUp(self):
+        """Connect the client to the stand-in server."""
+        super().setUp()
+        self.client.clock = Clock()
+        self.client.handle_lines = MagicMock()
+        self.client.transport = StringTransport()
+        self.server = MCCPServer()
+        self.server.makeConnection(StringTransport())
+        self.pump()
+
+    def pump(self, size=None):
+        """Exchange data between the client and the server.
+
+        If 'size' is set, the data is sent to the client in packets
+        of this size.
+
+        """
+        self.client.clock.advance(0)
+        client = self.client.transport
+        server = self.server.transport
+        while client.value() or server.value():
+            data = server.value()
+            server.clear()
+            size = size or len(data)
+            for i in range(0, len(data), size):
+                self.client.dataReceived(data[i:i + size])
+
+            data = client.value()
+            client.clear()
+            self.server.dataReceived(data)
+            self.client.clock.advance(0)
+
+    def test_negotiation(self):
+        """Test that the client accepts MCCP2 and MCCP3."""
+        self.assertEqual(self.server.accepted, [COMPRESS2, COMPRESS3])
+        self.assertIsNotNone(self.client.compressor)
+
+    def test_decompression(self):
+        """Test that the compression can start in the middle of a packet."""
+        self.server.send_compressed(b"before\n", b"compressed\n")
+        self.pump()
+        self.client.handle_lines.assert_has_calls([call("before\n"),
+                call("compressed\n")])
+
+    def test_split_start(self):
+        """Test a compression start sequence split across packets."""
+        self.server.send_compressed(b"before\n", b"compressed\n")
+        self.pump(size=3)
+        self.client.handle_lines.assert_has_calls([call("before\n"),
+                call("compressed\n")])
+
+    def test_end_of_stream(self):
+        """Test that data after the end of the stream isn't decompressed."""
+        self.server.send_compressed(b"", b"compressed\n", b"after\n")
+        self.pump()
+        self.client.handle_lines.assert_has_calls([call("compressed\n"),
+                call("after\n")])
+        self.assertIsNone(self.client.decompressor)
+
+    def test_compression(self):
+        """Test that the data sent to the server is compressed (MCCP3)."""
+        self.client.write("look")
+        self.send()
+        data = self.client.transport.value()
+        self.assertNotIn(b"look", data)
+        self.assertEqual(zlib.decompressobj().decompress(data), b"look\r\n")
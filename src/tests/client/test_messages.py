@@ -0,0 +1,96 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest.mock import MagicMock, patch
+
+from twisted.internet.task import Clock
+
+from .models import MockClient
+from accesspanel.tokenizer import DEFAULT
+
+class TestMessages(MockClient):
+
+    """Test the messages sent to the panel once per frame."""
+
+    def setUp(self):
+        """Replace the clock and disable the TTS."""
+        super().setUp()
+        self.client.clock = Clock()
+        self.client.factory.engine.redirect_message = None
+        self.client.factory.engine.TTS_on = False
+        self.client.factory.panel.rich = True
+
+    @patch("client.wx.CallAfter")
+    def test_frame(self, CallAfter):
+        """Test that messages are gathered during a frame."""
+        self.client.handle_message("first")
+        self.client.handle_message("\x1b[31msecond\x1b[0m")
+        CallAfter.assert_not_called()
+        self.client.clock.advance(1 / 30)
+        self.assertEqual(CallAfter.call_count, 1)
+        kwargs = CallAfter.call_args[1]
+        self.assertEqual(kwargs["message"], "first\r\nsecond")
+        self.assertIsNone(kwargs["mark"])
+        self.assertEqual(kwargs["spans"], [(0, DEFAULT), (6, (1, None, 0)),
+                (12, DEFAULT)])
+
+        # The next message starts a new frame
+        self.client.handle_message("third")
+        self.client.clock.advance(1 / 30)
+        self.assertEqual(CallAfter.call_count, 2)
+        self.assertEqual(CallAfter.call_args[1]["message"], "third")
+
+    @patch("client.wx.CallAfter")
+    def test_mark(self, CallAfter):
+        """Test that the first mark is kept, relative to the frame."""
+        self.client.handle_message("\x1b[31mfirst\x1b[0m\r\n\r\nsecond")
+        self.client.handle_message("third\r\nfourth", mark=6)
+        self.client.handle_message("fifth", mark=0)
+        self.client.clock.advance(1 / 30)
+        self.assertEqual(CallAfter.call_args[1]["mark"], 19)
+
+    @patch("client.wx.CallAfter")
+    def test_immediate(self, CallAfter):
+        """Test that messages are sent immediately with a rate of 0."""
+        self.client.messages.rate = 0
+        self.client.handle_message("first")
+        self.client.handle_message("second")
+        self.assertEqual(CallAfter.call_count, 2)
+
+    @patch("client.wx.CallAfter")
+    @patch("client.in_worker", return_value=True)
+    def test_worker(self, in_worker, CallAfter):
+        """Test that messages of a worker go through the executor's clock."""
+        clock = self.client.factory.world.executor.clock
+        self.client.handle_message("first")
+        self.client.clock.advance(1 / 30)
+        CallAfter.assert_not_called()
+        clock.callFromThread.assert_called_once()
+        function, message = clock.callFromThread.call_args[0]
+        self.assertEqual(function, self.client.handle_message)
+        self.assertEqual(message, "first")
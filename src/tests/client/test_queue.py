@@ -0,0 +1,101 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Tests for the queue of commands."""
+
+from unittest.mock import MagicMock
+
+from .models import MockClient
+
+class TestCommandQueue(MockClient):
+
+    """Test the queue of commands sent to the server."""
+
+    def test_coalescing(self):
+        """Test that commands written in one iteration are sent at once."""
+        self.client.write("north")
+        self.client.write(["look", "score"])
+        self.assertEqual(self.client.queue.depth, 3)
+        self.client.transport.write.assert_not_called()
+        self.send()
+        self.client.transport.write.assert_called_once_with(
+                b"north\r\nlook\r\nscore\r\n")
+        self.assertEqual(self.client.queue.depth, 0)
+        self.assertEqual(self.client.clock.getDelayedCalls(), [])
+
+    def test_rate(self):
+        """Test the rate limit (token bucket)."""
+        queue = self.client.queue
+        queue.configure(rate=2, burst=3)
+        self.client.write(["kill rat"] * 6)
+        self.send()
+        self.client.transport.write.assert_called_once_with(
+                b"kill rat\r\n" * 3)
+        self.assertEqual(queue.depth, 3)
+
+        # Two commands per second
+        self.client.transport.write = MagicMock()
+        self.client.clock.advance(0.5)
+        self.client.transport.write.assert_called_once_with(b"kill rat\r\n")
+        self.client.clock.advance(0.5)
+        self.client.clock.advance(0.5)
+        self.assertEqual(self.client.transport.write.call_count, 3)
+        self.assertEqual(queue.depth, 0)
+        self.assertEqual(self.client.clock.getDelayedCalls(), [])
+
+        # The bucket is filled again, up to the burst size
+        self.client.clock.advance(10)
+        self.client.transport.write = MagicMock()
+        self.client.write(["look"] * 4)
+        self.send()
+        self.client.transport.write.assert_called_once_with(
+                b"look\r\n" * 3)
+
+    def test_flush(self):
+        """Test the '#flush' function."""
+        self.client.queue.configure(rate=1, burst=1)
+        self.client.write(["north"] * 5)
+        self.send()
+        self.client.transport.write = MagicMock()
+        self.client.factory.sharp_engine.execute("#flush")
+        self.client.transport.write.assert_called_once_with(
+                b"north\r\n" * 4)
+        self.assertEqual(self.client.clock.getDelayedCalls(), [])
+
+    def test_clear(self):
+        """Test the '#clearqueue' function."""
+        self.client.handle_message = MagicMock()
+        self.client.queue.configure(rate=1, burst=1)
+        self.client.write(["north"] * 5)
+        self.send()
+        self.client.transport.write = MagicMock()
+        self.client.factory.sharp_engine.execute("#clearqueue")
+        self.assertEqual(self.client.queue.depth, 0)
+        self.client.handle_message.assert_called_once()
+        self.client.clock.advance(10)
+        self.client.transport.write.assert_not_called()
@@ -26,9 +26,10 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-from unittest.mock import MagicMock, call
+from unittest.mock import MagicMock
 
 from .models import MockClient
+from client import CommandSplitter
 from scripting.alias import Alias
 
 class TestCommandStacking(MockClient):
@@ -38,6 +39,7 @@ class TestCommandStacking(MockClient):
     def test_without(self):
         """Test without any command stacking."""
         self.client.write("say 1;say 2")
+        self.send()
         self.client.transport.write.assert_called_once_with(
                 b"say 1;say 2\r\n")
 
@@ -54,8 +56,9 @@ class TestCommandStacking(MockClient):
         self.client.factory.engine.settings.__getitem__ = MagicMock(
                 side_effect=get_setting)
         self.client.write("say 1;say 2")
-        calls = [call(b"say 1\r\n"), call(b"say 2\r\n")]
-        self.client.transport.write.assert_has_calls(calls)
+        self.send()
+        self.client.transport.write.assert_called_once_with(
+                b"say 1\r\nsay 2\r\n")
 
     def test_special(self):
         """Test command stacking with a special character."""
@@ -70,5 +73,46 @@ class TestCommandStacking(MockClient):
         self.client.factory.engine.settings.__getitem__ = MagicMock(
                 side_effect=get_setting)
         self.client.write("say 1\x82say 2")
-        calls = [call(b"say 1\r\n"), call(b"say 2\r\n")]
-        self.client.transport.write.assert_has_calls(calls)
+        self.send()
+        self.client.transport.write.assert_called_once_with(
+                b"say 1\r\nsay 2\r\n")
+
+    def test_escape(self):
+        """Test that doubled delimiters are sent as one delimiter."""
+        splitter = CommandSplitter(";")
+        self.assertEqual(splitter.split("say a;;b;look"),
+                ["say a;b", "look"])
+        self.assertEqual(splitter.split("say a;;;b"), ["say a;;b"])
+        self.assertEqual(splitter.split("say a;;"), ["say a;"])
+        self.assertEqual(splitter.split(";look;"), ["", "look", ""])
+        self.assertEqual(splitter.split("look"), ["look"])
+
+    def test_long_delimiter(self):
+        """Test command stacking with a delimiter of several characters."""
+        splitter = CommandSplitter("||")
+        self.assertEqual(splitter.split("say a||||b||look"),
+                ["say a||b", "look"])
+        self.assertEqual(CommandSplitter("").split("a;b"), ["a;b"])
+
+    def test_list(self):
+        """Test writing a list of commands at once."""
+        def get_setting(address):
+            """Private function to return a set of default settings."""
+            default = {
+                    "options.input.command_stacking": ";",
+                    "options.general.encoding": "utf-8",
+            }
+            return default[address]
+
+        self.client.factory.engine.settings.__getitem__ = MagicMock(
+                side_effect=get_setting)
+        self.client.write(["say 1;say 2", "say 3;;4"])
+        self.send()
+        self.client.transport.write.assert_called_once_with(
+                b"say 1\r\nsay 2\r\nsay 3;4\r\n")
+
+        # The splitter is kept while the delimiter doesn't change
+        splitter = self.client.splitter
+        self.client.write("look")
+        self.send()
+        self.assertIs(self.client.splitter, splitter)
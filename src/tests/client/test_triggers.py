@@ -0,0 +1,150 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest.mock import MagicMock
+
+from .models import MockClient
+from accesspanel.tokenizer import DEFAULT
+from scripting.trigger import Trigger
+from scripting.trigger_set import TriggerSet
+
+class TestTriggers(MockClient):
+
+    """Test triggers and their index."""
+
+    def create_triggers(self, *reactions):
+        """Create triggers with the given reactions and index them."""
+        sharp = self.client.factory.sharp_engine
+        triggers = [Trigger(sharp, reaction, "say ok") for reaction in
+                reactions]
+        self.client.factory.world.trigger_set = TriggerSet(triggers)
+        return triggers
+
+    def test_find(self):
+        """Test that only the possible triggers are selected."""
+        hungry, thirsty, coins, regex, star = self.create_triggers(
+                "You are hungry.", "You are thirsty.",
+                "You receive * coins.", "^.*dies", "* tells you *")
+        trigger_set = self.client.factory.world.trigger_set
+        self.assertEqual(trigger_set.find("you are hungry."),
+                [hungry, star])
+        self.assertEqual(trigger_set.find("You receive 8 coins."),
+                [coins, star])
+        self.assertEqual(trigger_set.find("You are"), [star])
+        self.assertEqual(trigger_set.find("A rat dies."), [regex, star])
+        self.assertEqual(trigger_set.find(""), [star])
+
+        # Lines beginning with special characters select every trigger
+        self.assertEqual(trigger_set.find("ſou are hungry."),
+                [hungry, thirsty, coins, star])
+        self.assertEqual(trigger_set.find("You are ſhocked."),
+                [hungry, thirsty, coins, star])
+
+    def test_prefilter(self):
+        """Test the literal prefilter of regular expressions."""
+        hit, tell, maybe, any = self.create_triggers(
+                r"^You (hit|miss) (.*)\.$", r"^(\w+) tells you",
+                r"^(?:yes|no)$", r"^\w+$")
+        self.assertEqual(hit.literal, "You ")
+        self.assertEqual(tell.literal, " tells you")
+        self.assertEqual(maybe.literal, "")
+        trigger_set = self.client.factory.world.trigger_set
+        self.assertEqual(trigger_set.find("You hit the rat."),
+                [hit, maybe, any])
+        self.assertEqual(trigger_set.find("Kredh tells you hi"),
+                [tell, maybe, any])
+        self.assertEqual(trigger_set.find("yes"), [maybe, any])
+
+        # Without prefilter, every regular expression is selected
+        trigger_set = TriggerSet(trigger_set.triggers, prefilter=False)
+        self.assertEqual(trigger_set.find("yes"), [hit, tell, maybe, any])
+
+    def test_order(self):
+        """Test that matching triggers are fired in definition order."""
+        first, second, third = self.create_triggers(
+                "^You", "You hit *", "* hit the rat.")
+        for trigger in (first, second, third):
+            trigger.execute = MagicMock()
+
+        fired = []
+        first.execute.side_effect = lambda match: fired.append(first)
+        second.execute.side_effect = lambda match: fired.append(second)
+        third.execute.side_effect = lambda match: fired.append(third)
+        self.client.handle_message = MagicMock()
+        self.client.handle_lines("You hit the rat.")
+        self.assertEqual(fired, [first, second, third])
+
+    def test_mute(self):
+        """Test that muted triggers hide the line."""
+        trigger, = self.create_triggers("You are hungry.")
+        trigger.mute = True
+        trigger.execute = MagicMock()
+        self.client.handle_message = MagicMock()
+        self.client.handle_lines("You are hungry.\nYou are thirsty.")
+        self.client.handle_message.assert_called_once_with(
+                "You are thirsty.", mark=None, spans=[(0, DEFAULT)])
+        trigger.execute.assert_called_once()
+        self.assertEqual(trigger.execute.call_args[0][0].group(),
+                "You are hungry.")
+
+    def test_substitution(self):
+        """Test that triggers with substitution replace the line."""
+        trigger, = self.create_triggers("* tells you *")
+        trigger.substitution = "$1: $2"
+        trigger.execute = MagicMock()
+        self.client.handle_message = MagicMock()
+        self.client.handle_lines("Kredh tells you hello")
+        self.client.handle_message.assert_called_once_with(
+                "Kredh: hello", mark=None, spans=[(0, DEFAULT)])
+
+    def test_substitution_ansi(self):
+        """Test that the substitution's style doesn't leak."""
+        trigger, = self.create_triggers("* tells you *")
+        trigger.substitution = "\x1b[32m$1: $2"
+        trigger.execute = MagicMock()
+        self.client.handle_message = MagicMock()
+        self.client.handle_lines("Kredh tells you hello")
+        self.client.handle_message.assert_called_once_with(
+                "Kredh: hello", mark=None, spans=[(0, (2, None, 0))])
+        self.client.handle_lines("You are hungry.")
+        self.client.handle_message.assert_called_with(
+                "You are hungry.", mark=None, spans=[(0, DEFAULT)])
+
+    def test_ansi(self):
+        """Test that triggers are tested against the text without ANSI."""
+        trigger, = self.create_triggers("^You are hungry.$")
+        trigger.execute = MagicMock()
+        self.client.handle_message = MagicMock()
+        self.client.handle_lines("\x1b[1;31mYou are \x1b[33mhungry.\x1b[0m")
+        self.client.handle_message.assert_called_once_with(
+                "You are hungry.", mark=None,
+                spans=[(0, (1, None, 1)), (8, (3, None, 1)),
+                (15, DEFAULT)])
+        trigger.execute.assert_called_once()
+        self.assertEqual(trigger.execute.call_args[0][0].group(),
+                "You are hungry.")
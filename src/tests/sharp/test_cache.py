@@ -0,0 +1,80 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from unittest.mock import MagicMock
+
+from sharp.engine import SharpScript
+
+class TestCache(unittest.TestCase):
+
+    """Unittest for the cache of compiled SharpScript code."""
+
+    def setUp(self):
+        """Create the SharpScript instance and mock the 'send' function."""
+        self.engine = SharpScript(None, None, None)
+        self.send = MagicMock()
+        self.engine.globals["send"] = self.send
+
+    def test_hits(self):
+        """Test that the same code is compiled only once."""
+        self.engine.execute("#send north", variables=True)
+        self.engine.execute("#send north", variables=True)
+        self.engine.execute("#send south", variables=True)
+        self.assertEqual(self.engine.misses, 2)
+        self.assertEqual(self.engine.hits, 1)
+        self.assertEqual(self.send.call_count, 3)
+
+    def test_variables(self):
+        """Test that variables are replaced at each execution."""
+        code = "#send {You have ${HP}HP and \\$$1.}"
+        self.engine.locals["HP"] = 20
+        self.engine.locals["args"] = {"1": 8}
+        self.engine.execute(code, variables=True)
+        self.engine.locals["HP"] = 15
+        self.engine.execute(code, variables=True)
+        self.assertEqual(self.engine.hits, 1)
+        self.assertEqual([call[0][0] for call in self.send.call_args_list],
+                ["You have 20HP and $8.", "You have 15HP and $8."])
+
+    def test_no_variables(self):
+        """Test that variables aren't replaced if not asked."""
+        self.engine.locals["HP"] = 20
+        self.engine.execute("#send {$HP}")
+        self.send.assert_called_once_with("$HP")
+
+    def test_lru(self):
+        """Test that the least recently used code is removed."""
+        self.engine.cache_size = 2
+        self.engine.execute("#send 1")
+        self.engine.execute("#send 2")
+        self.engine.execute("#send 1")
+        self.engine.execute("#send 3")
+        self.assertEqual(len(self.engine.cache), 2)
+        self.assertIn(("#send 1", False), self.engine.cache)
+        self.assertNotIn(("#send 2", False), self.engine.cache)
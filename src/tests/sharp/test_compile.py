@@ -0,0 +1,77 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from textwrap import dedent
+import unittest
+from unittest.mock import MagicMock
+
+from sharp.engine import SharpScript
+
+class TestCompile(unittest.TestCase):
+
+    """Unittest for the compilation of SharpScript to Python code."""
+
+    def setUp(self):
+        """Create the SharpScript instance and mock some functions."""
+        self.engine = SharpScript(None, None, None)
+        self.send = MagicMock()
+        self.say = MagicMock()
+        self.engine.globals["send"] = self.send
+        self.engine.globals["say"] = self.say
+
+    def test_script(self):
+        """Test that a script is compiled into one code object."""
+        code = self.engine.compile("#send north\n#send {south;;east}")
+        self.assertEqual(self.engine.misses, 1)
+        exec(code, self.engine.globals, self.engine.locals)
+        self.assertEqual([call[0][0] for call in self.send.call_args_list],
+                ["north", "south;east"])
+
+    def test_semicolons(self):
+        """Test that semicolons in arguments become line breaks."""
+        self.engine.execute("#send north;south")
+        self.send.assert_called_once_with("north\nsouth")
+
+    def test_flags(self):
+        """Test that flags become keyword arguments."""
+        self.engine.execute("#say {A message} -braille +speech")
+        self.say.assert_called_once_with("A message", braille=False,
+                speech=True)
+
+    def test_python(self):
+        """Test Python code at the top of a script and in arguments."""
+        self.engine.execute(dedent("""
+            {+
+            hp = 3 * 5
+            }
+            #send {+
+                print(hp)
+            }
+        """.strip("\n")), variables=True)
+        self.assertEqual(self.engine.locals["hp"], 15)
+        self.send.assert_called_once_with("{+\n    print(hp)\n}")
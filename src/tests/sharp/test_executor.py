@@ -0,0 +1,209 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Tests for the asynchronous execution of trigger actions."""
+
+from threading import Event
+import unittest
+from unittest.mock import MagicMock
+
+from twisted.internet.task import Clock
+
+from scripting.executor import ScriptExecutor, in_worker
+from scripting.timer import TimerWheel
+from sharp.engine import SharpScript
+from world import World
+
+class FakeReactor:
+
+    """A fake reactor, keeping the calls from threads."""
+
+    def __init__(self):
+        self.calls = []
+
+    def callFromThread(self, function, *args, **kwargs):
+        self.calls.append((function, args, kwargs))
+
+    def run(self):
+        """Make the calls."""
+        for function, args, kwargs in self.calls:
+            function(*args, **kwargs)
+        self.calls[:] = []
+
+
+class TestExecutor(unittest.TestCase):
+
+    """Unittest for the script executor and '+async' triggers."""
+
+    def setUp(self):
+        """Create the world and engine, mock the 'send' function."""
+        self.reactor = FakeReactor()
+        self.world = World("test")
+        self.world.executor = ScriptExecutor("test", clock=self.reactor)
+        self.world.engine = MagicMock()
+        self.engine = SharpScript(self.world.engine, None, self.world)
+        self.world.sharp_engine = self.engine
+        self.world.add_trigger = self.world.triggers.append
+        self.sent = []
+        self.engine.globals["send"] = lambda text: self.sent.append(
+                (text, in_worker()))
+
+    def tearDown(self):
+        """Stop the worker thread."""
+        self.world.executor.stop()
+
+    def create_trigger(self, reaction, action):
+        """Create and return an asynchronous trigger."""
+        self.engine.execute(self.engine.format(((
+                "#trigger", reaction, action, "+async"), )))
+        return self.world.triggers[-1]
+
+    def test_flag(self):
+        """Test that the '+async' flag is read and written."""
+        trigger = self.create_trigger("* arrives.", "#send {kill $1}")
+        self.assertTrue(trigger.asynchronous)
+        self.assertIn("+async", trigger.sharp_script)
+        self.assertTrue(trigger.copied.asynchronous)
+
+    def test_order(self):
+        """Test that actions are executed in order in the worker."""
+        trigger = self.create_trigger("* arrives.", "#send {kill $1}")
+        for name in ("a rat", "a dog", "a cat"):
+            trigger.submit(trigger.re_reaction.search(name + " arrives."))
+
+        self.world.executor.join()
+        self.assertEqual(self.sent, [("kill a rat", True),
+                ("kill a dog", True), ("kill a cat", True)])
+        self.assertNotIn("args", self.engine.locals)
+        executor = self.world.executor
+        self.assertEqual(executor.executed, 3)
+        self.assertEqual(executor.depth, 0)
+        self.assertGreaterEqual(executor.max_latency,
+                executor.average_latency)
+
+    def test_variables(self):
+        """Test that variables set by the action are copied back."""
+        trigger = self.create_trigger("You have * HP.",
+                "{+\nhp = int(args['1'])\n}")
+        trigger.submit(trigger.re_reaction.search("You have 20 HP."))
+        self.world.executor.join()
+        self.assertNotIn("hp", self.engine.locals)
+        self.reactor.run()
+        self.assertEqual(self.engine.locals["hp"], 20)
+
+    def test_full(self):
+        """Test that actions are dropped when the queue is full."""
+        executor = self.world.executor = ScriptExecutor("test",
+                clock=self.reactor, size=2)
+        started = Event()
+        release = Event()
+
+        def block(text):
+            started.set()
+            release.wait(5)
+
+        self.engine.globals["send"] = block
+        trigger = self.create_trigger("*", "#send $1")
+        match = trigger.re_reaction.search("line")
+        self.assertTrue(trigger.submit(match))
+        started.wait(5)
+        self.assertTrue(trigger.submit(match))
+        self.assertTrue(trigger.submit(match))
+        self.assertFalse(trigger.submit(match))
+
+        self.assertEqual(executor.depth, 2)
+        self.assertEqual(executor.dropped, 1)
+        release.set()
+        executor.join()
+        self.assertEqual(executor.executed, 3)
+
+    def test_stop(self):
+        """Test that stopping drops the queued actions without blocking."""
+        executor = self.world.executor = ScriptExecutor("test",
+                clock=self.reactor, size=2)
+        started = Event()
+        release = Event()
+
+        def block(text):
+            started.set()
+            release.wait(5)
+
+        self.engine.globals["send"] = block
+        trigger = self.create_trigger("*", "#send $1")
+        match = trigger.re_reaction.search("line")
+        trigger.submit(match)
+        started.wait(5)
+        trigger.submit(match)
+        trigger.submit(match)
+        worker = executor.worker
+        executor.stop()
+        self.assertIsNone(executor.worker)
+        self.assertEqual(executor.dropped, 2)
+        release.set()
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(executor.executed, 1)
+
+    def test_error(self):
+        """Test that a failing action doesn't stop the worker."""
+        trigger = self.create_trigger("*", "{+\n1 / 0\n}")
+        match = trigger.re_reaction.search("line")
+        trigger.submit(match)
+        trigger.action = "#send ok"
+        trigger.submit(match)
+        self.world.executor.join()
+        self.assertEqual(self.sent, [("ok", True)])
+
+    def test_functions(self):
+        """Test that functions are called in the reactor thread."""
+        self.world.timers = TimerWheel(Clock())
+        trigger = self.create_trigger("* arrives.",
+                "#delay 5 {#send {kill $1}}\n#trigger {$1 leaves.} {}")
+        count = len(self.world.triggers)
+        trigger.submit(trigger.re_reaction.search("a rat arrives."))
+        self.world.executor.join()
+        self.assertEqual(len(self.world.timers), 0)
+        self.assertEqual(len(self.world.triggers), count)
+
+        # The calls are made by the reactor, in order
+        self.reactor.run()
+        self.assertEqual(len(self.world.timers), 1)
+        self.assertEqual(self.world.triggers[-1].reaction, "a rat leaves.")
+
+    def test_var(self):
+        """Test that '#var' sets the action's variables."""
+        trigger = self.create_trigger("You have * HP.",
+                "#var hp $1 int\n#send {hp=$hp}")
+        trigger.submit(trigger.re_reaction.search("You have 20 HP."))
+        self.world.executor.join()
+        self.assertEqual(self.sent, [("hp=20", True)])
+        self.assertNotIn("hp", self.engine.variables.types)
+
+        # The variable is declared in the reactor thread
+        self.reactor.run()
+        self.assertEqual(self.engine.variables.types["hp"], "int")
+        self.assertEqual(self.engine.locals["hp"], 20)
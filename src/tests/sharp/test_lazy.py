@@ -0,0 +1,102 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Tests for the lazy creation of SharpScript functions."""
+
+import unittest
+from unittest.mock import MagicMock
+
+from sharp import FUNCTIONS
+from sharp.engine import SharpScript
+
+class TestLazy(unittest.TestCase):
+
+    """Unittest for the functions created when first used."""
+
+    def setUp(self):
+        """Create the SharpScript instance with a mock client."""
+        self.client = MagicMock()
+        self.engine = SharpScript(None, self.client, None)
+
+    def test_empty(self):
+        """Test that a new engine has no function."""
+        self.assertEqual(self.engine.functions, {})
+        self.assertNotIn("say", self.engine.globals)
+
+    def test_execute(self):
+        """Test that the functions used by a script are created."""
+        self.engine.execute("#say {Hello}")
+        self.assertEqual(list(self.engine.functions), ["say"])
+        self.client.handle_message.assert_called_once_with("Hello",
+                screen=True, speech=True, braille=True)
+
+    def test_python(self):
+        """Test that functions used in Python code are created."""
+        self.engine.execute("{+\ndef greet():\n    say('Hello')\n\ngreet()\n}")
+        self.assertEqual(list(self.engine.functions), ["say"])
+        self.client.handle_message.assert_called_once()
+
+    def test_attributes(self):
+        """Test that attributes named like functions don't create them."""
+        self.engine.globals["obj"] = MagicMock()
+        self.engine.execute("{+\nobj.flush()\nobj.send\n}")
+        self.assertEqual(self.engine.functions, {})
+        self.assertNotIn("flush", self.engine.globals)
+
+    def test_module_names(self):
+        """Test that Python code can use the engine module's names."""
+        self.engine.execute("{+\nwords = re.findall(r'\\w+', 'a rat')\n}")
+        self.assertEqual(self.engine.locals["words"], ["a", "rat"])
+
+    def test_code(self):
+        """Test that functions used by a code object are created."""
+        code = self.engine.compile("#say {Hello}", cache=False)
+        engine = SharpScript(None, self.client, None)
+        engine.execute(code)
+        self.assertEqual(list(engine.functions), ["say"])
+
+    def test_override(self):
+        """Test that a name already in the namespace is kept."""
+        say = MagicMock()
+        self.engine.globals["say"] = say
+        self.engine.execute("#say {Hello}")
+        self.assertEqual(self.engine.functions, {})
+        say.assert_called_once_with("Hello")
+
+    def test_bind_client(self):
+        """Test that a client bound later is given to the functions."""
+        self.engine.execute("#say {Hello}")
+        client = MagicMock()
+        self.engine.bind_client(client)
+        self.engine.execute("#say {Bye}")
+        client.handle_message.assert_called_once_with("Bye",
+                screen=True, speech=True, braille=True)
+
+    def test_load_functions(self):
+        """Test that all the functions can be loaded."""
+        functions = self.engine.load_functions()
+        self.assertEqual(sorted(f.name for f in functions), sorted(FUNCTIONS))
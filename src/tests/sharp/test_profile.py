@@ -0,0 +1,130 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Tests for the SharpScript profiler."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from sharp.engine import SharpScript
+
+class Origin:
+
+    """An object executing SharpScript, like a trigger."""
+
+    def __init__(self, reaction):
+        self.reaction = reaction
+
+
+class Trigger(Origin):
+
+    pass
+
+
+class TestProfile(unittest.TestCase):
+
+    """Unittest for the profiler and the '#profile' function."""
+
+    def setUp(self):
+        """Create the SharpScript instance and mock the 'send' function."""
+        self.client = MagicMock()
+        self.engine = SharpScript(None, self.client, None)
+        self.send = MagicMock()
+        self.engine.globals["send"] = self.send
+
+    def test_off(self):
+        """Test that nothing is recorded when profiling is off."""
+        self.engine.execute("#send north")
+        self.assertIsNone(self.engine.profiler)
+        self.engine.execute("#profile on")
+        self.engine.execute("#profile off")
+        self.engine.execute("#send north")
+        self.assertEqual(list(self.engine.profiler.statements),
+                ["#profile off"])
+
+    def test_statements(self):
+        """Test that each statement is recorded."""
+        self.engine.execute("#profile on")
+        trigger = Trigger("You are hungry.")
+        for i in range(3):
+            self.engine.execute("#send eat\n#send {drink water}",
+                    variables=True, origin=trigger)
+        self.engine.execute("{+\nx = 1\n}\n#send north")
+        profiler = self.engine.profiler
+        self.assertEqual(self.send.call_count, 7)
+        self.assertEqual(profiler.statements["#send eat"][0], 3)
+        self.assertEqual(profiler.statements["#send {drink water}"][0], 3)
+        self.assertEqual(profiler.statements["x = 1"][0], 1)
+        self.assertEqual(profiler.origins["trigger You are hungry."][0], 3)
+        self.assertEqual(profiler.origins["script"][0], 1)
+        self.assertEqual(self.engine.locals["x"], 1)
+        calls, total, longest = profiler.statements["#send eat"]
+        self.assertGreaterEqual(total, longest)
+
+    def test_exception(self):
+        """Test that a failing statement is recorded."""
+        self.engine.execute("#profile on")
+        with self.assertRaises(ZeroDivisionError):
+            self.engine.execute("{+\n1 / 0\n}")
+        self.assertEqual(self.engine.profiler.statements["1 / 0"][0], 1)
+
+    def test_report(self):
+        """Test that the report is displayed and can be dumped."""
+        self.engine.execute("#profile on")
+        self.engine.execute("#send north")
+        self.engine.execute("#profile report")
+        report = self.client.handle_message.call_args[0][0]
+        self.assertIn("#send north", report)
+        self.assertIn("Origins", report)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "profile.json")
+            self.engine.execute("#profile dump {}".format(filename))
+            with open(filename, encoding="utf-8") as file:
+                data = json.load(file)
+
+        sources = [stat["name"] for stat in data["statements"]]
+        self.assertIn("#send north", sources)
+        self.assertEqual(data["origins"][0]["name"], "script")
+        self.engine.execute("#profile reset")
+        self.assertEqual(list(self.engine.profiler.statements),
+                ["#profile reset"])
+
+    def test_compiled(self):
+        """Test that the compiled statements are limited."""
+        self.engine.cache_size = 3
+        self.engine.execute("#profile on")
+        for i in range(5):
+            self.engine.execute("#send {}".format(i))
+
+        compiled = self.engine.profiler.compiled
+        self.assertEqual([key[0] for key in compiled],
+                ["#send 2", "#send 3", "#send 4"])
+        self.engine.execute("#profile reset")
+        self.assertEqual(len(compiled), 0)
@@ -0,0 +1,113 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from sharp.engine import SharpScript
+from sharp.snapshot import compile_script, EXTENSION
+
+class TestSnapshot(unittest.TestCase):
+
+    """Unittest for the snapshots of compiled scripts."""
+
+    def setUp(self):
+        """Create the SharpScript instance and a temporary directory."""
+        self.engine = SharpScript(None, None, None)
+        self.send = MagicMock()
+        self.engine.globals["send"] = self.send
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.path = os.path.join(self.directory, "config.set")
+
+    def write(self, content, encoding="utf-8", mtime=None):
+        """Write the script, setting its modification time."""
+        with open(self.path, "wb") as file:
+            file.write(content.encode(encoding))
+        if mtime is not None:
+            os.utime(self.path, ns=(mtime, mtime))
+
+    def run_script(self):
+        """Compile and execute the script, return the encoding."""
+        code, encoding = compile_script(self.engine, self.path)
+        self.engine.execute(code)
+        return encoding
+
+    def test_snapshot(self):
+        """Test that the snapshot is used if the script hasn't changed."""
+        self.write("#send north\r\n#send {été}\r\n", mtime=10 ** 18)
+        self.assertEqual(self.run_script(), "utf-8")
+        self.assertTrue(os.path.exists(self.path + EXTENSION))
+        self.assertEqual(self.engine.misses, 1)
+        self.assertEqual(self.run_script(), "utf-8")
+        self.assertEqual(self.engine.misses, 1)
+        self.assertEqual([call[0][0] for call in self.send.call_args_list],
+                ["north", "été", "north", "été"])
+
+        # The compiled script isn't kept in the engine's cache
+        self.assertEqual(len(self.engine.cache), 0)
+
+    def test_invalidation(self):
+        """Test that the snapshot is replaced if the script changes."""
+        self.write("#send north", mtime=10 ** 18)
+        self.run_script()
+
+        # Same modification time, but a different content
+        self.write("#send south", mtime=10 ** 18)
+        self.run_script()
+        self.assertEqual(self.engine.misses, 2)
+
+        # Same content, but a different modification time
+        self.write("#send south", mtime=2 * 10 ** 18)
+        self.run_script()
+        self.assertEqual(self.engine.misses, 3)
+        self.run_script()
+        self.assertEqual(self.engine.misses, 3)
+        self.assertEqual(self.send.call_args[0][0], "south")
+
+    def test_latin1(self):
+        """Test a script that isn't encoded in UTF-8."""
+        self.write("#send {été}", encoding="latin-1")
+        self.assertEqual(self.run_script(), "latin-1")
+        self.assertEqual(self.run_script(), "latin-1")
+        self.assertEqual(self.engine.misses, 1)
+        self.assertEqual(self.send.call_args[0][0], "été")
+
+    def test_corrupted(self):
+        """Test that a corrupted snapshot is ignored."""
+        self.write("#send north")
+        with open(self.path + EXTENSION, "wb") as file:
+            file.write(b"corrupted")
+
+        self.run_script()
+        self.send.assert_called_once_with("north")
+        self.run_script()
+        self.assertEqual(self.engine.misses, 1)
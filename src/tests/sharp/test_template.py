@@ -0,0 +1,101 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Tests for the templates (texts with variables)."""
+
+import unittest
+from unittest.mock import MagicMock
+
+from scripting.template import Template
+from scripting.trigger import Trigger
+from sharp.engine import SharpScript
+
+class TestTemplate(unittest.TestCase):
+
+    """Unittest for the templates."""
+
+    def setUp(self):
+        """Create the SharpScript instance."""
+        self.engine = SharpScript(MagicMock(), None, None)
+        self.engine.locals["hp"] = 20
+        self.engine.locals["args"] = {"1": "rat"}
+
+    def test_parts(self):
+        """Test that the text is parsed in literal and variable parts."""
+        template = Template("You have ${hp}HP, kill $1.")
+        self.assertEqual(template.parts, ["You have ", None, "HP, kill ",
+                None, "."])
+        self.assertEqual(template.variables, [(1, "hp", False),
+                (3, "1", True)])
+
+    def test_render(self):
+        """Test the rendering of templates."""
+        variables = self.engine.locals
+        self.assertEqual(Template("kill $1").render(variables), "kill rat")
+        self.assertEqual(Template("${hp}HP").render(variables), "20HP")
+        self.assertEqual(Template("$hp/$max $2").render(variables), "20/ ")
+        self.assertEqual(Template("no variable").render(variables),
+                "no variable")
+        self.assertEqual(Template("").render(variables), "")
+
+    def test_escape(self):
+        """Test that escaped dollar signs are kept."""
+        template = Template("You can earn \\$$hp, not \\$hp.")
+        self.assertEqual(template.render(self.engine.locals),
+                "You can earn $20, not $hp.")
+
+    def test_cache(self):
+        """Test that the engine parses the same text once."""
+        first = self.engine.get_template("kill $1")
+        self.assertIs(self.engine.get_template("kill $1"), first)
+        self.assertEqual(self.engine.replace_variables("kill $1"),
+                "kill rat")
+        self.engine.cache_size = 1
+        self.engine.get_template("flee")
+        self.assertEqual(list(self.engine.templates), ["flee"])
+
+    def test_trigger(self):
+        """Test that a trigger keeps the template of its substitution."""
+        self.engine.engine.level = None
+        trigger = Trigger(self.engine, "* arrives.", "", "$1 is here")
+        self.assertEqual(trigger.replace("A rat arrives."), "A rat is here")
+        template = trigger.template
+        self.assertEqual(trigger.replace("A rat arrives."), "A rat is here")
+        self.assertIs(trigger.template, template)
+        trigger.substitution = "$1 arrived"
+        self.assertEqual(trigger.replace("A rat arrives."), "A rat arrived")
+
+    def test_log(self):
+        """Test that lookups are logged only if asked."""
+        self.engine.logger = MagicMock()
+        self.engine.replace_variables("kill $1")
+        self.engine.logger.debug.assert_not_called()
+        self.engine.log_variables = True
+        self.engine.replace_variables("kill $1")
+        self.engine.logger.debug.assert_called_once_with(
+                "#{} requests variable '1', value='rat'".format(
+                self.engine.id))
@@ -0,0 +1,160 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Tests for the SharpScript timers (#delay, #every and #cancel)."""
+
+import unittest
+from unittest.mock import MagicMock
+
+from twisted.internet.task import Clock
+
+from scripting.timer import TimerWheel
+from sharp.engine import SharpScript
+from world import World
+
+class TestTimers(unittest.TestCase):
+
+    """Unittest for the timers and the timer wheel."""
+
+    def setUp(self):
+        """Create the world, with a timer wheel using a fake clock."""
+        self.clock = Clock()
+        self.world = World("test")
+        self.world.timers = TimerWheel(self.clock)
+        self.engine = SharpScript(None, None, self.world)
+        self.send = MagicMock()
+        self.engine.globals["send"] = self.send
+
+    def advance(self, seconds):
+        """Advance the clock, one tick at a time.
+
+        The clock is moved slightly after each tick, to avoid
+        rounding errors when adding resolutions.
+
+        """
+        resolution = TimerWheel.resolution
+        ticks = int(round((self.clock.seconds() + seconds) / resolution))
+        while int(round(self.clock.seconds() / resolution)) < ticks:
+            tick = int(round(self.clock.seconds() / resolution)) + 1
+            self.clock.advance(tick * resolution + 1e-6 -
+                    self.clock.seconds())
+
+    def sent(self):
+        """Return the sent commands."""
+        return [call[0][0] for call in self.send.call_args_list]
+
+    def test_delay(self):
+        """Test that an action is executed once after a delay."""
+        self.engine.execute("#delay 1.5 {#send north}")
+        self.advance(1.4)
+        self.send.assert_not_called()
+        self.advance(0.1)
+        self.assertEqual(self.sent(), ["north"])
+        self.advance(5)
+        self.assertEqual(self.sent(), ["north"])
+        self.assertEqual(len(self.world.timers), 0)
+        self.assertIsNone(self.world.timers.loop)
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+    def test_every(self):
+        """Test that an action is executed at regular intervals."""
+        self.engine.execute("#every 2 {#send score} score")
+        self.advance(7)
+        self.assertEqual(self.sent(), ["score", "score", "score"])
+        self.engine.execute("#cancel score")
+        self.advance(4)
+        self.assertEqual(len(self.sent()), 3)
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+    def test_variables(self):
+        """Test that variables are replaced when the timer fires."""
+        self.engine.locals["target"] = "rat"
+        self.engine.execute("#delay 1 {#send {kill $target}}")
+        self.engine.locals["target"] = "dragon"
+        self.advance(1)
+        self.assertEqual(self.sent(), ["kill dragon"])
+
+    def test_replace(self):
+        """Test that a named timer replaces the timer of the same name."""
+        self.engine.execute("#delay 1 {#send first} name")
+        self.engine.execute("#delay 2 {#send second} name")
+        self.advance(3)
+        self.assertEqual(self.sent(), ["second"])
+
+    def test_cancel_all(self):
+        """Test that all the timers can be cancelled."""
+        self.engine.execute("#delay 1 {#send a} a\n#every 1 {#send b}")
+        self.engine.execute("#cancel")
+        self.advance(2)
+        self.send.assert_not_called()
+        self.assertEqual(len(self.world.timers), 0)
+
+    def test_cancel_itself(self):
+        """Test that a repeated timer can cancel itself."""
+        self.engine.execute("#every 1 {\n    #send tick\n    #cancel tick\n} "
+                "tick")
+        self.advance(3)
+        self.assertEqual(self.sent(), ["tick"])
+
+    def test_cancel_all_itself(self):
+        """Test that a repeated timer can cancel all the timers."""
+        self.engine.execute("#every 1 {\n    #send tick\n    #cancel\n}")
+        self.advance(3)
+        self.assertEqual(self.sent(), ["tick"])
+        self.assertEqual(len(self.world.timers), 0)
+
+        # Another timer shouldn't revive the cancelled one
+        self.engine.execute("#delay 1 {#send other}")
+        self.advance(3)
+        self.assertEqual(self.sent(), ["tick", "other"])
+
+    def test_rounds(self):
+        """Test timers longer than a turn of the wheel."""
+        wheel = self.world.timers
+        delay = wheel.size * wheel.resolution * 2.5
+        self.engine.execute("#delay {} {{#send late}}".format(delay))
+        self.advance(delay - 0.1)
+        self.send.assert_not_called()
+        self.advance(0.1)
+        self.assertEqual(self.sent(), ["late"])
+
+    def test_missed_ticks(self):
+        """Test that missed ticks are caught up."""
+        self.engine.execute("#delay 0.5 {#send a}\n#delay 1 {#send b}")
+        self.clock.advance(3)
+        self.assertEqual(self.sent(), ["a", "b"])
+
+    def test_many(self):
+        """Test thousands of concurrent timers."""
+        for i in range(5000):
+            self.engine.execute("#delay {} {{#send {}}} t{}".format(
+                    1 + i % 10, i, i), variables=False)
+        self.assertEqual(len(self.world.timers), 5000)
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        self.advance(10)
+        self.assertEqual(len(self.sent()), 5000)
+        self.assertEqual(len(self.world.timers), 0)
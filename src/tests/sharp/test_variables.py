@@ -0,0 +1,96 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Tests for the variable store and the '#var' function."""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from scripting.alias import Alias
+from scripting.trigger import Trigger
+from sharp.engine import SharpScript
+
+class TestVariables(unittest.TestCase):
+
+    """Unittest for the variable store."""
+
+    def setUp(self):
+        """Create the SharpScript instance and mock the 'send' function."""
+        self.engine = SharpScript(MagicMock(), None, None)
+        self.send = MagicMock()
+        self.engine.globals["send"] = self.send
+
+    def test_frame(self):
+        """Test that the variables of a match don't remain."""
+        trigger = Trigger(self.engine, "^(?P<name>\\w+) tells you (.*)$",
+                "#send {reply $name $2}")
+        self.engine.locals["name"] = "me"
+        trigger.execute(trigger.re_reaction.search("Kredh tells you hi"))
+        self.send.assert_called_once_with("reply Kredh hi")
+        self.assertEqual(self.engine.locals, {"name": "me"})
+        self.assertEqual(self.engine.variables.frames, [])
+
+    def test_nested(self):
+        """Test that nested frames restore the previous variables."""
+        variables = self.engine.variables
+        variables.push({"args": {"1": "rat"}})
+        alias = Alias(self.engine, "k *", "#send {kill $1}")
+        self.assertTrue(alias.test("k dog"))
+        self.send.assert_called_once_with("kill dog")
+        self.assertEqual(self.engine.locals["args"], {"1": "rat"})
+        variables.pop()
+        self.assertEqual(self.engine.locals, {})
+
+    def test_error(self):
+        """Test that the frame is popped if the action fails."""
+        trigger = Trigger(self.engine, "*", "{+\n1 / 0\n}")
+        with self.assertRaises(ZeroDivisionError):
+            trigger.execute(trigger.re_reaction.search("line"))
+        self.assertEqual(self.engine.locals, {})
+
+    def test_declare(self):
+        """Test that variables are declared with a type."""
+        self.engine.execute("#var hp 100 int\n#var target {a rat}")
+        self.assertEqual(self.engine.locals["hp"], 100)
+        self.engine.execute("#var hp 80\n#var brave yes bool")
+        self.assertEqual(self.engine.locals["hp"], 80)
+        self.assertEqual(self.engine.variables.declared, [("hp", 80, "int"),
+                ("target", "a rat", "str"), ("brave", True, "bool")])
+        with self.assertRaises(ValueError):
+            self.engine.execute("#var hp many")
+        with self.assertRaises(ValueError):
+            self.engine.execute("#var hp 1 list")
+
+    def test_limit(self):
+        """Test that the oldest undeclared variables are removed."""
+        variables = self.engine.variables
+        variables.limit = 3
+        self.engine.execute("#var hp 100 int")
+        with patch("scripting.variables.logger") as logger:
+            self.engine.execute("{+\na = 1\nb = 2\nc = 3\nd = 4\n}")
+            self.assertEqual(sorted(self.engine.locals), ["c", "d", "hp"])
+            logger.warning.assert_called_once()
@@ -0,0 +1,109 @@
+# Copyright (c) 2016, LE GOFF Vincent
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+
+# * Neither the name of ytranslate nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Tests for the indexed collections of the world."""
+
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from scripting.alias import Alias
+from scripting.collection import IndexedCollection
+from world import MergingMethod, World
+
+class TestIndexedCollection(TestCase):
+
+    """Test the indexed collection."""
+
+    def setUp(self):
+        """Create a collection of words, indexed by their first letter."""
+        self.words = IndexedCollection(lambda word: word[0],
+                ["apple", "banana", "avocado"])
+        self.callback = MagicMock()
+        self.words.subscribe(self.callback)
+
+    def test_order(self):
+        """Test that the collection keeps the order of insertion."""
+        self.words.append("cherry")
+        self.assertEqual(self.words, ["apple", "banana", "avocado",
+                "cherry"])
+        self.assertEqual(len(self.words), 4)
+        self.assertEqual(self.words[-1], "cherry")
+        self.assertIn("banana", self.words)
+        self.callback.assert_called_once_with("add", "cherry")
+
+    def test_index(self):
+        """Test that the first object with a key is indexed."""
+        self.assertEqual(self.words.get("a"), "apple")
+        self.assertIsNone(self.words.get("c"))
+        self.words.remove("apple")
+        self.assertEqual(self.words.get("a"), "avocado")
+        self.words.remove("avocado")
+        self.assertIsNone(self.words.get("a"))
+        self.assertEqual(self.callback.call_count, 2)
+
+    def test_replace(self):
+        """Test replacing the content of the collection."""
+        self.words[:] = ["cherry", "date"]
+        self.assertEqual(self.words, ["cherry", "date"])
+        self.assertIsNone(self.words.get("a"))
+        self.assertEqual(self.words.get("d"), "date")
+        self.callback.assert_called_once_with("reset", None)
+        self.words.clear()
+        self.assertEqual(len(self.words), 0)
+
+
+class TestWorldCollections(TestCase):
+
+    """Test the collections of the world."""
+
+    def setUp(self):
+        """Create a world."""
+        self.world = World("test")
+        self.sharp = MagicMock()
+
+    def test_aliases(self):
+        """Test that conflicting aliases are handled through the index."""
+        first = Alias(self.sharp, "l", "look")
+        self.world.add_alias(first)
+        alias_set = self.world.alias_set
+        self.world.add_alias(Alias(self.sharp, "l", "listen"))
+        self.assertEqual(self.world.aliases, [first])
+        self.assertEqual(first.action, "look")
+        self.assertIs(self.world.alias_set, alias_set)
+
+        self.world.merging = MergingMethod.replace
+        self.world.add_alias(Alias(self.sharp, "l", "listen"))
+        self.assertEqual(first.action, "listen")
+
+        # Adding an alias resets the alias set
+        second = Alias(self.sharp, "n", "north")
+        self.world.add_alias(second)
+        self.assertIsNot(self.world.alias_set, alias_set)
+        self.assertEqual(len(self.world.alias_set), 2)
+        self.world.aliases[:] = [second]
+        self.assertEqual(len(self.world.alias_set), 1)
@@ -402,9 +402,11 @@ class PreferencesDialog(wx.Dialog):
         self.engine.TTS_on = accessibility.TTS_on.GetValue()
         self.engine.TTS_outside  = accessibility.TTS_outside.GetValue()
 
-        # Repercute screen reader support
+        # Repercute screen reader support and encoding
         for tab in self.window.tabs.GetChildren():
             tab.screenreader_support = srs
+            if tab.client:
+                tab.client.set_encoding(encoding)
 
         if old_language != new_language:
             wx.MessageBox(t("ui.dialog.preferences.update_language"),
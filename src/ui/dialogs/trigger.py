@@ -241,6 +241,12 @@ class EditTriggerDialog(wx.Dialog):
         self.mark.SetValue(self.trigger.mark)
         options.Add(self.mark)
 
+        # Asynchronous option
+        self.asynchronous = wx.CheckBox(self,
+                label=t("ui.message.trigger.asynchronous"))
+        self.asynchronous.SetValue(self.trigger.asynchronous)
+        options.Add(self.asynchronous)
+
         # Substitution
         s_substitution = wx.BoxSizer(wx.VERTICAL)
         l_substitution = wx.StaticText(self,
@@ -270,6 +276,7 @@ class EditTriggerDialog(wx.Dialog):
         substitution = self.substitution.GetValue()
         mute = self.mute.GetValue()
         mark = self.mark.GetValue()
+        asynchronous = self.asynchronous.GetValue()
         if not reaction:
             wx.MessageBox(t("ui.message.trigger.missing_reaction"),
                     t("ui.alert.missing"), wx.OK | wx.ICON_ERROR)
@@ -281,6 +288,7 @@ class EditTriggerDialog(wx.Dialog):
             self.trigger.substitution = substitution
             self.trigger.mute = mute
             self.trigger.mark = mark
+            self.trigger.asynchronous = asynchronous
             if self.trigger not in self.triggers:
                 self.triggers.append(self.trigger)
             self.EndModal(wx.ID_OK)
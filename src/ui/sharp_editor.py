@@ -71,7 +71,7 @@ class SharpEditor(wx.Panel):
         self.escape = escape
 
         script = getattr(self.object, self.attribute)
-        self.functions = sorted(sharp.functions.values(),
+        self.functions = sorted(sharp.load_functions(),
                 key=lambda function: function.name)
         self.functions = [f for f in self.functions if f.description]
 
@@ -184,7 +184,7 @@ class SharpEditor(wx.Panel):
                     t("ui.message.error"), wx.OK | wx.ICON_ERROR)
         else:
             name, arguments, flags = self.sharp_engine.extract_arguments(line)
-            function = self.sharp_engine.functions[name[1:]]
+            function = self.sharp_engine.get_function(name[1:])
             dialog = AddEditFunctionDialog(self.engine, self.sharp_engine,
                     function, self.object, self.attribute, index,
                     escape=self.escape)
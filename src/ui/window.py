@@ -533,7 +533,7 @@ class ClientWindow(DummyUpdater):
             with self.lock:
                 panel.handle_disconnection(reason)
 
-    def messageClient(self, client, message, mark=None):
+    def messageClient(self, client, message, mark=None, spans=None):
         """A client receives a message."""
         if not self:
             return
@@ -541,7 +541,7 @@ class ClientWindow(DummyUpdater):
         panel = client.factory.panel
         if panel:
             with self.lock:
-                panel.handle_message(message, mark=mark)
+                panel.handle_message(message, mark=mark, spans=spans)
 
     def OnResponseUpdate(self, build=None):
         """The check for updates has returned."""
@@ -567,7 +567,9 @@ class MUDPanel(AccessPanel):
     def __init__(self, parent, window, engine, world, session):
         self.rich = engine.settings["options.output.richtext"]
         AccessPanel.__init__(self, parent, history=True, lock_input=True,
-                ansi=self.rich, rich=self.rich)
+                ansi=self.rich, rich=self.rich,
+                max_lines=engine.settings["options.output.scrollback_lines"],
+                max_chars=engine.settings["options.output.scrollback_chars"])
         self.screenreader_support = engine.settings[
                 "options.general.screenreader"]
         if self.rich:
@@ -615,7 +617,6 @@ class MUDPanel(AccessPanel):
         hostname = world.hostname
         port = world.port
         client = engine.open(hostname, port, world, session, self)
-        client.strip_ansi = not self.rich
         world.load()
         client.commands = self.login()
         return client
@@ -649,8 +650,13 @@ class MUDPanel(AccessPanel):
             self.Send(message)
         ScreenReader.talk(message, interrupt=False)
 
-    def handle_message(self, message="", mark=None):
-        """The client has just received a message."""
+    def handle_message(self, message="", mark=None, spans=None):
+        """The client has just received a message.
+
+        The message contains plain text:  its style spans, if any,
+        are given separately (see 'accesspanel.tokenizer').
+
+        """
         point = self.editing_pos
         lines = message.splitlines()
         lines = [line for line in lines if line]
@@ -662,7 +668,7 @@ class MUDPanel(AccessPanel):
         if not self:
             return
 
-        self.Send(message, pos=mark)
+        self.Send(message, pos=mark, spans=spans)
 
         # If there's a mark, move the cursor to it
         if mark is not None:
@@ -681,7 +687,11 @@ class MUDPanel(AccessPanel):
                     self.nb_unread, world.name))
 
     def OnInput(self, message):
-        """Some text has been sent from the input."""
+        """Some text has been sent from the input.
+
+        The message can be a string or a list of commands.
+
+        """
         if self.world:
             self.world.reset_autocompletion()
 
@@ -713,9 +723,7 @@ class MUDPanel(AccessPanel):
                 input = self.input + clipboard
                 if input.endswith("\n") and self.engine.settings[
                         "options.input.auto_send_paste"]:
-                    lines = input.splitlines()
-                    for line in lines:
-                        self.OnInput(line)
+                    self.OnInput(input.splitlines())
                     self.ClearInput()
                 else:
                     e.Skip()
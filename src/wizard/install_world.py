@@ -151,7 +151,9 @@ class InstallWorld:
         # Install the world
         if "world/install.py" in self.files:
             logger.debug("Executing the installation file")
-            install = self.files["world/install.py"]
+            install = compile(self.files["world/install.py"],
+                    "install.py", "exec")
+            sharp.bind_functions(install)
             globals = sharp.globals
             locals = sharp.locals
             locals.update(data)
@@ -43,7 +43,13 @@ from character import Character
 from log import sharp as logger
 from notepad import Notepad
 from screenreader import ScreenReader
+from scripting.alias_set import AliasSet
+from scripting.collection import IndexedCollection
+from scripting.executor import ScriptExecutor
+from scripting.timer import TimerWheel
+from scripting.trigger_set import TriggerSet
 from session import Session
+from sharp.snapshot import compile_script
 
 class MergingMethod(Enum):
 
@@ -68,6 +74,8 @@ class World:
         self.hostname = ""
         self.port = 4000
         self.protocol = "telnet"
+        self.send_rate = 0.0
+        self.send_burst = 10
         self.characters = {}
         self.settings = None
         self.lock = RLock()
@@ -78,10 +86,22 @@ class World:
         self.sharp_engine = None
 
         # World's configuration
-        self.aliases = []
-        self.channels = []
-        self.macros = []
-        self.triggers = []
+        self.aliases = IndexedCollection(lambda alias: alias.alias)
+        self._alias_set = None
+        self.channels = IndexedCollection(lambda channel: channel.name)
+        self.macros = IndexedCollection(
+                lambda macro: (macro.key, macro.modifiers))
+        self._macro_keys = None
+        self.triggers = IndexedCollection(lambda trigger: trigger.reaction)
+        self._trigger_set = None
+        self.aliases.subscribe(
+                lambda action, alias: self.reset_alias_set())
+        self.macros.subscribe(
+                lambda action, macro: self.reset_macro_keys())
+        self.triggers.subscribe(
+                lambda action, trigger: self.reset_trigger_set())
+        self.timers = TimerWheel()
+        self.executor = ScriptExecutor(location)
         self.notepad = None
         self.merging = MergingMethod.ignore
 
@@ -93,6 +113,53 @@ class World:
         return "<World {} (hostname={}, port={})>".format(
                 self.name, self.hostname, self.port)
 
+    @property
+    def alias_set(self):
+        """Return the index of aliases, building it if necessary.
+
+        The alias set is built from the list of aliases the first
+        time it is needed.  It is reset each time aliases are added
+        or removed.
+
+        """
+        if self._alias_set is None:
+            self._alias_set = AliasSet(self.aliases)
+
+        return self._alias_set
+
+    @property
+    def macro_keys(self):
+        """Return the index of macros by key, building it if necessary.
+
+        The index is a dictionary associating each key with a
+        dictionary of modifiers and macros, so that a key without
+        macro is found without building a (key, modifiers) tuple.
+        It is reset each time macros are added or removed.
+
+        """
+        if self._macro_keys is None:
+            keys = {}
+            for macro in self.macros:
+                keys.setdefault(macro.key, {}).setdefault(macro.modifiers,
+                        macro)
+            self._macro_keys = keys
+
+        return self._macro_keys
+
+    @property
+    def trigger_set(self):
+        """Return the index of triggers, building it if necessary.
+
+        The trigger set is built from the list of triggers the first
+        time it is needed.  It is reset each time triggers are added
+        or removed.
+
+        """
+        if self._trigger_set is None:
+            self._trigger_set = TriggerSet(self.triggers)
+
+        return self._trigger_set
+
     @property
     def path(self):
         """Return the path to the world."""
@@ -109,24 +176,21 @@ class World:
         to_save = False
 
         # Reset some of the world's configuration
-        self.aliases = []
-        self.channels = []
-        self.macros = []
-        self.triggers = []
+        self.aliases.clear()
+        self.channels.clear()
+        self.macros.clear()
+        self.triggers.clear()
 
         path = self.path
         path = os.path.join(path, "config.set")
         if os.path.exists(path):
-            try:
-                with open(path, "r", encoding="utf-8") as file:
-                    content = file.read()
-            except UnicodeDecodeError:
-                with open(path, "r", encoding="latin-1") as file:
-                    content = file.read()
-                    to_save = True
+            # The script is compiled, unless its snapshot is still valid
+            code, encoding = compile_script(self.sharp_engine, path)
+            if encoding != "utf-8":
+                to_save = True
 
             # Execute the script
-            self.sharp_engine.execute(content, variables=False)
+            self.sharp_engine.execute(code)
 
         # Put the engine level back
         self.engine.level = level
@@ -159,6 +223,10 @@ class World:
                 hostname = "unknown.ext"
                 port = 0
                 protocol = "telnet"
+
+            [input]
+                rate = 0
+                burst = 10
         """).strip("\n")
 
         if self.settings is None:
@@ -176,6 +244,9 @@ class World:
         connection["hostname"] = self.hostname
         connection["port"] = self.port
         connection["protocol"] = self.protocol
+        input = self.settings.setdefault("input", {})
+        input["rate"] = self.send_rate
+        input["burst"] = self.send_burst
         self.settings.filename = os.path.join(self.path, "options.conf")
         self.settings.write()
         self.save_config()
@@ -200,6 +271,12 @@ class World:
         for trigger in self.triggers:
             lines.append(trigger.sharp_script)
 
+        # Declared variables
+        if self.sharp_engine:
+            for name, value, type in self.sharp_engine.variables.declared:
+                lines.append(self.sharp_engine.format((("#var", name,
+                        str(value), type), )))
+
         content = "\n".join(lines) + "\n"
         path = self.path
         path = os.path.join(path, "config.set")
@@ -226,24 +303,23 @@ class World:
         it or ignore the second one.
 
         """
-        for existing in self.aliases:
-            if existing.alias == alias.alias:
-                # There's a conflict, look at the 'merging' setting
-                if self.merging == MergingMethod.ignore:
-                    return
-                elif self.merging == MergingMethod.replace:
-                    existing.action = alias.action
-                    existing.level = alias.level
-                    return
+        existing = self.aliases.get(alias.alias)
+        if existing is not None:
+            # There's a conflict, look at the 'merging' setting
+            if self.merging == MergingMethod.ignore:
+                return
+            elif self.merging == MergingMethod.replace:
+                existing.action = alias.action
+                existing.level = alias.level
+                return
 
         # Otherwise, just add it at the end
         self.aliases.append(alias)
 
     def add_channel(self, channel):
         """Add a channel, handling conflicts."""
-        for existing in self.channels:
-            if existing.name == channel.name:
-                return
+        if self.channels.get(channel.name) is not None:
+            return
 
         # Otherwise, just add it at the end
         self.channels.append(channel)
@@ -255,19 +331,28 @@ class World:
         it or ignore the second one.
 
         """
-        for existing in self.macros:
-            if existing.shortcut == macro.shortcut:
-                # There's a conflict, look at the 'merging' setting
-                if self.merging == MergingMethod.ignore:
-                    return
-                elif self.merging == MergingMethod.replace:
-                    existing.action = macro.action
-                    existing.level = macro.level
-                    return
+        existing = self.macros.get((macro.key, macro.modifiers))
+        if existing is not None:
+            # There's a conflict, look at the 'merging' setting
+            if self.merging == MergingMethod.ignore:
+                return
+            elif self.merging == MergingMethod.replace:
+                existing.action = macro.action
+                existing.level = macro.level
+                return
 
         # Otherwise, just add it at the end
         self.macros.append(macro)
 
+    def remove_macro(self, macro):
+        """Remove the macro from the world's configuration.
+
+        The index of macros is updated by the collection, another
+        macro with the same shortcut, if any, is then used.
+
+        """
+        self.macros.remove(macro)
+
     def add_trigger(self, trigger):
         """Add the trigger to the world's configuration, handling conflicts.
 
@@ -275,20 +360,32 @@ class World:
         it or ignore the second one.
 
         """
-        for existing in self.triggers:
-            if existing.reaction == trigger.reaction:
-                # There's a conflict, look at the 'merging' setting
-                if self.merging == MergingMethod.ignore:
-                    return
-                elif self.merging == MergingMethod.replace:
-                    existing.action = trigger.action
-                    existing.mute = trigger.mute
-                    existing.level = trigger.level
-                    return
+        existing = self.triggers.get(trigger.reaction)
+        if existing is not None:
+            # There's a conflict, look at the 'merging' setting
+            if self.merging == MergingMethod.ignore:
+                return
+            elif self.merging == MergingMethod.replace:
+                existing.action = trigger.action
+                existing.mute = trigger.mute
+                existing.level = trigger.level
+                return
 
         # Otherwise, just add it at the end
         self.triggers.append(trigger)
 
+    def reset_alias_set(self):
+        """Reset the index of aliases, to be rebuilt when needed."""
+        self._alias_set = None
+
+    def reset_macro_keys(self):
+        """Reset the index of macros by key, to be rebuilt when needed."""
+        self._macro_keys = None
+
+    def reset_trigger_set(self):
+        """Reset the index of triggers, to be rebuilt when needed."""
+        self._trigger_set = None
+
     def reset_autocompletion(self):
         """Erase the list of possible choices in for the auto completion."""
         self.ac_choices[:] = []
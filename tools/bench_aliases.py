@@ -0,0 +1,107 @@
+"""This script measures the speed of alias dispatch.
+
+Synthetic worlds are created with a given number of aliases (mostly
+aliases beginning with a word, like "co *", and some regular
+expressions or aliases beginning with a '*' sign), then commands are
+dispatched to the first matching alias in two ways:
+
+1.  Testing every alias against every command (the old behavior).
+2.  Using the alias set, indexing aliases by their first word.
+
+The number of commands dispatched per second is displayed for each
+method and each number of aliases.  The aliases are not executed.
+
+Usage:
+    python bench_aliases.py --aliases 10 100 400 1000 --commands 20000
+
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(
+        __file__)), "..", "src"))
+
+from scripting.alias import Alias
+from scripting.alias_set import AliasSet
+
+# Create an argument parser
+parser = argparse.ArgumentParser(
+        description="measure the speed of alias dispatch")
+parser.add_argument("--aliases", type=int, nargs="+",
+        default=[10, 100, 400, 1000],
+        help="the numbers of aliases to create")
+parser.add_argument("--commands", type=int, default=20000,
+        help="the number of commands to dispatch")
+parser.add_argument("--regex", type=float, default=0.05,
+        help="the proportion of aliases which can't be indexed")
+parser.add_argument("--seed", type=int, default=0,
+        help="the seed of the random generator")
+args = parser.parse_args()
+random.seed(args.seed)
+
+# Vocabulary used to generate commands
+WORDS = ["north", "south", "look", "kill", "get", "drop", "say", "tell",
+        "cast", "open", "close", "wield", "wear", "remove", "score"]
+
+def create_aliases(number):
+    """Create and return a list of aliases."""
+    engine = SimpleNamespace(level=None)
+    sharp = SimpleNamespace(engine=engine, world=None)
+    aliases = []
+    for i in range(number):
+        if random.random() < args.regex:
+            if random.random() < 0.5:
+                alias = r"^x{}(\d+) (.*)$".format(i)
+            else:
+                alias = "y{}*".format(i)
+        else:
+            alias = "a{} *".format(i)
+
+        aliases.append(Alias(sharp, alias, "look"))
+
+    return aliases
+
+def create_commands(number):
+    """Create the commands, half of them matching an alias."""
+    commands = []
+    for i in range(args.commands):
+        if random.random() < 0.5:
+            commands.append("a{} {}".format(random.randrange(number),
+                    random.choice(WORDS)))
+        else:
+            commands.append("{} {}".format(random.choice(WORDS),
+                    random.choice(WORDS)))
+
+    return commands
+
+def dispatch(candidates, command):
+    """Return the first alias matching the command."""
+    for alias in candidates:
+        if alias.re_alias.search(command):
+            return alias
+
+    return None
+
+for number in args.aliases:
+    aliases = create_aliases(number)
+    commands = create_commands(number)
+    alias_set = AliasSet(aliases)
+    print("{} aliases ({} always tested), {} commands".format(number,
+            len(alias_set.always), len(commands)))
+    results = []
+    for name, find in (("all aliases", lambda command: aliases),
+            ("alias set", alias_set.find)):
+        begin = time.perf_counter()
+        result = [dispatch(find(command), command) for command in commands]
+        elapsed = time.perf_counter() - begin
+        results.append(result)
+        print("  {:<15} {:>12.0f} commands/s".format(name,
+                len(commands) / elapsed))
+
+    if results[0] != results[1]:
+        print("  The alias set returned different aliases!")
@@ -0,0 +1,102 @@
+"""This script measures the speed of decoding the received data.
+
+A transcript of several megabytes is generated, encoded in UTF-8 and
+in ISO-8859-15, then cut in chunks of random sizes (like packets
+received from the server).  These chunks are decoded in two ways:
+
+1.  Looking up the encoding in the settings and decoding each chunk
+    on its own (the old behavior).
+2.  Using an incremental decoder, created once.
+
+The throughput (in megabytes per second) is displayed for each method,
+along with the number of characters that couldn't be decoded.
+
+Usage:
+    python bench_decoding.py --size 4 --chunk 1024
+
+"""
+
+import argparse
+import codecs
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(
+        __file__)), "..", "src"))
+
+from config import Configuration
+
+# Create an argument parser
+parser = argparse.ArgumentParser(
+        description="measure the speed of decoding the received data")
+parser.add_argument("--size", type=float, default=4,
+        help="the size of the transcript, in megabytes")
+parser.add_argument("--chunk", type=int, default=1024,
+        help="the maximum size of a chunk, in bytes")
+parser.add_argument("--seed", type=int, default=0,
+        help="the seed of the random generator")
+args = parser.parse_args()
+random.seed(args.seed)
+
+# Lines used to generate the transcript
+LINES = [
+    "You are hungry.",
+    "Vous êtes affamé, mais le pain coûte 5€.",
+    "Kredh dit : « Ça va très bien, merci ! »",
+    "\x1b[1;31mThe goblin hits you very hard.\x1b[0m",
+    "HP: 100/120 MP: 40/40 >",
+]
+
+# Generate the transcript
+lines = []
+size = 0
+while size < args.size * 1024 * 1024:
+    line = random.choice(LINES)
+    lines.append(line)
+    size += len(line) + 1
+transcript = "\n".join(lines) + "\n"
+
+def cut(data):
+    """Cut the data in chunks of random sizes."""
+    chunks = []
+    i = 0
+    while i < len(data):
+        size = random.randint(1, args.chunk)
+        chunks.append(data[i:i + size])
+        i += size
+    return chunks
+
+def per_chunk(settings, chunks):
+    """Decode each chunk on its own, looking up the encoding."""
+    decoded = []
+    for chunk in chunks:
+        encoding = settings["options.general.encoding"]
+        decoded.append(chunk.decode(encoding, errors="replace"))
+    return "".join(decoded)
+
+def incremental(settings, chunks):
+    """Decode the chunks with an incremental decoder."""
+    encoding = settings["options.general.encoding"]
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    decoded = [decoder.decode(chunk) for chunk in chunks]
+    decoded.append(decoder.decode(b"", final=True))
+    return "".join(decoded)
+
+for encoding in ("utf-8", "iso8859_15"):
+    settings = Configuration(".", None)
+    settings.values = {"options": {"general": {"encoding": encoding}}}
+    data = transcript.encode(encoding)
+    chunks = cut(data)
+    megabytes = len(data) / 1024 / 1024
+    print("{}: {:.1f} MB in {} chunks".format(encoding, megabytes,
+            len(chunks)))
+    for name, method in (("per chunk", per_chunk),
+            ("incremental", incremental)):
+        begin = time.perf_counter()
+        decoded = method(settings, chunks)
+        elapsed = time.perf_counter() - begin
+        errors = decoded.count("\ufffd")
+        print("  {:<15} {:>8.1f} MB/s, {} replaced characters".format(
+                name, megabytes / elapsed, errors))
@@ -0,0 +1,66 @@
+"""This script measures the creation of SharpScript engines.
+
+Each session (and each world being installed) creates its own
+SharpScript engine.  Engines are created in two ways:
+
+1.  Eagerly (the old behavior): every function is created with the
+    engine.
+2.  Lazily (the current behavior): functions are created when a
+    script first uses them.
+
+The time to create an engine and the memory it occupies (measured
+with tracemalloc) are displayed for each method.  The script also
+checks whether executing a script imports wx.
+
+Usage:
+    python bench_engines.py --engines 1000
+
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(
+        __file__)), "..", "src"))
+
+from sharp import FUNCTIONS
+from sharp.engine import SharpScript
+
+# Create an argument parser
+parser = argparse.ArgumentParser(
+        description="measure the creation of SharpScript engines")
+parser.add_argument("--engines", type=int, default=1000,
+        help="the number of engines to create")
+args = parser.parse_args()
+
+def eager():
+    """Create an engine with all its functions (old behavior)."""
+    sharp = SharpScript(None, None, None)
+    sharp.load_functions()
+    return sharp
+
+def lazy():
+    """Create an engine whose functions are created when needed."""
+    return SharpScript(None, None, None)
+
+print("{} engines, {} functions".format(args.engines, len(FUNCTIONS)))
+for name, method in (("eager", eager), ("lazy", lazy)):
+    tracemalloc.start()
+    begin = time.perf_counter()
+    engines = [method() for i in range(args.engines)]
+    elapsed = time.perf_counter() - begin
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("  {:<10} {:>8.1f}us {:>8.1f}KB per engine".format(name,
+            elapsed / args.engines * 1000000, size / args.engines / 1024))
+    del engines
+
+# Executing a script shouldn't import the user interface
+sharp = SharpScript(None, None, None)
+sharp.globals["send"] = lambda *args, **kwargs: None
+sharp.execute("#say {hello}\n#send north")
+print("Functions created: {}".format(", ".join(sorted(sharp.functions))))
+print("wx imported: {}".format("wx" in sys.modules))
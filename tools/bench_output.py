@@ -0,0 +1,177 @@
+"""This script measures the cost of displaying a message in the AccessPanel.
+
+The AccessPanel is created without a window: its output field is
+replaced by a mocked TextCtrl, which keeps its text in chunks and
+charges each operation for the text it has to walk through (reading
+back the output is proportional to its size, editing the end of the
+output is not).
+
+The output is filled with an increasing number of lines, then messages
+are displayed in two ways:
+
+1.  Reading back the output, removing the input and appending the
+    message and the input again (the old behavior).
+2.  Inserting the message before the input (the current behavior).
+
+The number of messages displayed per second is shown for each size
+of scrollback.
+
+Usage:
+    python bench_output.py --lines 0 1000 100000 1000000 --messages 200
+
+"""
+
+import argparse
+from collections import OrderedDict, deque
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(
+        __file__)), "..", "src"))
+
+from accesspanel import AccessPanel
+
+# Create an argument parser
+parser = argparse.ArgumentParser(
+        description="measure the cost of displaying a message")
+parser.add_argument("--lines", type=int, nargs="+",
+        default=[0, 1000, 10000, 100000, 1000000],
+        help="the number of lines in the scrollback")
+parser.add_argument("--messages", type=int, default=200,
+        help="the number of messages to display for each size")
+args = parser.parse_args()
+
+LINE = "The goblin hits you very hard, you feel weaker.\n"
+MESSAGE = "You are hungry.\r\nHP: 100/120 MP: 40/40 >"
+INPUT = "say hello"
+
+class TextCtrl:
+
+    """A mocked TextCtrl, keeping its text in a list of chunks.
+
+    Positions are located by walking the chunks from the end, so
+    operations near the end of the text are cheap, while reading the
+    beginning of the text costs its full size.
+
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.length = 0
+        self.insertion_point = 0
+
+    def locate(self, pos):
+        """Return the index of the chunk containing pos and the offset."""
+        end = self.length
+        index = len(self.chunks)
+        while index > 0 and end > pos:
+            index -= 1
+            end -= len(self.chunks[index])
+
+        return index, pos - end
+
+    def split(self, pos):
+        """Split the chunks at pos and return the index after pos."""
+        index, offset = self.locate(pos)
+        if offset:
+            chunk = self.chunks[index]
+            self.chunks[index:index + 1] = [chunk[:offset], chunk[offset:]]
+            index += 1
+
+        return index
+
+    def GetInsertionPoint(self):
+        return self.insertion_point
+
+    def SetInsertionPoint(self, pos):
+        self.insertion_point = pos
+
+    def GetLastPosition(self):
+        return self.length
+
+    def GetRange(self, start, end):
+        first = self.split(start)
+        last = self.split(end)
+        return "".join(self.chunks[first:last])
+
+    def AppendText(self, text):
+        self.chunks.append(text)
+        self.length += len(text)
+        self.insertion_point = self.length
+
+    def WriteText(self, text):
+        index = self.split(self.insertion_point)
+        self.chunks.insert(index, text)
+        self.length += len(text)
+        self.insertion_point += len(text)
+
+    def Remove(self, start, end):
+        first = self.split(start)
+        last = self.split(end)
+        del self.chunks[first:last]
+        self.length -= end - start
+
+    def Freeze(self):
+        pass
+
+    def Thaw(self):
+        pass
+
+
+def create_panel(nb_lines):
+    """Create a panel with a scrollback of nb_lines."""
+    panel = AccessPanel.__new__(AccessPanel)
+    panel.extensions = OrderedDict()
+    panel.rich = True
+    panel.screenreader_support = True
+    panel.max_lines = 0
+    panel.max_chars = 0
+    panel.output = TextCtrl()
+    panel.output.chunks = [LINE] * nb_lines
+    panel.output.length = len(LINE) * nb_lines
+    panel.output_lines = deque([len(LINE)] * nb_lines)
+    panel.output_size = panel.output.length
+    panel.editing_pos = panel.output.length
+    panel.output.AppendText(INPUT)
+    return panel
+
+def old_message(panel, e):
+    """Display a message by reading back the output (old behavior)."""
+    pos = panel.output.GetInsertionPoint()
+    message = "\r\n".join(e.GetValue().splitlines())
+    if not message.endswith("\r\n"):
+        message += "\r\n"
+
+    output = panel.output.GetRange(0, panel.editing_pos)
+    input = panel.input
+    panel.ClearInput()
+    panel.output.AppendText(message)
+    if pos >= panel.editing_pos:
+        pos += len(message.replace("\r\n", "\n"))
+
+    panel.editing_pos = panel.output.GetLastPosition()
+    panel.output.AppendText(input)
+    panel.output.SetInsertionPoint(pos)
+
+def new_message(panel, e):
+    """Display a message by inserting it before the input."""
+    panel.OnMessage(e)
+
+event = MagicMock()
+event.GetValue.return_value = MESSAGE
+event.GetPos.return_value = None
+print("{} messages of {} characters".format(args.messages, len(MESSAGE)))
+for nb_lines in args.lines:
+    print("{} lines in the scrollback".format(nb_lines))
+    for name, method in (("read back", old_message),
+            ("insert", new_message)):
+        panel = create_panel(nb_lines)
+        begin = time.perf_counter()
+        for i in range(args.messages):
+            method(panel, event)
+        elapsed = time.perf_counter() - begin
+        assert panel.input == INPUT
+        print("  {:<15} {:>10.0f} messages/s".format(
+                name, args.messages / elapsed))
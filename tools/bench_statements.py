@@ -0,0 +1,153 @@
+"""This script measures the speed of splitting SharpScript into statements.
+
+Synthetic configuration files (like 'config.set') are generated with
+1,000, 10,000 and 100,000 statements (aliases, triggers with
+SharpScript in braces, macros and variables).  They are split into
+statements in two ways:
+
+1.  Slicing the remaining content at each step (the old behavior,
+    quadratic in the size of the file).  As it becomes very slow,
+    it's skipped for files larger than '--max-old' statements.
+2.  Scanning the content with indexes (the current behavior).
+
+The time to split each file is displayed for each method.
+
+Usage:
+    python bench_statements.py --sizes 1000 10000 100000
+
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(
+        __file__)), "..", "src"))
+
+from sharp.engine import SharpScript
+
+# Create an argument parser
+parser = argparse.ArgumentParser(
+        description="measure the speed of splitting SharpScript statements")
+parser.add_argument("--sizes", type=int, nargs="+",
+        default=[1000, 10000, 100000],
+        help="the number of statements in the generated files")
+parser.add_argument("--max-old", type=int, default=10000,
+        help="the maximum number of statements for the old method")
+parser.add_argument("--seed", type=int, default=0,
+        help="the seed of the random generator")
+args = parser.parse_args()
+random.seed(args.seed)
+
+# Statements used to generate the files
+STATEMENTS = [
+    "#alias k{n} {{kill $1}}",
+    "#trigger {{You are hungry {n}.}} {{eat bread;drink water}}",
+    "#trigger {{^(.*) tells you: (.*)$}} {{\n    #say {{$1: $2}}\n    "
+            "#play tell{n}.wav\n}}",
+    "#macro F{n} {{north;north;;east}}",
+    "#channel tells{n}",
+    "say hello {n}",
+]
+
+def generate(size):
+    """Generate a configuration file with size statements."""
+    lines = []
+    for n in range(size):
+        lines.append(random.choice(STATEMENTS).format(n=n))
+    return "\n".join(lines) + "\n"
+
+def old_find_right_brace(text):
+    """Find the right brace matching the opening one (old behavior)."""
+    level = 0
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == "{":
+            level += 1
+        elif char == "}":
+            level -= 1
+
+        if level == 0:
+            return i
+
+        i += 1
+
+    return None
+
+def old_split_statements(content):
+    """Split the content in statements (old behavior)."""
+    statements = []
+    i = 0
+    function_name = ""
+    arguments = []
+    while True:
+        remaining = content[i:]
+        if not remaining or remaining.isspace():
+            if function_name:
+                statements.append((function_name, ) + tuple(arguments))
+
+            break
+
+        if remaining[0] == "\n":
+            if function_name:
+                statements.append((function_name, ) + tuple(arguments))
+                function_name = ""
+                arguments = []
+
+            i += 1
+            continue
+
+        if remaining[0].isspace():
+            i += 1
+            continue
+
+        if not function_name:
+            if remaining.startswith("#") and not remaining.startswith("##"):
+                function_name = remaining.splitlines()[0].split(" ")[0]
+                arguments = []
+                i += len(function_name)
+            else:
+                function_name = "#send"
+                argument = remaining.splitlines()[0]
+                i += len(argument)
+                if argument.startswith("##"):
+                    argument = argument[1:]
+
+                arguments = [argument]
+        elif remaining[0] == "{":
+            end = old_find_right_brace(remaining)
+            argument = remaining[:end + 1]
+            i += end + 1
+            arguments.append(argument)
+        else:
+            argument = remaining.splitlines()[0].split(" ")[0]
+            i += len(argument)
+            if argument.startswith("##"):
+                argument = argument[1:]
+
+            arguments.append(argument)
+
+    return statements
+
+engine = SharpScript(None, None, None)
+for size in args.sizes:
+    content = generate(size)
+    print("{} statements ({:.1f} MB)".format(size,
+            len(content) / 1024 / 1024))
+    results = []
+    for name, method in (("slicing", old_split_statements),
+            ("indexes", engine.split_statements)):
+        if method is old_split_statements and size > args.max_old:
+            print("  {:<15} skipped".format(name))
+            continue
+
+        begin = time.perf_counter()
+        statements = method(content)
+        elapsed = time.perf_counter() - begin
+        results.append(statements)
+        print("  {:<15} {:>8.3f}s".format(name, elapsed))
+
+    assert all(result == results[0] for result in results)
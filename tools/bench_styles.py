@@ -0,0 +1,86 @@
+"""This script counts the calls to SetStyle needed to display a transcript.
+
+A transcript containing ANSI codes (as received from the server) is
+read from one or more files, or generated if no file is given (in
+the generated transcript, most words have their own color).  The
+lines are grouped in messages and sent to the ANSI extension, whose
+output field is mocked.
+
+The number of SetStyle calls without merging (one for each change
+of style), the number of calls actually made and the number of calls
+saved by merging the style runs are displayed.
+
+Usage:
+    python bench_styles.py transcript.log --lines 10
+
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(
+        __file__)), "..", "src"))
+
+from accesspanel.extensions import ANSI
+
+# Create an argument parser
+parser = argparse.ArgumentParser(
+        description="count the calls to SetStyle to display a transcript")
+parser.add_argument("files", nargs="*",
+        help="the transcripts to read (a transcript is generated if none)")
+parser.add_argument("--lines", type=int, default=10,
+        help="the number of lines in each message")
+parser.add_argument("--size", type=int, default=20000,
+        help="the number of lines of the generated transcript")
+parser.add_argument("--seed", type=int, default=0,
+        help="the seed of the random generator")
+args = parser.parse_args()
+random.seed(args.seed)
+
+WORDS = ["the", "goblin", "hits", "you", "very", "hard", "north", "south",
+        "a", "sword", "lies", "here", "HP:", "100/120"]
+COLORS = ["\x1b[0m", "\x1b[1;31m", "\x1b[32m", "\x1b[33m", "\x1b[0;37m",
+        "\x1b[38;5;208m"]
+
+def generate():
+    """Generate a transcript where most words have their own color."""
+    lines = []
+    for i in range(args.size):
+        words = []
+        for j in range(random.randint(1, 12)):
+            if random.random() < 0.7:
+                words.append(random.choice(COLORS))
+            words.append(random.choice(WORDS) + " ")
+        lines.append("".join(words).rstrip())
+    return lines
+
+if args.files:
+    lines = []
+    for path in args.files:
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            lines.extend(file.read().splitlines())
+else:
+    lines = generate()
+
+panel = MagicMock()
+panel.editing_pos = 0
+ansi = ANSI(panel)
+begin = time.perf_counter()
+for i in range(0, len(lines), args.lines):
+    message = "\r\n".join(lines[i:i + args.lines])
+    message = ansi.OnMessage(message)
+    ansi.PostMessage(message)
+    panel.editing_pos += len(message) + 1
+elapsed = time.perf_counter() - begin
+
+total = ansi.nb_styles + ansi.nb_saved
+print("{} lines in messages of {} lines ({:.2f}s)".format(len(lines),
+        args.lines, elapsed))
+print("  without merging  {:>10}".format(total))
+print("  calls made       {:>10}".format(ansi.nb_styles))
+print("  calls saved      {:>10} ({:.0%})".format(ansi.nb_saved,
+        ansi.nb_saved / total if total else 0))
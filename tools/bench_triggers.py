@@ -0,0 +1,107 @@
+"""This script measures the speed of trigger matching.
+
+A synthetic world is created with a given number of triggers (both
+simple triggers and regular expressions), then a transcript of lines
+is matched against these triggers in three ways:
+
+1.  Testing every trigger against every line (the old behavior).
+2.  Using the trigger set without the literal prefilter.
+3.  Using the trigger set with the literal prefilter.
+
+The number of lines matched per second is displayed for each method.
+
+Usage:
+    python bench_triggers.py --triggers 600 --lines 20000
+
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(
+        __file__)), "..", "src"))
+
+from scripting.trigger import Trigger
+from scripting.trigger_set import TriggerSet
+
+# Create an argument parser
+parser = argparse.ArgumentParser(
+        description="measure the speed of trigger matching")
+parser.add_argument("--triggers", type=int, default=600,
+        help="the number of triggers to create")
+parser.add_argument("--lines", type=int, default=20000,
+        help="the number of lines to match")
+parser.add_argument("--regex", type=float, default=0.5,
+        help="the proportion of regular expressions among triggers")
+parser.add_argument("--seed", type=int, default=0,
+        help="the seed of the random generator")
+args = parser.parse_args()
+random.seed(args.seed)
+
+# Vocabulary used to generate triggers and lines
+SUBJECTS = ["You", "The rat", "A goblin", "Kredh", "The guard", "Someone"]
+VERBS = ["hit", "miss", "slash", "pierce", "bash", "tell", "give",
+        "receive", "drop", "take", "see", "hear"]
+WORDS = ["sword", "shield", "coins", "potion", "armor", "ring", "torch",
+        "bread", "water", "gem", "scroll", "key", "door", "chest"]
+
+def word(number):
+    """Return a unique word built from the vocabulary."""
+    return "{}{}".format(random.choice(WORDS), number)
+
+# Create the triggers
+engine = SimpleNamespace(level=None)
+sharp = SimpleNamespace(engine=engine, world=None)
+triggers = []
+for number in range(args.triggers):
+    subject = random.choice(SUBJECTS)
+    verb = random.choice(VERBS)
+    if random.random() < args.regex:
+        reaction = r"^{} {}s? (?:a|the) {}(?: of (\w+))?\.$".format(
+                subject, verb, word(number))
+    else:
+        reaction = "{} {} * {}.".format(subject, verb, word(number))
+
+    triggers.append(Trigger(sharp, reaction, "say ok"))
+
+# Create the lines
+lines = []
+for number in range(args.lines):
+    subject = random.choice(SUBJECTS)
+    verb = random.choice(VERBS)
+    lines.append("{} {} the {}.".format(subject, verb,
+            word(random.randrange(args.triggers * 2))))
+
+def naive(line):
+    """Test every trigger against the line."""
+    return [trigger for trigger in triggers if trigger.test(line)]
+
+def indexed(trigger_set):
+    """Return a function using the trigger set to match a line."""
+    def match(line):
+        return [trigger for trigger in trigger_set.find(line) if
+                trigger.test(line)]
+    return match
+
+methods = [
+    ("all triggers", naive),
+    ("trigger set", indexed(TriggerSet(triggers, prefilter=False))),
+    ("trigger set with prefilter", indexed(TriggerSet(triggers))),
+]
+
+print("{} triggers, {} lines".format(len(triggers), len(lines)))
+reference = None
+for name, method in methods:
+    begin = time.perf_counter()
+    matches = [method(line) for line in lines]
+    elapsed = time.perf_counter() - begin
+    if reference is None:
+        reference = matches
+    elif matches != reference:
+        print("  {} returned different matches!".format(name))
+
+    print("  {:<30} {:>12.0f} lines/s".format(name, len(lines) / elapsed))